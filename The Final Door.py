@@ -1,13 +1,76 @@
 # ----------------- Imports -----------------
-from OpenGL.GL import *          # Import OpenGL functions (used for drawing)
-from OpenGL.GLUT import *        # Import GLUT (used for input,shapes,text)
-from OpenGL.GLU import *         # Import GLU 
+import time                      # Startup timing (imported first so the clock covers the rest)
+STARTUP_T0 = time.perf_counter()  # Reference point for the startup timing breakdown
 import math                     
 import random                    # Random numbers for maze
 from collections import deque    # queue used in BFS
 import sys                       # args,exit
+import threading                 # Input table lock shared with the --threaded-sim thread
+# PyOpenGL (GL, GLUT, GLU) is not imported here: load_opengl() pulls it in from main() once the
+# run mode is known, because its error-check/logging flags only apply before OpenGL.GL is imported.
+
+# ----------------- Startup -----------------
+debug_mode = False                                   # --debug keeps PyOpenGL's per-call error checks
+startup_marks = []                                   # (label, perf_counter) pairs in startup order
+startup_complete = False                             # Set once the menu is fully interactive
+
+def mark_startup(label):
+    """Records the end of a startup phase for the timing breakdown."""
+    startup_marks.append((label, time.perf_counter()))
+
+def load_opengl(debug=False):
+    """Imports GL, GLUT and GLU into module globals (like `from ... import *`), release mode disables PyOpenGL's per-call error checking and logging."""
+    import OpenGL
+    if 'OpenGL.GL' in sys.modules and OpenGL.ERROR_CHECKING != debug:
+        print("Warning: OpenGL.GL was imported before load_opengl(), error-check flags not applied")
+    OpenGL.ERROR_CHECKING = debug                    # glGetError after every call
+    OpenGL.ERROR_LOGGING = debug                     # Logging wrapper around every call
+    import OpenGL.GL, OpenGL.GLUT, OpenGL.GLU
+    for module in (OpenGL.GL, OpenGL.GLUT, OpenGL.GLU):
+        names = getattr(module, '__all__', None) or [n for n in dir(module) if not n.startswith('_')]
+        globals().update((name, getattr(module, name)) for name in names)
+
+def report_startup():
+    """Prints the startup timing breakdown, ending with time-to-first-frame and time-to-interactive."""
+    print(f"--- Startup timing ({'debug' if debug_mode else 'release'} mode) ---")
+    previous = STARTUP_T0
+    for label, t in startup_marks:
+        print(f"  {label:<28}{(t - previous) * 1000:8.1f} ms")    # Duration of each phase
+        previous = t
+    marks = dict(startup_marks)
+    if 'first frame presented' in marks:
+        print(f"  time-to-first-frame: {(marks['first frame presented'] - STARTUP_T0) * 1000:.1f} ms")
+    print(f"  time-to-interactive: {(previous - STARTUP_T0) * 1000:.1f} ms")
 
 # ----------------- Maze Generation Classes -----------------
+GENERATION_SLICE = 256                               # Work items (cells, nodes, quads) between the yields of a resumable step
+
+def run_steps(steps):
+    """Runs a resumable step (a generator yielding its progress, 0 to 1) to the end in one go, returns its result."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as finished:
+            return finished.value
+
+def step_range(steps, start, end):
+    """Maps a resumable step's progress into [start, end] of the step running it, returns its result."""
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as finished:
+            return finished.value
+        yield start + (end - start) * progress
+
+def loading_stage(label, steps):
+    """Passes on a resumable step's progress as (label, progress) pairs for the loading overlay, returns its result."""
+    while True:
+        try:
+            progress = next(steps)
+        except StopIteration as finished:
+            return finished.value
+        yield label, progress
+
 class Cell:
     """Represents a single cell in the maze grid."""
     def __init__(self, x, y):
@@ -21,26 +84,47 @@ class Cell:
         self.has_hole = False                        # Hole trap flag
         self.spike_rotations = []                    # Random rotations for spike 
 
+def random_order(n):
+    """Yields 0..n-1 in random order, shuffling lazily (sparse Fisher-Yates: only drawn slots are stored)."""
+    swapped = {}                                     # Slot -> value for slots that were swapped
+    for i in range(n):
+        j = random.randrange(i, n)
+        yield swapped.get(j, j)
+        swapped[j] = swapped.pop(i, i)               # Slot i is never drawn again
+
 class Maze:
     """Generates and manages the maze structure using DFS."""
-    def __init__(self, width, height):
+    def __init__(self, width, height, walls=None, resumable=False):
         self.width = width                                          # Number of columns
         self.height = height                                        # Number of rows
-        self.grid = [[Cell(x, y) for y in range(height)]            # 2D list of Cell objects
-                     for x in range(width)]
+        self.grid = []                                              # 2D list of Cell objects, see grid_steps()
         self.goal = None                                           # gx, gy of exit cell
         self.start_x = -1                                          # Start cell x (set later)
         self.start_y = -1                                          # Start cell y (set later)
         self.main_path = set()                                     # Main path cells    
-        # Precalculate wall colors for visual
-        for x in range(width):
-            for y in range(height):
-                cell = self.grid[x][y]
+        self.junction_graph = None                                 # MazeGraph, see graph()
+        if resumable:
+            return                                                         # The loader runs grid_steps(), generate_steps()
+        run_steps(self.grid_steps())
+        if walls is None:
+            self.generate()                                                # Build the maze 
+        else:                                                              # Known layout: N|S<<1|E<<2|W<<3 per cell, x-major
+            for i, bits in enumerate(walls):
+                self.grid[i // height][i % height].walls = {'N': bool(bits & 1), 'S': bool(bits & 2),
+                                                            'E': bool(bits & 4), 'W': bool(bits & 8)}
+
+    def grid_steps(self):
+        """Fills the grid with closed cells and their wall colors, a column per step."""
+        for x in range(self.width):
+            column = [Cell(x, y) for y in range(self.height)]
+            for cell in column:                                    # Precalculate wall colors for visual
+                y = cell.y
                 cell.wall_colors['N'] = get_smooth_color(x, y, offset=0.1) # Shade north wall
                 cell.wall_colors['S'] = get_smooth_color(x, y, offset=0.2) # Shade south wall
                 cell.wall_colors['E'] = get_smooth_color(x, y, offset=0.3) # Shade east wall
                 cell.wall_colors['W'] = get_smooth_color(x, y, offset=0.4) # Shade west wall
-        self.generate()                                                    # Build the maze 
+            self.grid.append(column)
+            yield (x + 1) / self.width
 
     def get_neighbors(self, cell):
         """Find unvisited neighbors for maze generation.Each cell has up to 4 possible neighbors:North (above),South (below),East (right),West (left)."""
@@ -69,10 +153,15 @@ class Maze:
 
     def generate(self):
         """Recursive backtracking algorithm for maze generation."""
+        run_steps(self.generate_steps())
+
+    def generate_steps(self):
+        """generate() resumable: yields its progress every GENERATION_SLICE carved cells (same random draws)."""
         stack = []                                                 # Path stack
         start_cell = self.grid[random.randint(0, self.width - 1)][random.randint(0, self.height - 1)]                                               # Random start
         start_cell.visited = True                                  # Mark visited
         stack.append(start_cell)                                   # Push start
+        carved, total = 1, self.width * self.height
         while stack:                                               # While we have a path
             current_cell = stack[-1]                               # Look at (current)
             neighbors = self.get_neighbors(current_cell)           # Unvisited neighbors
@@ -81,117 +170,79 @@ class Maze:
                 next_cell.visited = True                           # Visit it
                 self.remove_walls(current_cell, next_cell) # Knock down wall
                 stack.append(next_cell)  # Move forward
+                carved += 1
+                if carved % GENERATION_SLICE == 0:
+                    yield carved / total
             else:
                 stack.pop() # Dead end → backtrack
 
+    def graph(self):
+        """The maze's MazeGraph, built on first use (walls don't change after generate())."""
+        if self.junction_graph is None:
+            self.junction_graph = MazeGraph(self)
+        return self.junction_graph
+
+    def graph_steps(self):
+        """graph() resumable: builds the MazeGraph a slice at a time, unless it is already there."""
+        if self.junction_graph is None:
+            graph = MazeGraph(self, resumable=True)
+            yield from graph.build_steps(self)
+            self.junction_graph = graph
+
     def compute_goal_from_start(self, sx, sy):
-        """Finds the furthest point from (sx, sy) using BFS to set as the goal."""
-        W, H = self.width, self.height                          
-        dist = [[-1] * H for _ in range(W)]                 # Distance grid unvisited = -1
-        q = deque([(sx, sy)]); dist[sx][sy] = 0             # BFS init
-        parent = {}                                         # For path reconstruction optional
-        queue_path = deque([(sx, sy)])                      # Working queue
-
-        while queue_path:                                   # BFS loop
-            x, y = queue_path.popleft()
-            c = self.grid[x][y]
-
-            neighbors = []                                # Graph neighbors through open walls
-            if not c.walls['N'] and y > 0: 
-                neighbors.append((x, y-1))
-            if not c.walls['S'] and y < H-1: 
-                neighbors.append((x, y+1))
-            if not c.walls['E'] and x < W-1: 
-                neighbors.append((x+1, y))
-            if not c.walls['W'] and x > 0: 
-                neighbors.append((x-1, y))
-
-            for nx, ny in neighbors:
-                if dist[nx][ny] == -1:                  # Unvisited
-                    dist[nx][ny] = dist[x][y] + 1       # Set distance
-                    parent[(nx, ny)] = (x, y)           # Record parent
-                    queue_path.append((nx, ny))         # Enqueue
-
-        # Find cell with maximum distance from start
-        gx, gy, md = 0, 0, -1
-        for i in range(W):
-            for j in range(H):
-                if dist[i][j] > md:
-                    md, gx, gy = dist[i][j], i, j
-        self.goal = (gx, gy)                             # Save goal
-
-        # Backtrack to find the main path optional as said parent use is optional
-        path = []
-        if (gx, gy) in parent or (gx, gy) == (sx, sy):
-            current = (gx, gy)
-            while current != (sx, sy):
-                path.append(current)
-                current = parent.get(current)             # Step to parent
-                if current is None: break                 # Safety
-            if current == (sx, sy):
-                path.append((sx, sy))
-        self.main_path = set(path)                        # Store as a set
-
-        return gx, gy, md                                 # Return goal and distance
+        """Finds the furthest point from (sx, sy) to set as the goal, one end of the maze's longest path."""
+        return run_steps(self.compute_goal_steps(sx, sy))
+
+    def compute_goal_steps(self, sx, sy):
+        """compute_goal_from_start() resumable: the graph build is the slow part, the goal itself is O(log n)."""
+        yield from self.graph_steps()
+        index = self.junction_graph
+        (gx, gy), md = index.farthest_from((sx, sy))        # O(log n) on the junction graph
+        self.goal = (gx, gy)                                # Save goal
+        self.main_path = set(index.path((sx, sy), self.goal))   # Main path cells as a set
+        return gx, gy, md                                   # Return goal and distance
 
     def find_shortest_path(self, start_pos, end_pos):
-        """BFS algorithm to find the shortest path between two points,used for cheat mode."""
-        sx, sy = start_pos                                # Start grid coords
-        ex, ey = end_pos                                  # End grid coords
-
-        q = deque([(sx, sy)])                             # BFS queue
-        parent = {(sx, sy): None}                         # Parent map for path
-        visited = {(sx, sy)}                              # Visited set
-
-        while q:
-            x, y = q.popleft()
-            if (x, y) == (ex, ey):                        # Reached goal
-                path = []
-                curr = (ex, ey)
-                while curr is not None:                   # Backtrack parents
-                    path.append(curr)
-                    curr = parent.get(curr)
-                return path[::-1]                         # Return in forward order
-
-            c = self.grid[x][y]
-            potential_neighbors = []                      # Explore through open walls
-            if not c.walls['N'] and y > 0: 
-                potential_neighbors.append((x, y - 1))
-            if not c.walls['S'] and y < self.height - 1: 
-                potential_neighbors.append((x, y + 1))
-            if not c.walls['E'] and x < self.width - 1: 
-                potential_neighbors.append((x + 1, y))
-            if not c.walls['W'] and x > 0: 
-                potential_neighbors.append((x - 1, y))
-
-            for nx, ny in potential_neighbors:
-                if (nx, ny) not in visited:               # Not seen yet
-                    visited.add((nx, ny))
-                    parent[(nx, ny)] = (x, y)
-                    q.append((nx, ny))
-        return []                                         # No path found
-
-    def place_traps(self, start_x, start_y):
+        """The path between two cells (the only one, the maze is a tree), used for cheat mode."""
+        return self.graph().path(start_pos, end_pos)
+
+    def place_traps(self, start_x, start_y, level=None):
         """Distributes traps (holes and spikes) across the maze,avoiding start/goal."""
-        level_settings = LEVEL_SETTINGS[current_level]              # Settings per level
+        run_steps(self.place_traps_steps(start_x, start_y, level))
+
+    def place_traps_steps(self, start_x, start_y, level=None):
+        """place_traps() resumable: yields its progress every GENERATION_SLICE traps (same random draws)."""
+        level_settings = LEVEL_SETTINGS[current_level if level is None else level]  # Settings per level
         num_holes = level_settings['hole_traps']                    # How many holes
         num_spikes = level_settings['spike_traps']                  # How many spikes
 
-        # Collect all valid locations for traps
-        trap_candidates = []                                        # valid cells
-        for x in range(self.width):
-            for y in range(self.height):
+        # Valid locations for traps in random order, drawn only as far as needed
+        def candidate_cells():
+            for cell_id in random_order(self.width * self.height):
+                x, y = divmod(cell_id, self.height)
                 if (x, y) != (start_x, start_y) and (x, y) != self.goal:
-                    trap_candidates.append(self.grid[x][y])         # Skip start/goal cells
-
-        random.shuffle(trap_candidates)                             # Randomize order
+                    yield self.grid[x][y]                           # Skip start/goal cells
+        trap_candidates = candidate_cells()
+        drawn = []                                                  # Candidates drawn so far, in order
         placed_trap_locations = set()                            # Avoid traps being too close
 
+        def offered_cells():
+            """The random order from the start for each trap type: cells already drawn, then new draws."""
+            for cell in drawn:
+                yield cell
+            for cell in trap_candidates:
+                drawn.append(cell)
+                yield cell
+
         def place_a_trap_type(num_to_place, is_hole):
             placed_count = 0
-            for cell in trap_candidates:
-                if placed_count >= num_to_place:
-                    break                                        # Done placing
+            offered = offered_cells()                            # Spikes get the cells holes passed over too
+            while placed_count < num_to_place:
+                if placed_count % GENERATION_SLICE == GENERATION_SLICE - 1:
+                    yield (placed_count + (0 if is_hole else num_holes)) / (num_holes + num_spikes)
+                cell = next(offered, None)
+                if cell is None:
+                    break                                        # Maze is full
                 if (cell.x, cell.y) in placed_trap_locations: 
                     continue                                     # Too close
 
@@ -211,13 +262,254 @@ class Maze:
                         placed_trap_locations.add((nx, ny))
                 placed_count += 1
 
-        place_a_trap_type(num_holes, is_hole=True)               # Place holes
-        place_a_trap_type(num_spikes, is_hole=False)             # Place spikes
+        yield from place_a_trap_type(num_holes, is_hole=True)    # Place holes
+        yield from place_a_trap_type(num_spikes, is_hole=False)  # Place spikes
+
+SIDE_BITS = (('N', 1), ('S', 2), ('E', 4), ('W', 8))   # Open side bits, as in the level snapshot's wall bytes
+
+class MazeGraph:
+    """The maze contracted to its junctions: exact distance and path between any two cells.
+
+    Nodes are the junction and dead-end cells (plus cell 0, the root), edges are the corridors of
+    degree-2 cells between them, kept as cell lists. Backtracker mazes are mostly corridor, so only
+    the nodes get a depth and 2^k-th ancestors (binary lifting); a corridor cell is just (corridor,
+    offset) and a path is expanded by slicing corridor lists. The maze is a spanning tree, so there
+    is exactly one path between two cells. Cells are numbered x * height + y.
+    """
+    def __init__(self, maze, resumable=False):
+        if not resumable:                                   # Otherwise the loader runs build_steps()
+            run_steps(self.build_steps(maze))
+
+    def build_steps(self, maze):
+        """Builds the graph, yielding its progress (by cells covered) every GENERATION_SLICE cells or nodes."""
+        from array import array
+        W, H = self.width, self.height = maze.width, maze.height
+        n = W * H
+        opened = bytearray(n)                               # Open sides per cell, SIDE_BITS
+        for x, column in enumerate(maze.grid):
+            for y, c in enumerate(column):
+                walls = c.walls
+                opened[x * H + y] = ((not walls['N'] and y > 0) | (not walls['S'] and y < H - 1) << 1 |
+                                     (not walls['E'] and x < W - 1) << 2 | (not walls['W'] and x > 0) << 3)
+            yield 0.3 * (x + 1) / W                         # Open sides (a column per step): the first 30%
+        self.open_sides = opened
+        self.steps = {'N': -1, 'S': 1, 'E': H, 'W': -H}     # Cell number offset per side
+        sides = [[self.steps[side] for side, bit in SIDE_BITS if mask & bit] for mask in range(16)]
+
+        self.corridor_of = array('i', [-1]) * n             # Corridor of a corridor cell, -1 for nodes
+        self.offset_of = array('i', [0]) * n                # Index in its corridor, 0 next to the parent node
+        self.node_of = array('i', [-1]) * n                 # Node number of a node cell
+        self.node_cell, self.node_parent = array('i', [0]), array('i', [0])   # Root: cell 0, its own parent
+        self.node_depth, self.node_level = array('i', [0]), array('i', [0])   # Steps / nodes from the root
+        self.node_corridor = array('i', [-1])               # Corridor up to the parent node
+        self.corridors = []                                 # Cell lists, parent node side first
+        self.corridor_parent, self.corridor_child = array('i'), array('i')
+        self.node_of[0] = 0
+        entry = [-1]                                        # Cell each node was reached from
+        k, seen = 0, 1
+        while k < len(self.node_cell):                      # BFS over nodes (picks up nodes appended below)
+            cell = self.node_cell[k]
+            for step in sides[opened[cell]]:
+                prev, nxt = cell, cell + step
+                if nxt == entry[k]:
+                    continue                                # Back up the tree
+                cells = []
+                while nxt and len(sides[opened[nxt]]) == 2: # Follow the corridor to the next node
+                    cells.append(nxt)
+                    a, b = sides[opened[nxt]]
+                    prev, nxt = nxt, (nxt + a if nxt + a != prev else nxt + b)
+                if self.node_of[nxt] >= 0 or self.corridor_of[nxt] >= 0:
+                    raise ValueError("maze has a loop")
+                corridor = len(self.corridors)
+                for offset, c in enumerate(cells):
+                    self.corridor_of[c], self.offset_of[c] = corridor, offset
+                self.corridors.append(cells)
+                self.corridor_parent.append(k)
+                self.corridor_child.append(len(self.node_cell))
+                self.node_of[nxt] = len(self.node_cell)
+                self.node_cell.append(nxt)
+                self.node_parent.append(k)
+                self.node_depth.append(self.node_depth[k] + len(cells) + 1)
+                self.node_level.append(self.node_level[k] + 1)
+                self.node_corridor.append(corridor)
+                entry.append(prev)
+                seen += len(cells) + 1
+            k += 1
+            if k % GENERATION_SLICE == 0:
+                yield 0.3 + 0.4 * seen / n                  # Corridors: the next 40%
+        if seen != n:
+            raise ValueError("maze is not connected")
+        self.corridor_positions = []                        # For path()
+        for i, cells in enumerate(self.corridors):
+            self.corridor_positions.append([divmod(c, H) for c in cells])
+            if i % GENERATION_SLICE == GENERATION_SLICE - 1:
+                yield 0.7 + 0.2 * i / len(self.corridors)
+        self.up = [self.node_parent]                        # up[j][k] = 2^j-th ancestor of node k
+        for _ in range(1, max(1, max(self.node_level).bit_length())):
+            prev = self.up[-1]
+            self.up.append(array('i', map(prev.__getitem__, prev)))
+            yield 0.9
+
+        # Longest path (diameter): u is the deepest cell, v the cell furthest from u (both dead ends,
+        # so nodes; ties go to the lowest cell number). For any cell, u or v is a furthest cell, which
+        # is what compute_goal_from_start() asks for
+        nodes = sorted(range(len(self.node_cell)), key=self.node_cell.__getitem__)
+        u = max(nodes, key=self.node_depth.__getitem__)
+        meet = array('i', [0]) * len(self.node_cell)        # depth of lca(node, u)
+        on_u_path, k = set(), u
+        while k not in on_u_path:
+            on_u_path.add(k)
+            k = self.node_parent[k]
+        for k in range(len(self.node_cell)):                # Parents come before children
+            meet[k] = self.node_depth[k] if k in on_u_path else meet[self.node_parent[k]]
+            if k % (4 * GENERATION_SLICE) == 0:
+                yield 0.9 + 0.1 * k / len(self.node_cell)
+        v = max(nodes, key=lambda k: self.node_depth[k] - 2 * meet[k])
+        self.diameter = (self.node_cell[u], self.node_cell[v])
+
+    def cell(self, pos):
+        """Cell number of an (x, y) grid position."""
+        return pos[0] * self.height + pos[1]
+
+    def pos(self, cell):
+        """(x, y) grid position of a cell number."""
+        return divmod(cell, self.height)
+
+    def depth(self, cell):
+        """Steps from the root cell."""
+        corridor = self.corridor_of[cell]
+        if corridor < 0:
+            return self.node_depth[self.node_of[cell]]
+        return self.node_depth[self.corridor_parent[corridor]] + self.offset_of[cell] + 1
+
+    def lower_node(self, cell):
+        """The cell's node, or for a corridor cell the node at the corridor's far end from the root."""
+        corridor = self.corridor_of[cell]
+        return self.node_of[cell] if corridor < 0 else self.corridor_child[corridor]
+
+    def node_lca(self, a, b):
+        """Lowest common ancestor of two nodes."""
+        level = self.node_level
+        if level[a] < level[b]:
+            a, b = b, a
+        steps, j = level[a] - level[b], 0
+        while steps:                                        # Same level first
+            if steps & 1:
+                a = self.up[j][a]
+            steps >>= 1
+            j += 1
+        if a == b:
+            return a
+        for up in reversed(self.up):                        # Climb while still apart
+            if up[a] != up[b]:
+                a, b = up[a], up[b]
+        return self.up[0][a]
+
+    def lca(self, a, b):
+        """Lowest common ancestor of two cell numbers."""
+        corridor = self.corridor_of[a]
+        if corridor >= 0 and corridor == self.corridor_of[b]:
+            return a if self.offset_of[a] <= self.offset_of[b] else b
+        node_a, node_b = self.lower_node(a), self.lower_node(b)
+        meet = self.node_lca(node_a, node_b)
+        if meet == node_a and (node_a != node_b or corridor >= 0):
+            return a                                        # a is on the way up from b
+        if meet == node_b:
+            return b
+        return self.node_cell[meet]
+
+    def cell_distance(self, a, b):
+        """Maze distance in steps between two cell numbers."""
+        return self.depth(a) + self.depth(b) - 2 * self.depth(self.lca(a, b))
+
+    def distance(self, start, end):
+        """Maze distance in steps between two (x, y) cells."""
+        return self.cell_distance(self.cell(start), self.cell(end))
+
+    def climb(self, cell, stop, positions=False):
+        """Cells from cell up to its ancestor stop, both included, a corridor slice at a time.
+
+        Cell numbers, or (x, y) positions with positions=True.
+        """
+        out = []
+        corridor_of, offset_of, corridor_parent, node_cell = self.corridor_of, self.offset_of, self.corridor_parent, self.node_cell
+        lists = self.corridor_positions if positions else self.corridors
+        stop_corridor = corridor_of[stop]
+        while cell != stop:
+            corridor = corridor_of[cell]
+            if corridor < 0:                                # Node: continue into the corridor above it
+                out.append(divmod(cell, self.height) if positions else cell)
+                corridor = self.node_corridor[self.node_of[cell]]
+                top = len(lists[corridor])
+            else:
+                top = offset_of[cell] + 1
+            if corridor == stop_corridor:
+                out.extend(lists[corridor][offset_of[stop]:top][::-1])
+                return out
+            out.extend(lists[corridor][top - 1::-1] if top else ())
+            cell = node_cell[corridor_parent[corridor]]
+        out.append(divmod(stop, self.height) if positions else stop)
+        return out
+
+    def path_cells(self, a, b):
+        """Cell numbers on the path from a to b, both included."""
+        meet = self.lca(a, b)
+        return self.climb(a, meet) + self.climb(b, meet)[-2::-1]
+
+    def path(self, start, end):
+        """The (x, y) cells on the path from start to end, both included."""
+        a, b = self.cell(start), self.cell(end)
+        meet = self.lca(a, b)
+        return self.climb(a, meet, True) + self.climb(b, meet, True)[-2::-1]
+
+    def ancestor_at(self, cell, depth):
+        """The ancestor of cell that is `depth` steps from the root."""
+        corridor = self.corridor_of[cell]
+        if corridor >= 0:
+            top = self.node_depth[self.corridor_parent[corridor]]
+            if depth > top:
+                return self.corridors[corridor][depth - top - 1]
+            k = self.corridor_parent[corridor]
+        else:
+            k = self.node_of[cell]
+        for up in reversed(self.up):                        # Shallowest node ancestor still at or below depth
+            if self.node_depth[up[k]] >= depth:
+                k = up[k]
+        if self.node_depth[k] == depth:
+            return self.node_cell[k]
+        return self.corridors[self.node_corridor[k]][depth - self.node_depth[self.node_parent[k]] - 1]
+
+    def next_step(self, start, end):
+        """The neighbouring (x, y) cell to move to from start towards end, None if already there."""
+        a, b = self.cell(start), self.cell(end)
+        if a == b:
+            return None
+        depth = self.depth(a)
+        if self.lca(a, b) != a:
+            return self.pos(self.ancestor_at(a, depth - 1)) # Up towards the common ancestor
+        return self.pos(self.ancestor_at(b, depth + 1))     # Down towards end
+
+    def farthest_from(self, start):
+        """The furthest (x, y) cell from start and its distance (one end of the longest path)."""
+        a = self.cell(start)
+        u, v = self.diameter
+        du, dv = self.cell_distance(a, u), self.cell_distance(a, v)
+        return (self.pos(u), du) if du >= dv else (self.pos(v), dv)
 
 # ----------------- Bullet Class -----------------
+entity_id_counter = 0                            # Last id handed out to a bullet/enemy
+
+def next_entity_id():
+    """Returns a new unique id for a game entity."""
+    global entity_id_counter
+    entity_id_counter += 1
+    return entity_id_counter
+
 class Bullet:
     """Represents a bullet fired by the player or an enemy."""
-    def __init__(self, x, y, angle, is_enemy=False):
+    def __init__(self, x, y, angle, is_enemy=False, owner=None):
+        self.uid = next_entity_id()              # Stable id (network snapshots)
+        self.owner = owner                       # Who fired it (multiplayer kill credit)
         self.x = x    # Current x position
         self.y = y                               # Current y position
         self.z = 33                              # Height above ground to draw bullet
@@ -237,6 +529,9 @@ class Bullet:
             # Check for wall collision
             if check_collision(self.x, self.y):                # Hits a wall?
                 self.active = False                            # Deactivate
+                if particles:                                  # Sparks off the wall, back where it came from
+                    particles.burst('spark', self.x - math.cos(angle_rad) * self.speed,
+                                    self.y - math.sin(angle_rad) * self.speed, self.z, self.angle + 180)
                 return
 
             # Check for out-of-bounds
@@ -253,7 +548,7 @@ class Bullet:
                 glColor3f(0.0, 1.0, 0.0)                       # Green if enemys bullet
             else:
                 glColor3f(1.0, 0.0, 0.0)                       # Red if players bullet
-            glutSolidSphere(self.radius, 8, 8)                 # Draw simple sphere
+            gluSphere(get_quadric(), self.radius, 8, 8)        # Draw simple sphere
             glPopMatrix()                                      # Restore transform
 
 # ----------------- Enemy Class -----------------
@@ -262,14 +557,12 @@ ENEMY_SIGHT_RANGE = 450.0            # How far enemies can see the player
 class Enemy:
     """Represents enemy."""
     def __init__(self, x, y):
+        self.set_fixed()                                    # uid, radius, speed, alive
         self.x = x                                          # Current x
         self.y = y                                          # Current y
         self.angle_deg = random.randint(0, 359)             # Facing direction
-        self.radius = 22.0                                  # Collision radius
         self.shoot_cooldown = random.randint(60, 120)       # cooldown until next shot
-        self.active = True                                   # Alive as active flag
         self.ammo = 10                                      # Shots available
-        self.speed = 0.07                                   # enemy movement speed
         # patrol means enemy jei jayga pahara dicche je player ashtese kina
         self.patrol_start = (x, y)                          # patrolstart point A
         self.patrol_end = self.find_patrol_end()            # patrolend point B
@@ -277,41 +570,41 @@ class Enemy:
             self.patrol_end = self.patrol_start             # Fallback
         self.target_pos = self.patrol_end                   # Current patrol target
 
+    def set_fixed(self):
+        """The attributes every new enemy starts with, whatever its state."""
+        self.uid = next_entity_id()                         # Stable id (network snapshots)
+        self.radius = 22.0                                  # Collision radius
+        self.active = True                                  # Alive as active flag
+        self.speed = 0.07                                   # enemy movement speed
+
+    @classmethod
+    def from_state(cls, values):
+        """An enemy with the ENEMY_STATE_FIELDS values a LevelSnapshot saved (no patrol search, no random draws)."""
+        enemy = cls.__new__(cls)
+        enemy.set_fixed()
+        for field, value in zip(ENEMY_STATE_FIELDS, values):
+            setattr(enemy, field, value)
+        return enemy
+
     def find_patrol_end(self):
         """Find a nearby location for the enemy to patrol to."""
         start_gx, start_gy = int(self.x / CELL_SIZE), int(self.y / CELL_SIZE)   # Grid coords
-        start_cell = game_maze.grid[start_gx][start_gy]                         # Cell object
-
-        possible_directions = []                          # Directions with no wall
-        if not start_cell.walls['N']: 
-            possible_directions.append('N')
-        if not start_cell.walls['S']: 
-            possible_directions.append('S')
-        if not start_cell.walls['E']: 
-            possible_directions.append('E')
-        if not start_cell.walls['W']: 
-            possible_directions.append('W')
+        graph = game_maze.graph()
+        cell = graph.cell((start_gx, start_gy))
+
+        possible_directions = [(bit, graph.steps[side]) for side, bit in SIDE_BITS
+                               if graph.open_sides[cell] & bit]   # Directions with no wall (N, S, E, W)
         if not possible_directions: 
             return None                                  # Nowhere to go
 
-        direction = random.choice(possible_directions)   # Pick a direction
-        current_x, current_y = start_gx, start_gy
+        bit, step = random.choice(possible_directions)   # Pick a direction
         path_length = random.randint(2, 5)               # Patrol length in cells
 
         for _ in range(path_length):                     # Walk forward along chosen direction
-            cell = game_maze.grid[current_x][current_y]
-            next_x, next_y = current_x, current_y
-            if direction == 'N' and not cell.walls['N'] and current_y > 0: 
-                next_y -= 1
-            elif direction == 'S' and not cell.walls['S'] and current_y < MAZE_HEIGHT - 1:     
-                next_y += 1
-            elif direction == 'E' and not cell.walls['E'] and current_x < MAZE_WIDTH - 1:      
-                next_x += 1
-            elif direction == 'W' and not cell.walls['W'] and current_x > 0: 
-                next_x -= 1
-            else: 
+            if not graph.open_sides[cell] & bit:
                 break                                    # Stop at wall 
-            current_x, current_y = next_x, next_y
+            cell += step
+        current_x, current_y = graph.pos(cell)
 
         return (current_x * CELL_SIZE + CELL_SIZE / 2,     # Convert grid to wall coords
                 current_y * CELL_SIZE + CELL_SIZE / 2)
@@ -333,8 +626,8 @@ class Enemy:
                 return False
         return True                                              # Clear line(no blockade)
 
-    def update(self):
-        """Update enemy state: either follow player/fire at player."""
+    def update(self, ticks=1):
+        """Update enemy state: either follow player/fire at player. `ticks` is how many ticks this update stands for."""
         if not self.active: return
 
         if self.can_see_player():                                # Player visible?
@@ -342,7 +635,7 @@ class Enemy:
             dx, dy = player_x - self.x, player_y - self.y        # Face player
             self.angle_deg = math.degrees(math.atan2(dy, dx))
             # fire Cooldown 
-            self.shoot_cooldown -= 1
+            self.shoot_cooldown -= ticks
             if self.shoot_cooldown <= 0:
                 self.fire()
                 self.shoot_cooldown = random.randint(60, 120)    # Reset cooldown
@@ -361,8 +654,9 @@ class Enemy:
                 dx, dy = target_x - self.x, target_y - self.y
                 self.angle_deg = math.degrees(math.atan2(dy, dx))
                 angle_rad = math.radians(self.angle_deg)
-                next_x = self.x + math.cos(angle_rad) * self.speed
-                next_y = self.y + math.sin(angle_rad) * self.speed
+                step = min(self.speed * ticks, dist_to_target)    # Several ticks' walk, without overshooting
+                next_x = self.x + math.cos(angle_rad) * step
+                next_y = self.y + math.sin(angle_rad) * step
                 if not check_collision(next_x, next_y):       # Move if no wall
                     self.x, self.y = next_x, next_y
 
@@ -376,58 +670,14 @@ class Enemy:
         bullets.append(Bullet(bullet_x, bullet_y, self.angle_deg, is_enemy=True))# Add to list
 
     def draw(self):
-        """Draw the enemy."""
+        """Draw the enemy, with detail chosen by distance to the camera."""
         if not self.active: return
+        tier = select_lod_tier(self.uid, math.hypot(self.x - camera_eye[0], self.y - camera_eye[1], 40 - camera_eye[2]))
         glPushMatrix()                                            # Save transform
         glTranslatef(self.x, self.y, 0)                           # Move to enemy position
         glRotatef(self.angle_deg - 90, 0, 0, 1)                   # Rotate to face direction
         glScalef(0.5, 0.5, 0.5)                                   # Scale smaller
-        # Body (Torso)
-        glPushMatrix(); 
-        glTranslatef(0, 0, 40);                             # Red torso cube
-        glColor3f(1.0, 0.0, 0.0); 
-        glScalef(1.4, 1.0, 2.0); 
-        glutSolidCube(25); 
-        glPopMatrix()  
-        # Head
-        glPushMatrix(); 
-        glTranslatef(0, 0, 80);                              # Black head sphere 
-        glColor3f(0.0, 0.0, 0.0); 
-        gluSphere(gluNewQuadric(), 15, 16, 16); 
-        glPopMatrix()       
-        # Arms
-        glPushMatrix(); 
-        glTranslatef(-20, 0, 55);                           # Left arm
-        glRotatef(-90, 1, 0, 0); 
-        glColor3f(0.96, 0.8, 0.69); 
-        gluCylinder(gluNewQuadric(), 9, 5, 30, 10, 10); 
-        glPopMatrix()  
-        glPushMatrix(); 
-        glTranslatef(20, 0, 55);                            # Right arm 
-        glRotatef(-90, 1, 0, 0); 
-        glColor3f(0.96, 0.8, 0.69); 
-        gluCylinder(gluNewQuadric(), 9, 5, 30, 10, 10); 
-        glPopMatrix()   
-        # Gun Barrel
-        glPushMatrix(); 
-        glTranslatef(0, 10, 55);                            # Barrel
-        glRotatef(-90, 1, 0, 0); 
-        glColor3f(0.66, 0.66, 0.66); 
-        gluCylinder(gluNewQuadric(), 8, 6, 40, 10, 10); 
-        glPopMatrix()  
-        # Legs
-        glPushMatrix(); 
-        glTranslatef(-12, 0, 15);                              # Left leg
-        glRotatef(180, 1, 0, 0); 
-        glColor3f(0.0, 0.0, 0.0); 
-        gluCylinder(gluNewQuadric(), 10, 5, 50, 10, 10); 
-        glPopMatrix()   
-        glPushMatrix(); 
-        glTranslatef(12, 0, 15);                               # Right leg
-        glRotatef(180, 1, 0, 0); 
-        glColor3f(0.0, 0.0, 0.0); 
-        gluCylinder(gluNewQuadric(), 10, 5, 50, 10, 10); 
-        glPopMatrix()    
+        draw_humanoid((1.0, 0.0, 0.0), 10, tier)                  # Red torso, thick legs
         glPopMatrix()                                           # Restore transform
 
 # ---------------- Window & Scene info ----------------
@@ -441,8 +691,8 @@ demo_maze_angle = 0.0                          # Camera rotation for intro scree
 # ---------------- Player info----------------
 player_x, player_y = CELL_SIZE / 2, CELL_SIZE / 2   # Start at center of cell (0,0)
 player_angle_deg = 0.0                              # Facing angle
-PLAYER_SPEED = 9.0                                  # Movement speed
-TURN_SPEED = 4.0                                    # Turn speed (degrees per press)
+PLAYER_SPEED = 4.5                                  # Movement per tick while W/S is held
+TURN_SPEED = 2.0                                    # Turn per tick while A/D is held (degrees)
 PLAYER_RADIUS = 9.0                                 # Player collision radius
 player_z = PLAYER_RADIUS                            # Player base height
 max_health = 150                                    # Max HP
@@ -466,21 +716,43 @@ FP_CAM_HEIGHT = 60.0                                 # First person camera heigh
 # ---------------- Game State & Levels ----------------
 game_state = "intro_menu"                           # Current state
 game_over_message = "You were defeated!"            # Shown when dead
-current_level = 1                                   # Level index (1 to 3)
-MAZE_WIDTH, MAZE_HEIGHT = 12, 12                    # Default maze size 
+current_level = 1                                   # Level index (1 to 3, endless levels after)
+INTRO_MAZE_SIZE = (12, 12)                          # Menu background maze
+MAZE_WIDTH, MAZE_HEIGHT = INTRO_MAZE_SIZE           # Default maze size 
 MAX_ACTIVE_ENEMIES = 5                              # Max enemies active together
 enemies_to_spawn_count = 0                          # Remaining enemies(suppose level 2 te 20 ta enemy thake, but active thake 5 ta kore,jokhon ekta enemy ke mari tokhon remaining enemy theke arekjon active hoy, it's like khelar mathe player out hole arekjon name khelte)
 
 LEVEL_SETTINGS = {                                  # Per-level 
-    1: {'size': (8, 8),   'name': 'The Dawn Gardens',       'sky_color': (0.6, 0.7, 0.9, 1.0), 'total_enemies': 10, 'hole_traps': 2, 'spike_traps': 4},
-    2: {'size': (12, 12), 'name': 'The Sunstone Labyrinth', 'sky_color': (0.5, 0.7, 1.0, 1.0), 'total_enemies': 20, 'hole_traps': 5, 'spike_traps': 8},
-    3: {'size': (15, 15), 'name': 'The Midnight Maze',      'sky_color': (0.05, 0.05, 0.2, 1.0), 'total_enemies': 30, 'hole_traps': 8, 'spike_traps': 12}
+    1: {'size': (8, 8),   'name': 'The Dawn Gardens',       'sky_color': (0.6, 0.7, 0.9, 1.0), 'total_enemies': 10, 'hole_traps': 2, 'spike_traps': 4,  'ambient_light': 1.0,  'torches': False, 'entity_lighting': False},
+    2: {'size': (12, 12), 'name': 'The Sunstone Labyrinth', 'sky_color': (0.5, 0.7, 1.0, 1.0), 'total_enemies': 20, 'hole_traps': 5, 'spike_traps': 8,  'ambient_light': 1.0,  'torches': False, 'entity_lighting': False},
+    3: {'size': (15, 15), 'name': 'The Midnight Maze',      'sky_color': (0.05, 0.05, 0.2, 1.0), 'total_enemies': 30, 'hole_traps': 8, 'spike_traps': 12, 'ambient_light': 0.3, 'torches': True,  'entity_lighting': True}
 }
+STORY_LEVELS = len(LEVEL_SETTINGS)                  # Levels 1-3; endless levels are numbered after them
+ENDLESS_FIRST_LEVEL = STORY_LEVELS + 1              # Endless depth 1
+ENDLESS_START_SIZE = 16                             # Maze side at endless depth 1, in cells
+ENDLESS_GROWTH = 12                                 # Cells added to the side per endless depth
+ENDLESS_MAX_SIZE = 256                              # Largest endless maze side
+
+def settings_for_level(level):
+    """LEVEL_SETTINGS entry of a level, made on first use for endless levels: a bigger maze each depth, story themes in turn."""
+    if level not in LEVEL_SETTINGS:
+        depth = level - STORY_LEVELS
+        side = min(ENDLESS_MAX_SIZE, ENDLESS_START_SIZE + ENDLESS_GROWTH * (depth - 1))
+        theme = LEVEL_SETTINGS[(depth - 1) % STORY_LEVELS + 1]
+        LEVEL_SETTINGS[level] = {'size': (side, side), 'name': f"Endless Depth {depth}", 'sky_color': theme['sky_color'],
+                                 'total_enemies': 10 + 5 * depth, 'hole_traps': side * side // 30, 'spike_traps': side * side // 20,
+                                 'ambient_light': theme['ambient_light'], 'torches': theme['torches'],
+                                 'entity_lighting': theme['entity_lighting']}
+    return LEVEL_SETTINGS[level]
+
+def next_level(level):
+    """The level after this one: the next story or endless level, None after the last story level."""
+    return level + 1 if level < STORY_LEVELS or level >= ENDLESS_FIRST_LEVEL else None
 
 # --------------- Cheat Mode info -----------------
 cheat_mode_active = False                           # Is cheat mode on?
 cheat_path = []                                     # Shortest path list for guidance
-last_player_grid_pos = (-1, -1)   #player move korle bfs chole to calculate path from player to enemy, ejonno player er last fgrid ta save rakha hoy, jodi dekha jay, last grid same ase it means player move korenai so bfs cholena, but last grid change hoile means player move korse, tokhon bfs chole.
+console_output = True                               # Console prints (off for headless runs)
 # --------------- Collision -----------------
 HOLE_RADIUS = CELL_SIZE / 3.5                       # radius for hole trap
 SPIKE_RADIUS = CELL_SIZE / 3.0                      # radius for spikes
@@ -533,52 +805,260 @@ def check_camera_collision(x, y):
     return False
 
 def get_random_position():
-    """Finds a valid unoccupied grid cell far from the player for enemies."""
-    while True:
-        gx, gy = random.randint(0, MAZE_WIDTH - 1), random.randint(0, MAZE_HEIGHT - 1) # Random cell
-        # Avoid start/goal cells for enemy
-        if (gx, gy) == (game_maze.start_x, game_maze.start_y) or (gx, gy) == game_maze.goal: continue
-        px, py = gx * CELL_SIZE + CELL_SIZE / 2, gy * CELL_SIZE + CELL_SIZE / 2 # Center of cell
-        # Ensure enemy location is reasonably far from player
-        if math.hypot(px - player_x, py - player_y) > CELL_SIZE * 3:
-            return px, py                                    # right spot for enemies
-
-def check_traps():
-    """Checks if the player is over a trap cell and applies damage/effects."""
-    global game_state, game_over_message, player_health, spike_cooldown
+    """Finds a valid grid cell far from the player for enemies (O(1) draw from the level's spawn index)."""
+    gx, gy = spawn_index.draw()                             # Bands already follow the player (cell enter trigger)
+    return gx * CELL_SIZE + CELL_SIZE / 2, gy * CELL_SIZE + CELL_SIZE / 2   # Center of cell
+
+# ---------- Cell Triggers ----------
+trigger_cell = None                    # Player's cell as of the last trigger update (None: fire enter on the next one)
+
+class CellTriggers:
+    """Handlers fired by the player's cell transitions and by being within a radius of a cell's center.
+
+    A tick where the player stays in a cell without zones costs one cell computation and one dict
+    lookup; distances are only measured in cells that have a zone (trap, goal). New cell features
+    register a zone or an enter/leave handler here instead of adding another per-tick check.
+    """
+    def __init__(self):
+        self.on_enter = []             # handler(cell) for every cell the player enters
+        self.on_leave = []             # handler(cell) for every cell the player leaves
+        self.zones = {}                # (x, y) -> [(radius squared, center x, center y, handler())]
+
+    def add_zone(self, cell, radius, handler):
+        """Calls handler() every tick the player is closer than radius to the cell's center."""
+        if radius > 0:
+            x, y = cell
+            self.zones.setdefault(cell, []).append((radius * radius, x * CELL_SIZE + CELL_SIZE / 2, y * CELL_SIZE + CELL_SIZE / 2, handler))
+
+    def update(self, x, y):
+        """Fires the handlers for the player at (x, y)."""
+        global trigger_cell
+        cell = (int(x // CELL_SIZE), int(y // CELL_SIZE))
+        if cell != trigger_cell:
+            old, trigger_cell = trigger_cell, cell
+            if old is not None:
+                for handler in self.on_leave:
+                    handler(old)
+            for handler in self.on_enter:
+                handler(cell)
+        for radius_sq, cx, cy, handler in self.zones.get(cell, ()):
+            if (x - cx) ** 2 + (y - cy) ** 2 < radius_sq:
+                handler()
+
+def cell_triggers(maze):
+    """The maze's triggers: trap and goal zones, plus the spawn index and cheat path following the player (cached)."""
+    if getattr(maze, 'cell_triggers', None) is None:
+        triggers = maze.cell_triggers = CellTriggers()
+        triggers.on_enter += [follow_spawn_bands, refresh_cheat_path]
+        for column in maze.grid:
+            for cell in column:
+                if cell.has_hole:
+                    triggers.add_zone((cell.x, cell.y), HOLE_RADIUS - PLAYER_RADIUS, fall_into_hole)
+                if cell.has_spikes:
+                    triggers.add_zone((cell.x, cell.y), SPIKE_RADIUS - PLAYER_RADIUS, step_on_spikes)
+        if maze.goal:
+            triggers.add_zone(tuple(maze.goal), PLAYER_RADIUS + 20, reach_goal)
+    return maze.cell_triggers
+
+def update_cell_triggers():
+    """Runs the current level's triggers for the player's position (replaces polling traps, goal and guidance)."""
+    cell_triggers(game_maze).update(player_x, player_y)
+
+def follow_spawn_bands(cell):
+    """Re-buckets the spawn index around the player's old and new cell."""
+    if 0 <= cell[0] < MAZE_WIDTH and 0 <= cell[1] < MAZE_HEIGHT:
+        spawn_index.follow(cell)
+
+def refresh_cheat_path(cell):
+    """Recomputes the guidance path from the new cell while cheat mode is on."""
+    if cheat_mode_active:
+        update_cheat_mode()
+
+def fall_into_hole():
+    """Hole trap: instant death."""
+    global game_state, game_over_message, player_health
     if cheat_mode_active:
         return                                              # Ignore traps in cheat mode
+    player_health = 0
+    game_over_message, game_state = "You fell into a hole!", "game_over"
 
-    grid_x, grid_y = int(player_x / CELL_SIZE), int(player_y / CELL_SIZE) #Player gridposition
-    if not (0 <= grid_x < MAZE_WIDTH and 0 <= grid_y < MAZE_HEIGHT): 
+def step_on_spikes():
+    """Spike trap: damage, then a cooldown before it hurts again."""
+    global game_state, game_over_message, player_health, spike_cooldown
+    if cheat_mode_active or spike_cooldown > 0:
         return
-    cell = game_maze.grid[grid_x][grid_y]                             # Current cell
-
-    # Calculate distance to make sure trap is within maze/cell center
-    cx, cy = grid_x * CELL_SIZE + CELL_SIZE/2, grid_y * CELL_SIZE + CELL_SIZE/2  # Cell center
-    dist_from_center = math.hypot(player_x - cx, player_y - cy)       # Distance to center
+    player_health -= 15
+    player_health = max(0, player_health)
+    spike_cooldown = 30
+    if telemetry:
+        telemetry.emit('damage', source='spikes', amount=15, health=player_health)
+    if player_health == 0:
+        game_over_message, game_state = "You ran into the spikes!", "game_over"
+
+def reach_goal():
+    """Goal: the level is complete."""
+    global game_state
+    if game_state != "playing":
+        return                                              # Only during play
+    game_state = "level_complete"                           # Win!
+    if console_output:
+        print("Level Complete!")
 
-    # Hole trap check (instant death)
-    if cell.has_hole and dist_from_center < HOLE_RADIUS - PLAYER_RADIUS:
-        player_health = 0
-        game_over_message, game_state = "You fell into a hole!", "game_over"
+# ---------- Spawn Index ----------
+SPAWN_BAND_EDGES = (3, 6, 10)          # Distance bands from the player in cells; band 0 (up to 3) is too close
+SPAWN_METRIC = 'euclidean'             # 'euclidean' (between cell centers) or 'maze' (walking distance)
+spawn_index = None                     # SpawnIndex of the current level, built by start_game()
+
+class SpawnIndex:
+    """Spawnable cells bucketed by distance band from the player, for O(1) enemy spawn draws.
+
+    Each band is a list with swap-remove and every cell's band and slot are kept in arrays, so when
+    the player changes cell only the cells within the outer band edge of the old or new cell are
+    re-bucketed; everything further away is in the last band either way.
+    """
+    def __init__(self, maze, player_cell, excluded=(), metric=SPAWN_METRIC, resumable=False):
+        from array import array
+        self.maze, self.metric, self.height = maze, metric, maze.height
+        self.player_cell = player_cell
+        self.bands = [[] for _ in range(len(SPAWN_BAND_EDGES) + 1)]
+        n = maze.width * maze.height
+        self.band_of = array('b', [-1]) * n                 # -1: never spawnable (start, goal)
+        self.slot_of = array('i', [0]) * n                  # Index in its band's list
+        self.excluded = {x * self.height + y for x, y in excluded}
+        if not resumable:                                   # Otherwise the loader runs fill_steps()
+            run_steps(self.fill_steps())
+
+    def fill_steps(self):
+        """Buckets every spawnable cell, a maze column per step."""
+        for x in range(self.maze.width):
+            for cell in range(x * self.height, (x + 1) * self.height):
+                if cell not in self.excluded:
+                    self.insert(cell, self.band_for(cell))
+            yield (x + 1) / self.maze.width
+
+    def distance(self, cell):
+        """Distance in cells from the player's cell."""
+        x, y = divmod(cell, self.height)
+        if self.metric == 'maze':
+            return self.maze.graph().distance((x, y), self.player_cell)
+        return math.hypot(x - self.player_cell[0], y - self.player_cell[1])
+
+    def band_for(self, cell):
+        """Distance band of a cell from the player's cell."""
+        distance = self.distance(cell)
+        for band, edge in enumerate(SPAWN_BAND_EDGES):
+            if distance <= edge:
+                return band
+        return len(SPAWN_BAND_EDGES)
+
+    def insert(self, cell, band):
+        self.band_of[cell], self.slot_of[cell] = band, len(self.bands[band])
+        self.bands[band].append(cell)
+
+    def remove(self, cell):
+        """Swap-remove: the band's last cell takes this cell's slot."""
+        band, slot = self.bands[self.band_of[cell]], self.slot_of[cell]
+        last = band.pop()
+        if last != cell:
+            band[slot], self.slot_of[last] = last, slot
+
+    def follow(self, player_cell):
+        """Updates the bands after the player moved to player_cell."""
+        if player_cell == self.player_cell:
+            return
+        old, self.player_cell = self.player_cell, player_cell
+        reach = int(math.ceil(SPAWN_BAND_EDGES[-1]))     # Beyond this (either metric) nothing changes band
+        seen = set()
+        for cx, cy in (old, player_cell):
+            for x in range(max(0, cx - reach), min(self.maze.width, cx + reach + 1)):
+                for y in range(max(0, cy - reach), min(self.height, cy + reach + 1)):
+                    cell = x * self.height + y
+                    if cell in seen or self.band_of[cell] < 0:
+                        continue
+                    seen.add(cell)
+                    band = self.band_for(cell)
+                    if band != self.band_of[cell]:
+                        self.remove(cell)
+                        self.insert(cell, band)
 
-    # Spike trap check (instant damage in health )
-    if cell.has_spikes and dist_from_center < SPIKE_RADIUS - PLAYER_RADIUS and spike_cooldown <= 0:
-        player_health -= 15
-        player_health = max(0, player_health)
-        spike_cooldown = 30                                         
-        if player_health == 0:
-            game_over_message, game_state = "You ran into the spikes!", "game_over"
+    def draw(self):
+        """A uniformly random cell outside band 0, or the furthest spawnable cell if there is none."""
+        far_bands = self.bands[1:]
+        pick = random.randrange(sum(len(band) for band in far_bands) or 1)
+        for band in far_bands:
+            if pick < len(band):
+                return divmod(band[pick], self.height)
+            pick -= len(band)
+        player = self.player_cell[0] * self.height + self.player_cell[1]
+        near = [cell for cell in self.bands[0] if cell != player]
+        if near:                                            # Tiny maze: nowhere is far enough
+            return divmod(max(near, key=self.distance), self.height)
+        return divmod(max(range(len(self.band_of)), key=self.distance), self.height)   # Only excluded cells left: still not the player's
+
+# ---------- AI Scheduler ----------
+AI_UPDATE_INTERVALS = ((600.0, 1), (1200.0, 3), (float('inf'), 8))   # (max distance to the player, ticks between updates)
+AI_TICK_BUDGET_MS = 1.0                # Enemy updates stop for the tick once this much time is spent (one always runs)
+ai_budget_ms = AI_TICK_BUDGET_MS       # None: no time budget, so headless runs don't depend on machine speed
+
+class AIScheduler:
+    """Runs Enemy.update at a rate set by relevance, within a per-tick time budget (ai_budget_ms).
+
+    Enemies wait in a timing wheel keyed by the tick they are next due, so a tick only touches the
+    enemies due on it: the cost follows the active enemies, not total_enemies. Anything within
+    sight range is due every tick; further enemies every 3rd or 8th tick, with that many ticks of
+    movement and cooldown per update. Due enemies the budget doesn't reach are served first on the
+    next tick (round robin), so a slow tick delays enemies but never starves one.
+    """
+    def __init__(self):
+        self.tick = 0
+        self.due = {}                        # Tick -> enemies due on it
+        self.carry = deque()                 # Due enemies left over from the last tick's budget
+        self.last_run = {}                   # Enemy -> tick of its last update
+        self.updates = self.deferred = 0     # Totals, for reports
+
+    def add(self, enemy):
+        """Schedules a newly spawned enemy for the next tick."""
+        self.last_run[enemy] = self.tick
+        self.due.setdefault(self.tick + 1, []).append(enemy)
+
+    def interval(self, enemy):
+        """Ticks until the enemy's next update, from its distance to the player."""
+        distance = math.hypot(player_x - enemy.x, player_y - enemy.y)
+        for edge, interval in AI_UPDATE_INTERVALS:
+            if distance <= edge:
+                return interval
+
+    def run_tick(self):
+        """Updates the enemies due this tick (plus last tick's leftovers first) until the budget runs out."""
+        self.tick += 1
+        queue = self.carry
+        queue.extend(self.due.pop(self.tick, ()))
+        deadline = time.perf_counter() + ai_budget_ms / 1000.0 if ai_budget_ms is not None else None
+        ran = 0
+        while queue:
+            if ran and deadline is not None and time.perf_counter() > deadline:
+                self.deferred += len(queue)                  # Stay at the front for the next tick
+                break
+            enemy = queue.popleft()
+            if not enemy.active:
+                self.last_run.pop(enemy, None)                # Dead: drops out of the schedule
+                continue
+            enemy.update(self.tick - self.last_run[enemy])    # Covers every tick since its last update
+            self.last_run[enemy] = self.tick
+            self.due.setdefault(self.tick + self.interval(enemy), []).append(enemy)
+            ran += 1
+        self.updates += ran
+
+ai_scheduler = AIScheduler()           # Enemy updates of the current level, replaced by start_game()
 
 # ---------- Game Logic ----------
-def fire_bullet():
+def fire_bullet(owner=None):
     """Fires a bullet from the player's position and angle."""
     if game_state == "playing":
         angle_rad = math.radians(player_angle_deg)                  # Player facing radians
         bullet_x = player_x + 12 * math.cos(angle_rad)              # Start slightly forward
         bullet_y = player_y + 12 * math.sin(angle_rad)
-        bullets.append(Bullet(bullet_x, bullet_y, player_angle_deg))  # Add to list
+        bullets.append(Bullet(bullet_x, bullet_y, player_angle_deg, owner=owner))  # Add to list
 
 def spawn_enemy():
     """Spawns a new enemy at a random valid location."""
@@ -587,93 +1067,228 @@ def spawn_enemy():
         return                          # No more enemies in waiting list
     ex, ey = get_random_position()                                  # Get spawn spot
     enemies.append(Enemy(ex, ey))                                   # Create enemy
+    ai_scheduler.add(enemies[-1])                                   # Give it update slots
     enemies_to_spawn_count -= 1     #when an enemy dies, Reduce enemy queue/ waiting list
 
 def update_cheat_mode():
-    """Recalculates the shortest path for cheat mode guidance."""
-    global last_player_grid_pos, cheat_path
+    """Recalculates the shortest path for cheat mode guidance (on toggle and on every cell enter)."""
+    global cheat_path
     current_grid_pos = (int(player_x / CELL_SIZE), int(player_y / CELL_SIZE))  # Where player is now
-    # Only update path if player moves to a new cell 
-    if current_grid_pos != last_player_grid_pos:
-        if game_maze and game_maze.goal:
-            cheat_path = game_maze.find_shortest_path(current_grid_pos, game_maze.goal) # BFS path
-        last_player_grid_pos = current_grid_pos
-
-def update_game_logic():
-    """Main update cycle for all game entities and collision checks."""
-    global bullets, enemies, game_state, game_over_message, killed_enemies, player_health, spike_cooldown
-
-    if cheat_mode_active:
-        update_cheat_mode()                                    # Refresh guidance path
-
-    if spike_cooldown > 0:
-        spike_cooldown -= 1                                    # make sure no dying
+    if game_maze and game_maze.goal and game_state != "loading":             # Mid-build: the first tick fills it in
+        cheat_path = game_maze.find_shortest_path(current_grid_pos, game_maze.goal) # BFS path
 
-    # Update bullets and remove inactive ones
+def update_bullets():
+    """Moves all bullets and drops the inactive ones."""
     for bullet in bullets: bullet.update()                           # Move bullets
     bullets[:] = [b for b in bullets if b.active]                    # Drop inactive
 
-    # Update enemies
-    for enemy in enemies: 
-        enemy.update()                            
+def update_enemies():
+    """Runs the enemies' sight/aim/patrol updates that are due this tick."""
+    ai_scheduler.run_tick()
 
-    # Process bullet collisions
-    for bullet in list(bullets):                                     
-        if not bullet.active: 
+def resolve_player_bullets():
+    """Player bullets kill the enemies they touch, returns the bullets that scored a kill."""
+    global killed_enemies
+    scored = []
+    for bullet in bullets:
+        if not bullet.active or bullet.is_enemy: 
             continue
-        if not bullet.is_enemy:
-            # Player bullet hits enemy
-            for enemy in enemies:
-                if enemy.active and math.hypot(bullet.x - enemy.x, bullet.y - enemy.y) < enemy.radius + bullet.radius:
-                    enemy.active = False                             # Kill enemy
-                    bullet.active = False                            # Remove bullet
-                    killed_enemies += 1                              # Count kill
-                    break
-        else:
-            # Enemy bullet hits player
-            if not cheat_mode_active and math.hypot(bullet.x - player_x, bullet.y - player_y) < PLAYER_RADIUS + bullet.radius:
-                player_health -= 10                                  # Damage
-                player_health = max(0, player_health)
-                bullet.active = False
-                if player_health <= 0:                               # Death
-                    game_over_message, game_state = "You were shot by an enemy!", "game_over"
-                    return
+        for enemy in enemies:
+            if enemy.active and math.hypot(bullet.x - enemy.x, bullet.y - enemy.y) < enemy.radius + bullet.radius:
+                enemy.active = False                             # Kill enemy
+                bullet.active = False                            # Remove bullet
+                killed_enemies += 1                              # Count kill
+                if particles:
+                    particles.burst('debris', enemy.x, enemy.y, 30)
+                if telemetry:
+                    telemetry.emit('kill', kills=killed_enemies, x=round(enemy.x), y=round(enemy.y))
+                scored.append(bullet)
+                break
+    return scored
 
-    # Process player collision with active enemies
+def resolve_enemy_bullets():
+    """Enemy bullets damage the player, returns True if the player died."""
+    global game_state, game_over_message, player_health
+    for bullet in bullets:
+        if not bullet.active or not bullet.is_enemy:
+            continue
+        if not cheat_mode_active and math.hypot(bullet.x - player_x, bullet.y - player_y) < PLAYER_RADIUS + bullet.radius:
+            player_health -= 10                                  # Damage
+            player_health = max(0, player_health)
+            bullet.active = False
+            if telemetry:
+                telemetry.emit('damage', source='bullet', amount=10, health=player_health)
+            if player_health <= 0:                               # Death
+                game_over_message, game_state = "You were shot by an enemy!", "game_over"
+                return True
+    return False
+
+def resolve_enemy_contact():
+    """Touching an active enemy kills the player, returns True if it happened."""
+    global game_state, game_over_message, player_health
     for enemy in enemies:
         if not cheat_mode_active and enemy.active and math.hypot(player_x - enemy.x, player_y - enemy.y) < PLAYER_RADIUS + enemy.radius:
             game_over_message, game_state = "You ran into an enemy!", "game_over"
             player_health = 0
-            return
+            return True
+    return False
+
+def spawn_waiting_enemies():
+    """Calls an enemy from the waiting queue when below the active limit."""
+    active_enemy_count = sum(1 for e in enemies if e.active)
+    if active_enemy_count < MAX_ACTIVE_ENEMIES and enemies_to_spawn_count > 0:
+        spawn_enemy()
+
+def update_game_logic():
+    """Main update cycle for all game entities and collision checks."""
+    global spike_cooldown
 
-    # Process trap collisions
-    check_traps()
+    if spike_cooldown > 0:
+        spike_cooldown -= 1                                    # make sure no dying
+
+    update_bullets()                                           # Move bullets, drop inactive
+    update_enemies()                                           # Sight, aim, patrol
+
+    # Process bullet collisions
+    resolve_player_bullets()                                   # Player bullets hit enemies
+    if resolve_enemy_bullets():                                # Enemy bullets hit player
+        return
+
+    # Process player collision with active enemies
+    if resolve_enemy_contact():
+        return
+
+    # Traps, goal, guidance path and spawn bands (only does work on cell changes and in trap/goal cells)
+    update_cell_triggers()
     if game_state == 'game_over': 
         return
 
     # when reached max level for calling out enemies from waiting queues
-    active_enemy_count = sum(1 for e in enemies if e.active)
-    if active_enemy_count < MAX_ACTIVE_ENEMIES and enemies_to_spawn_count > 0:
-        spawn_enemy()
+    spawn_waiting_enemies()
 
 # ---------- Game Reset & Level Progression ----------
+LEVEL_STATE_FIELDS = ('current_level', 'MAZE_WIDTH', 'MAZE_HEIGHT', 'player_x', 'player_y', 'player_z',
+                      'player_angle_deg', 'player_health', 'killed_enemies', 'spike_cooldown', 'enemies_to_spawn_count',
+                      'current_cam_x', 'current_cam_y', 'current_cam_h', 'current_look_at_x', 'current_look_at_y',
+                      'level_clock')
+ENEMY_STATE_FIELDS = ('x', 'y', 'angle_deg', 'shoot_cooldown', 'ammo', 'patrol_start', 'patrol_end', 'target_pos')
+level_snapshot = None                  # LevelSnapshot taken by start_game(), used by restart_level()
+level_attempt = 0                      # Bumped by every start or restart (per-attempt caches like the minimap's)
+
+class LevelSnapshot:
+    """The state of a level right after start_game(), in compact form, for instant restarts.
+
+    The maze is kept as one wall bitmask byte and one trap byte per cell (x-major) plus spike
+    rotations, goal and main path; enemies as ENEMY_STATE_FIELDS tuples. restore() reuses the live
+    Maze object (and every geometry cache keyed on it) when it is still the level's maze, and only
+    rebuilds one from the bytes otherwise, so a restart never generates anything.
+    """
+    def __init__(self, resumable=False):
+        self.maze = game_maze
+        self.start, self.goal = (game_maze.start_x, game_maze.start_y), game_maze.goal
+        self.state = {field: globals()[field] for field in LEVEL_STATE_FIELDS}
+        self.enemies = [tuple(getattr(enemy, field) for field in ENEMY_STATE_FIELDS) for enemy in enemies]
+        self.random_state = random.getstate()                   # Enemies start out making the same choices
+        if not resumable:                                       # Otherwise the loader runs pack_steps()
+            run_steps(self.pack_steps())
+
+    def pack_steps(self):
+        """Packs the maze's walls, traps and main path (the part that grows with the maze), a column per step."""
+        from array import array
+        walls, traps, self.spike_rotations = bytearray(), bytearray(), array('f')
+        for x, column in enumerate(self.maze.grid):
+            walls.extend(c.walls['N'] | c.walls['S'] << 1 | c.walls['E'] << 2 | c.walls['W'] << 3 for c in column)
+            traps.extend(c.has_hole | c.has_spikes << 1 for c in column)
+            self.spike_rotations.extend(r for c in column if c.has_spikes for r in c.spike_rotations)
+            yield (x + 1) / self.maze.width
+        self.walls, self.traps = bytes(walls), bytes(traps)
+        self.main_path = array('i', (x * self.maze.height + y for x, y in self.maze.main_path))
+
+    def unpack_maze(self):
+        """A Maze with the snapshot's walls, traps, goal and main path, without generating it."""
+        width, height = self.state['MAZE_WIDTH'], self.state['MAZE_HEIGHT']
+        maze = Maze(width, height, walls=self.walls)
+        rotations = iter(self.spike_rotations)
+        for i, trap in enumerate(self.traps):
+            if trap:
+                cell = maze.grid[i // height][i % height]
+                cell.has_hole, cell.has_spikes = bool(trap & 1), bool(trap & 2)
+                if cell.has_spikes:
+                    cell.spike_rotations = [next(rotations) for _ in range(4)]
+        maze.start_x, maze.start_y = self.start
+        maze.goal = self.goal
+        maze.main_path = {divmod(cell, height) for cell in self.main_path}
+        return maze
+
+    def restore(self):
+        """Puts the level back as start_game() left it, in time proportional to the entity count."""
+        global game_maze, game_state, spawn_index, level_attempt, trigger_cell, ai_scheduler
+        if game_maze is not self.maze:
+            game_maze = self.maze = self.unpack_maze()
+            spawn_index = SpawnIndex(game_maze, self.start, excluded=[self.start, self.goal])
+        else:
+            spawn_index.follow(self.start)                       # Re-bucket only around the player's old and new cell
+        globals().update(self.state)
+        bullets.clear()
+        enemies.clear()
+        lod_tiers.clear()
+        if particles:
+            particles.clear()                                    # No bursts left over from the last attempt
+        ai_scheduler = AIScheduler()
+        for values in self.enemies:
+            enemy = Enemy.from_state(values)
+            enemies.append(enemy)
+            ai_scheduler.add(enemy)
+        random.setstate(self.random_state)
+        trigger_cell = None                                      # Start cell's enter triggers fire again
+        level_attempt += 1
+        game_state = "playing"                                   # Last: the simulation thread starts ticking
+        publish_render_state()
+        if telemetry:
+            telemetry.emit('level_start', seed=level_seed, size=[MAZE_WIDTH, MAZE_HEIGHT],
+                           name=LEVEL_SETTINGS[current_level]['name'], enemies=LEVEL_SETTINGS[current_level]['total_enemies'],
+                           restart=True)
+
+def restart_level():
+    """Restarts the current level from its snapshot (same maze, traps and enemies), or starts it fresh without one."""
+    if level_snapshot is None or level_snapshot.state['current_level'] != current_level:
+        start_game(current_level)
+        return
+    level_snapshot.restore()
+    if console_output:
+        print(f"--- Restarting {LEVEL_SETTINGS[current_level]['name']} ---")
+
 def start_game(level=1):
     """Initializes all variables for starting a new level."""
-    global game_maze, player_x, player_y, player_angle_deg, game_state, player_z
+    run_steps(start_game_steps(level))                         # Build it in one go
+    begin_level()
+
+def start_game_steps(level):
+    """start_game()'s level build as resumable steps, yielding (stage, progress) for the loading overlay.
+
+    The random draws are the same as in one go, so a seed builds the same level either way.
+    """
+    global game_maze, player_x, player_y, player_angle_deg, player_z
     global MAZE_WIDTH, MAZE_HEIGHT, current_level, bullets, enemies, enemies_to_spawn_count
     global current_cam_x, current_cam_y, current_cam_h, current_look_at_x, current_look_at_y
-    global player_health, killed_enemies, spike_cooldown
+    global player_health, killed_enemies, spike_cooldown, spawn_index, level_snapshot, ai_scheduler
+    global trigger_cell, level_seed, level_clock
 
     current_level = level                                      # Set current level
-    level_settings = LEVEL_SETTINGS[current_level]             # Load settings
+    level_settings = settings_for_level(current_level)         # Load settings
     MAZE_WIDTH, MAZE_HEIGHT = level_settings['size']           # Override maze size
 
-    # Set lighting and sky color for the level theme
-    update_lighting(current_level)                              # Enable/disable lighting
-    glClearColor(*level_settings['sky_color'])                  # Background color
+    # Lighting and sky color are applied by apply_level_theme() on the next frame, so this
+    # function stays free of GL calls and can run headless (autopilot, tools)
+
+    level_seed = random.randrange(1 << 32)                     # Every level reproducible from its seed (telemetry rows,
+    random.seed(level_seed)                                    # --analyze rows), with or without --telemetry
 
     # Generate maze and place player at start position
-    game_maze = Maze(MAZE_WIDTH, MAZE_HEIGHT)                   # Build maze
+    maze = Maze(MAZE_WIDTH, MAZE_HEIGHT, resumable=True)
+    yield from loading_stage('Laying out cells', maze.grid_steps())
+    yield from loading_stage('Carving passages', maze.generate_steps())
+    game_maze = maze                                            # Built maze
     start_x, start_y = random.randint(0, MAZE_WIDTH-1), random.randint(0, MAZE_HEIGHT-1)  # Random start cell
     game_maze.start_x, game_maze.start_y = start_x, start_y
     player_x, player_y = start_x * CELL_SIZE + CELL_SIZE/2, start_y * CELL_SIZE + CELL_SIZE/2  # Start pos
@@ -682,45 +1297,381 @@ def start_game(level=1):
     # Clear old game objects and prepare enemy spawning queue
     bullets.clear(); 
     enemies.clear()                            # Reset lists
+    ai_scheduler = AIScheduler()
+    lod_tiers.clear()                          # Old entities' detail tiers
+
+    # Calculate goal and place traps (before spawning, so enemies avoid the goal cell)
+    gx, gy, d = yield from loading_stage('Mapping junctions', game_maze.compute_goal_steps(start_x, start_y))  # Furthest as goal
+    yield from loading_stage('Placing traps', game_maze.place_traps_steps(start_x, start_y))          # Put traps
+    spawn_index = SpawnIndex(game_maze, (start_x, start_y), excluded=[(start_x, start_y), (gx, gy)], resumable=True)
+    yield from loading_stage('Spawn areas', spawn_index.fill_steps())
+
     enemies_to_spawn_count = level_settings['total_enemies']    # Queue enemies
     for _ in range(min(enemies_to_spawn_count, MAX_ACTIVE_ENEMIES)):
         spawn_enemy()                                           # Spawn up to max
 
-    # Calculate goal and place traps
-    gx, gy, d = game_maze.compute_goal_from_start(start_x, start_y)  # Furthest as goal
-    game_maze.place_traps(start_x, start_y)                          # Put traps
-
     # Reset camera position and player state
     current_cam_x, current_cam_y, current_cam_h = player_x, player_y, cam_height  # Camera near player
     current_look_at_x, current_look_at_y = player_x, player_y                     # Look at player
-    game_state = "playing"                                       # Switch to playing
     player_health = max_health                                   # Full health
     killed_enemies = 0                                           # Reset kills
     spike_cooldown = 0                                           # Reset cooldown
-
-    print(f"--- Starting {level_settings['name']} ---")          # Debug info
-    print(f"Total enemies for level: {level_settings['total_enemies']}")
-    print(f"New maze generated ({MAZE_WIDTH}x{MAZE_HEIGHT}). Start={(start_x,start_y)}, Goal={(gx, gy)}")
+    trigger_cell = None                                          # Enter triggers fire for the start cell
+    level_clock = 0                                              # Level time in ticks
+    snapshot = LevelSnapshot(resumable=True)                     # For instant restarts
+    yield from loading_stage('Level snapshot', snapshot.pack_steps())
+    level_snapshot = snapshot
+
+def begin_level():
+    """Puts the level start_game_steps() built into play."""
+    global game_state, level_attempt
+    level_settings = LEVEL_SETTINGS[current_level]
+    level_attempt += 1
+    if particles:
+        particles.clear()                                        # No sparks left over from the last level
+    game_state = "playing"                                       # Switch to playing (last: the simulation thread starts ticking)
+    publish_render_state()                                       # --threaded-sim: no frame of the old level
+    if telemetry:
+        telemetry.emit('level_start', seed=level_seed, size=[MAZE_WIDTH, MAZE_HEIGHT], name=level_settings['name'],
+                       enemies=level_settings['total_enemies'], restart=False)
+
+    if console_output:
+        print(f"--- Starting {level_settings['name']} ---")          # Debug info
+        print(f"Total enemies for level: {level_settings['total_enemies']}")
+        print(f"New maze generated ({MAZE_WIDTH}x{MAZE_HEIGHT}). "
+              f"Start={(game_maze.start_x, game_maze.start_y)}, Goal={game_maze.goal}")
 
 def initialize_intro_scene():
     """Generates a maze purely for background visuals on the main menu."""
-    global game_maze
+    global game_maze, current_level, MAZE_WIDTH, MAZE_HEIGHT
+    if current_level > STORY_LEVELS:
+        current_level = 1                                        # Endless depths are far too big to bake in one frame
+    MAZE_WIDTH, MAZE_HEIGHT = INTRO_MAZE_SIZE
     game_maze = Maze(MAZE_WIDTH, MAZE_HEIGHT)                    # Build maze for menu
 
+# --------------- Level Loader -----------------
+GENERATION_BUDGET_MS = 8.0                                       # Level building time per frame while loading (--gen-budget)
+LOADING_STAGES = ('Laying out cells', 'Carving passages', 'Mapping junctions', 'Placing traps', 'Spawn areas',
+                  'Level snapshot', 'Baking lighting', 'Sorting chunks', 'Building geometry', 'Drawing the map')
+generation_budget_ms = GENERATION_BUDGET_MS
+level_loader = None                                              # load_level_steps() while game_state is "loading"
+loading_progress = (LOADING_STAGES[0], 0.0)                      # Last (stage, progress) the loader yielded
+queued_level = None                                              # Level picked in a menu, loaded after the next menu frame
+
+def load_level(level):
+    """Starts a level behind the loading overlay, built a slice per frame instead of in one go like start_game()."""
+    global level_loader, loading_progress, game_state, queued_level
+    if game_state in ("intro_menu", "level_select"):
+        queued_level = level                                     # Next menu frame keeps its scene for the loading screen
+        glutPostRedisplay()
+        return
+    level_loader = load_level_steps(level)
+    loading_progress = (LOADING_STAGES[0], 0.0)
+    game_state = "loading"
+
+def start_queued_level():
+    """Loads the level a menu click queued, once its menu frame is kept for the loading screen."""
+    global queued_level, game_state
+    level, queued_level = queued_level, None
+    game_state = "loading"                                       # Past the menu check in load_level()
+    load_level(level)
+
+def load_level_steps(level):
+    """start_game()'s build, then the renderer's and the minimap's data for the level, then play (GL thread only)."""
+    yield from start_game_steps(level)
+    yield from renderer.prepare_steps()
+    yield from loading_stage('Drawing the map', minimap.rebuild_steps(game_maze))
+    begin_level()
+
+def advance_level_loader():
+    """Runs the level loader until this frame's generation budget is spent (at least one step)."""
+    global level_loader, loading_progress
+    deadline = time.perf_counter() + generation_budget_ms / 1000
+    for loading_progress in level_loader:
+        if time.perf_counter() >= deadline:
+            return
+    level_loader = None                                          # begin_level() has switched to "playing"
+
+def baked_chunk_steps(maze, level):
+    """Lighting bake (unless done) and chunk split of the level's maze, for a renderer's prepare_steps(); returns the chunks."""
+    if getattr(maze, 'baked_mesh', None) is None or maze.baked_level != level:
+        yield from loading_stage('Baking lighting', bake_maze_lighting_steps(maze, level))
+    yield from loading_stage('Sorting chunks', step_range(trap_chunks_steps(maze), 0.0, 0.2))
+    return (yield from loading_stage('Sorting chunks', step_range(chunk_baked_mesh_steps(maze), 0.2, 1.0)))
+
 # --------------- Lighting -----------------
+applied_level_theme = None                                       # Level whose lighting/sky is active
+ENTITY_LIGHT_POSITION = (0.0, 0.0, 200.0, 1.0)                   # Positional light, in eye space
+ENTITY_LIGHT_AMBIENT = (0.2, 0.2, 0.3, 1.0)
+ENTITY_LIGHT_DIFFUSE = (0.8, 0.8, 0.7, 1.0)
+
+def apply_level_theme():
+    """Applies the current level's lighting and sky color once after a level change (GL thread only)."""
+    global applied_level_theme
+    if applied_level_theme == current_level:
+        return
+    update_lighting(current_level)                               # Enable/disable lighting
+    glClearColor(*LEVEL_SETTINGS[current_level]['sky_color'])    # Background color
+    applied_level_theme = current_level
+
 def update_lighting(level):
     """Sets up lighting conditions based on the level theme."""
-    if level == 3:                                               # Only level 3 uses lighting
-        glEnable(GL_LIGHTING); 
-        glEnable(GL_LIGHT0)               # Turn on lighting and light
-        light_pos = [0, 0, 200, 1]                               # positional light
-        light_ambient = [0.2, 0.2, 0.3, 1.0]                     # Soft ambient color
-        light_diffuse = [0.8, 0.8, 0.7, 1.0]                     # Diffuse color
-        glLightfv(GL_LIGHT0, GL_POSITION, light_pos)             # Apply position
-        glLightfv(GL_LIGHT0, GL_AMBIENT, light_ambient)          # Apply ambient
-        glLightfv(GL_LIGHT0, GL_DIFFUSE, light_diffuse)          # Apply diffuse
-    else:                                                        # Levels 1 and 2 are bright (no lighting)
-        glDisable(GL_LIGHTING)
+    # Every level's lighting (ambient, torches, corner occlusion) is baked into the maze
+    # geometry's vertex colors by bake_maze_lighting(), so fixed-function lighting stays off for it.
+    # Night levels still light the moving things (player, enemies, traps, goal) with LIGHT0.
+    glDisable(GL_LIGHTING)
+    if LEVEL_SETTINGS[level]['entity_lighting']:
+        glEnable(GL_LIGHT0)                                      # Only takes effect inside entity_light_on()
+        glLightfv(GL_LIGHT0, GL_AMBIENT, ENTITY_LIGHT_AMBIENT)   # Soft ambient color
+        glLightfv(GL_LIGHT0, GL_DIFFUSE, ENTITY_LIGHT_DIFFUSE)   # Diffuse color
+    else:
+        glDisable(GL_LIGHT0)
+
+def entity_light_on():
+    """Places the night levels' entity light at the camera (eye space), False on levels without it."""
+    if not LEVEL_SETTINGS[current_level]['entity_lighting']:
+        return False
+    glPushMatrix()
+    glLoadIdentity()
+    glLightfv(GL_LIGHT0, GL_POSITION, ENTITY_LIGHT_POSITION)    # Moves with the camera
+    glPopMatrix()
+    return True
+
+# --------------- Baked Lighting -----------------
+TORCH_RANGE = CELL_SIZE * 2.2                # Torch light reaches this far
+TORCH_HEIGHT = WALL_HEIGHT * 0.7             # Torches hang on walls at this height
+TORCH_COLOR = (1.0, 0.72, 0.4)               # Warm light tint
+TORCH_INTENSITY = 1.6                        # Brightness right next to a torch
+GOAL_LIGHT_COLOR = (0.5, 1.0, 0.5)           # The exit glows green
+WALL_BASE_AO = 0.7                           # Light left at the foot of a wall (contact shadow)
+LIGHTING_SLICE = 16                          # Wall segments or floor cells per step of a resumable bake (torch-lit vertices are slow)
+
+def wall_segments(maze):
+    """Every wall draw_maze draws, as (x1, y1, x2, y2, green_shade)."""
+    return run_steps(wall_segments_steps(maze))
+
+def wall_segments_steps(maze):
+    """wall_segments() resumable: a maze column per step."""
+    segments = []
+    for x in range(maze.width):
+        for y in range(maze.height):
+            cell = maze.grid[x][y]
+            x_pos, y_pos = x * CELL_SIZE, y * CELL_SIZE
+            if cell.walls['N']:
+                segments.append((x_pos, y_pos, x_pos + CELL_SIZE, y_pos, cell.wall_colors['N']))
+            if cell.walls['W']:
+                segments.append((x_pos, y_pos, x_pos, y_pos + CELL_SIZE, cell.wall_colors['W']))
+        yield (x + 1) / maze.width
+    for x in range(maze.width):                  # Outer boundary (always closed)
+        segments.append((x*CELL_SIZE, maze.height*CELL_SIZE, (x+1)*CELL_SIZE, maze.height*CELL_SIZE,
+                         maze.grid[x][maze.height - 1].wall_colors['S']))
+    for y in range(maze.height):
+        segments.append((maze.width*CELL_SIZE, y*CELL_SIZE, maze.width*CELL_SIZE, (y+1)*CELL_SIZE,
+                         maze.grid[maze.width - 1][y].wall_colors['E']))
+    return segments
+
+def corner_wall_counts(maze):
+    """Number of wall segments meeting at each grid corner (i, j), for corner occlusion."""
+    return run_steps(corner_wall_counts_steps(wall_segments(maze)))
+
+def corner_wall_counts_steps(segments):
+    """corner_wall_counts() resumable, from the maze's wall_segments(): GENERATION_SLICE segments per step."""
+    counts = {}
+    for i, (x1, y1, x2, y2, _) in enumerate(segments):
+        for corner in ((int(x1 / CELL_SIZE), int(y1 / CELL_SIZE)), (int(x2 / CELL_SIZE), int(y2 / CELL_SIZE))):
+            counts[corner] = counts.get(corner, 0) + 1
+        if i % GENERATION_SLICE == GENERATION_SLICE - 1:
+            yield i / len(segments)
+    return counts
+
+def wall_between(maze, ax, ay, bx, by):
+    """True if cells a and b (4-adjacent) are separated by a wall or one is outside the maze."""
+    if not (0 <= ax < maze.width and 0 <= ay < maze.height and 0 <= bx < maze.width and 0 <= by < maze.height):
+        return True
+    walls = maze.grid[ax][ay].walls
+    if bx == ax + 1: return walls['E']
+    if bx == ax - 1: return walls['W']
+    if by == ay + 1: return walls['S']
+    return walls['N']
+
+def segment_blocked(maze, x1, y1, x2, y2):
+    """True if a wall lies between two points (steps through the grid cells the segment crosses)."""
+    steps = max(1, int(math.hypot(x2 - x1, y2 - y1) / (CELL_SIZE / 4)))
+    cx, cy = int(x1 // CELL_SIZE), int(y1 // CELL_SIZE)
+    for i in range(1, steps + 1):
+        t = i / steps
+        nx, ny = int((x1 + (x2 - x1) * t) // CELL_SIZE), int((y1 + (y2 - y1) * t) // CELL_SIZE)
+        if (nx, ny) == (cx, cy):
+            continue
+        if nx != cx and ny != cy:                # Diagonal step: open if either L-shaped route is
+            if (wall_between(maze, cx, cy, nx, cy) or wall_between(maze, nx, cy, nx, ny)) and \
+               (wall_between(maze, cx, cy, cx, ny) or wall_between(maze, cx, ny, nx, ny)):
+                return True
+        elif wall_between(maze, cx, cy, nx, ny):
+            return True
+        cx, cy = nx, ny
+    return False
+
+def place_torches(maze):
+    """Torches on the closed wall of every T-junction, plus a light over the goal: (x, y, z, color)."""
+    return run_steps(place_torches_steps(maze))
+
+def place_torches_steps(maze):
+    """place_torches() resumable: a maze column per step."""
+    lights = []
+    offsets = {'N': (0, -1), 'S': (0, 1), 'E': (1, 0), 'W': (-1, 0)}
+    reach = CELL_SIZE / 2 - WALL_THICKNESS - 4   # From cell center to just off the wall face
+    for x in range(maze.width):
+        for y in range(maze.height):
+            closed = [side for side, wall in maze.grid[x][y].walls.items() if wall]
+            if len(closed) == 1:                 # Three open sides: a junction
+                dx, dy = offsets[closed[0]]
+                lights.append((x * CELL_SIZE + CELL_SIZE / 2 + dx * reach,
+                               y * CELL_SIZE + CELL_SIZE / 2 + dy * reach, TORCH_HEIGHT, TORCH_COLOR))
+        yield (x + 1) / maze.width
+    if maze.goal:
+        gx, gy = maze.goal
+        lights.append((gx * CELL_SIZE + CELL_SIZE / 2, gy * CELL_SIZE + CELL_SIZE / 2, 120.0, GOAL_LIGHT_COLOR))
+    return lights
+
+def bake_maze_lighting(maze, level):
+    """Builds the maze's wall and floor quads with lighting and corner AO baked into vertex colors.
+
+    Stores maze.baked_mesh (flat floats: x, y, z, r, g, b per vertex, 4 vertices per quad) and
+    maze.lights; the result only depends on the maze and level, so it is computed once per level.
+    """
+    run_steps(bake_maze_lighting_steps(maze, level))
+
+def bake_maze_lighting_steps(maze, level):
+    """bake_maze_lighting() resumable: every pass over the maze is sliced, the lit vertices LIGHTING_SLICE walls or cells at a time."""
+    from array import array
+    settings = LEVEL_SETTINGS[level]
+    ambient = settings['ambient_light']
+    lights = (yield from step_range(place_torches_steps(maze), 0.0, 0.05)) if settings['torches'] else []
+    lights_by_cell = {}
+    for light in lights:
+        lights_by_cell.setdefault((int(light[0] // CELL_SIZE), int(light[1] // CELL_SIZE)), []).append(light)
+    reach = int(TORCH_RANGE // CELL_SIZE) + 1
+    lights_near = {}                             # Cell -> torches within reach cells, in (cell x, cell y, list) order
+    for i, (cx, cy) in enumerate(sorted(lights_by_cell)):
+        if i % LIGHTING_SLICE == LIGHTING_SLICE - 1:
+            yield 0.05
+        for gx in range(cx - reach, cx + reach + 1):
+            for gy in range(cy - reach, cy + reach + 1):
+                lights_near.setdefault((gx, gy), []).extend(lights_by_cell[(cx, cy)])
+    segments = yield from step_range(wall_segments_steps(maze), 0.05, 0.1)
+    corners = yield from step_range(corner_wall_counts_steps(segments), 0.1, 0.15)
+    mesh = array('f')
+
+    def shade(x, y, z, normal, base, ao):
+        """Ambient * AO plus every unblocked torch in range, times the surface color."""
+        r = g = b = ambient * ao
+        for lx, ly, lz, color in lights_near.get((int(x // CELL_SIZE), int(y // CELL_SIZE)), ()):
+            dx, dy, dz = lx - x, ly - y, lz - z
+            dist = math.sqrt(dx*dx + dy*dy + dz*dz)
+            if dist >= TORCH_RANGE or dist == 0:
+                continue
+            facing = (normal[0]*dx + normal[1]*dy + normal[2]*dz) / dist
+            if facing <= 0 or segment_blocked(maze, x + normal[0]*2, y + normal[1]*2, lx, ly):
+                continue
+            power = TORCH_INTENSITY * facing * (1 - dist / TORCH_RANGE) ** 2 * (0.6 + 0.4 * ao)
+            r, g, b = r + power * color[0], g + power * color[1], b + power * color[2]
+        mesh.extend((x, y, z, min(1.0, base[0]*r), min(1.0, base[1]*g), min(1.0, base[2]*b)))
+
+    def corner_ao(x, y):
+        """Darkening near grid corners where several walls meet."""
+        ix, iy = round(x / CELL_SIZE), round(y / CELL_SIZE)
+        near = abs(x - ix * CELL_SIZE) <= WALL_THICKNESS and abs(y - iy * CELL_SIZE) <= WALL_THICKNESS
+        return 1.0 - 0.1 * max(0, corners.get((ix, iy), 0) - 1) if near else 1.0
+
+    # Walls: boxes like draw_wall, top and four sides (the bottom is never seen)
+    half_t = WALL_THICKNESS / 2
+    for i, (x1, y1, x2, y2, green_shade) in enumerate(segments):
+        if i % LIGHTING_SLICE == LIGHTING_SLICE - 1:
+            yield 0.15 + 0.4 * i / len(segments)
+        base = (0.1, green_shade, 0.1)
+        lo_x, hi_x = min(x1, x2) - half_t, max(x1, x2) + half_t
+        lo_y, hi_y = min(y1, y2) - half_t, max(y1, y2) + half_t
+        faces = (
+            ((0, 0, 1),  ((lo_x, lo_y, WALL_HEIGHT), (hi_x, lo_y, WALL_HEIGHT), (hi_x, hi_y, WALL_HEIGHT), (lo_x, hi_y, WALL_HEIGHT))),
+            ((0, -1, 0), ((lo_x, lo_y, 0), (hi_x, lo_y, 0), (hi_x, lo_y, WALL_HEIGHT), (lo_x, lo_y, WALL_HEIGHT))),
+            ((0, 1, 0),  ((hi_x, hi_y, 0), (lo_x, hi_y, 0), (lo_x, hi_y, WALL_HEIGHT), (hi_x, hi_y, WALL_HEIGHT))),
+            ((-1, 0, 0), ((lo_x, hi_y, 0), (lo_x, lo_y, 0), (lo_x, lo_y, WALL_HEIGHT), (lo_x, hi_y, WALL_HEIGHT))),
+            ((1, 0, 0),  ((hi_x, lo_y, 0), (hi_x, hi_y, 0), (hi_x, hi_y, WALL_HEIGHT), (hi_x, lo_y, WALL_HEIGHT))),
+        )
+        for normal, quad in faces:
+            for vx, vy, vz in quad:
+                ao = (WALL_BASE_AO if vz == 0 else 1.0) * corner_ao(vx, vy)
+                shade(vx, vy, vz, normal, base, ao)
+
+    # Floor: 2x2 quads per cell so wall edges and corners can darken
+    ground = (0.55, 0.4, 0.25)
+    half = CELL_SIZE / 2
+    for x in range(maze.width):
+        for y in range(maze.height):
+            walls = maze.grid[x][y].walls
+            x0, y0 = x * CELL_SIZE, y * CELL_SIZE
+            for qx in (0, 1):
+                for qy in (0, 1):
+                    for vx, vy in ((qx, qy), (qx + 1, qy), (qx + 1, qy + 1), (qx, qy + 1)):   # 0..2 across the cell
+                        ao = 1.0
+                        if vy == 0 and walls['N'] or vy == 2 and walls['S']: ao -= 0.15
+                        if vx == 0 and walls['W'] or vx == 2 and walls['E']: ao -= 0.15
+                        if vx != 1 and vy != 1:          # Cell corner: walls from neighbours too
+                            ao = min(ao, 1.0 - 0.1 * corners.get((x + vx // 2, y + vy // 2), 0))
+                        shade(x0 + vx * half, y0 + vy * half, 0.0, (0, 0, 1), ground, ao)
+            if y % LIGHTING_SLICE == LIGHTING_SLICE - 1:
+                yield 0.55 + 0.45 * (x * maze.height + y) / (maze.width * maze.height)
+
+    # Torch flames: small self-lit boxes (unaffected by the lighting above)
+    for i, (lx, ly, lz, color) in enumerate(lights):
+        if i % (LIGHTING_SLICE * 16) == LIGHTING_SLICE * 16 - 1:
+            yield 1.0
+        s = 5.0
+        for quad in (((lx-s, ly-s, lz+s), (lx+s, ly-s, lz+s), (lx+s, ly+s, lz+s), (lx-s, ly+s, lz+s)),
+                     ((lx-s, ly-s, lz-s), (lx+s, ly-s, lz-s), (lx+s, ly-s, lz+s), (lx-s, ly-s, lz+s)),
+                     ((lx+s, ly+s, lz-s), (lx-s, ly+s, lz-s), (lx-s, ly+s, lz+s), (lx+s, ly+s, lz+s)),
+                     ((lx-s, ly+s, lz-s), (lx-s, ly-s, lz-s), (lx-s, ly-s, lz+s), (lx-s, ly+s, lz+s)),
+                     ((lx+s, ly-s, lz-s), (lx+s, ly+s, lz-s), (lx+s, ly+s, lz+s), (lx+s, ly-s, lz+s))):
+            for vertex in quad:
+                mesh.extend(vertex + color)
+    maze.baked_mesh, maze.baked_level, maze.lights = mesh, level, lights
+
+baked_display_list = None                        # (maze, level, first list id, list count, {chunk: list id}) of the compiled mesh
+
+def draw_baked_maze(maze):
+    """Draws the baked maze mesh from display lists compiled once per maze, one per culling chunk in view (GL thread only)."""
+    global baked_display_list
+    if getattr(maze, 'baked_mesh', None) is None or maze.baked_level != current_level:
+        bake_maze_lighting(maze, current_level)
+    if baked_display_list is None or baked_display_list[0] is not maze or baked_display_list[1] != maze.baked_level:
+        run_steps(compile_baked_maze_steps(maze))             # New maze, or rebaked for another level
+    lists = baked_display_list[4]
+    for key in visible_chunks(maze):                 # Only chunks within the draw distance
+        if key in lists:
+            glCallList(lists[key])
+
+def compile_baked_maze_steps(maze, chunks=None):
+    """Compiles the baked mesh (already split into chunks, or split here) into display lists, a chunk per step (GL thread only)."""
+    global baked_display_list
+    if baked_display_list is not None:
+        glDeleteLists(baked_display_list[2], baked_display_list[3])   # Previous maze's geometry
+        baked_display_list = None
+    if chunks is None:
+        chunks = chunk_baked_mesh(maze)
+    first = glGenLists(len(chunks))
+    lists = {}
+    for list_id, (key, mesh) in enumerate(sorted(chunks.items()), first):
+        glNewList(list_id, GL_COMPILE)
+        glBegin(GL_QUADS)
+        for i in range(0, len(mesh), 6):
+            glColor3f(mesh[i+3], mesh[i+4], mesh[i+5])
+            glVertex3f(mesh[i], mesh[i+1], mesh[i+2])
+        glEnd()
+        glEndList()
+        lists[key] = list_id
+        yield (list_id - first + 1) / len(chunks)
+    baked_display_list = (maze, maze.baked_level, first, len(chunks), lists)
 
 # --------------- Drawing (Scene) -----------------
 def draw_pyramid():
@@ -736,9 +1687,24 @@ def draw_pyramid():
     glVertex3f(-base, -base, 0)                    # Close fan back to first base corner
     glEnd()
 
+def draw_cube(size):
+    """Solid cube centered on the origin, like glutSolidCube but without needing a GLUT window."""
+    h = size / 2
+    glBegin(GL_QUADS)
+    for normal, corners in (((0, 0, 1), ((-h, -h, h), (h, -h, h), (h, h, h), (-h, h, h))),
+                            ((0, 0, -1), ((-h, -h, -h), (-h, h, -h), (h, h, -h), (h, -h, -h))),
+                            ((1, 0, 0), ((h, -h, -h), (h, h, -h), (h, h, h), (h, -h, h))),
+                            ((-1, 0, 0), ((-h, -h, -h), (-h, -h, h), (-h, h, h), (-h, h, -h))),
+                            ((0, 1, 0), ((-h, h, -h), (-h, h, h), (h, h, h), (h, h, -h))),
+                            ((0, -1, 0), ((-h, -h, -h), (h, -h, -h), (h, -h, h), (-h, -h, h)))):
+        glNormal3f(*normal)
+        for corner in corners:
+            glVertex3f(*corner)
+    glEnd()
+
 def draw_cheat_path():
     """Draws the precalculated shortest path line on the ground for cheat mode."""
-    if not cheat_path: 
+    if not view.cheat_path: 
         return                       # Nothing to draw
 
     was_lit = glIsEnabled(GL_LIGHTING)              # Remember if lighting was on
@@ -749,7 +1715,7 @@ def draw_cheat_path():
     glLineWidth(5.0)                                # Thicker line for visibility
 
     glBegin(GL_LINE_STRIP)                          # Connect points in order
-    for (gx, gy) in cheat_path:
+    for (gx, gy) in view.cheat_path:
         glVertex3f(gx * CELL_SIZE + CELL_SIZE/2,gy * CELL_SIZE + CELL_SIZE/2,
         2.0)                             
     glEnd()
@@ -758,72 +1724,51 @@ def draw_cheat_path():
         glEnable(GL_LIGHTING)                       # Restore lighting if it was on
 
 def draw_3d_scene():
-    """drawing function for 3D elements."""
-    draw_ground()                                   # Ground plane
-    if game_maze:
-        draw_maze()                                 # Maze walls
-        if game_state in ["playing", "level_complete", "game_over"]:
-            if cheat_mode_active:
-                draw_cheat_path()                   # Path overlay
-            draw_goal(); 
-            draw_player(); 
-            draw_traps()                            # Portal/player/traps
-            for enemy in enemies: 
-                enemy.draw()      # Enemies
-            for bullet in bullets: 
-                bullet.draw()    # Bullets
+    """drawing function for 3D elements, through the active renderer backend."""
+    renderer.draw_scene()
+    if particles and view.game_state == "playing":
+        particles.draw()                                 # Sparks and debris, one draw call
 
 def draw_ground():
     """Draws a large ground."""
-    glColor3f(0.55, 0.4, 0.25)                       # Brown dirt color
+    light = LEVEL_SETTINGS[current_level]['ambient_light']   # Match the baked maze floor
+    glColor3f(0.55 * light, 0.4 * light, 0.25 * light)  # Brown dirt color
     ground_size = 10000                              
+    glDepthMask(GL_FALSE)                            # Lowest surface: never hides the maze floor
     glBegin(GL_QUADS)
-    glVertex3f(-ground_size, -ground_size, -0.1)    
-    glVertex3f( ground_size, -ground_size, -0.1)
-    glVertex3f( ground_size,  ground_size, -0.1)
-    glVertex3f(-ground_size,  ground_size, -0.1)
+    if fog_range is None:
+        glVertex3f(-ground_size, -ground_size, -0.1)    
+        glVertex3f( ground_size, -ground_size, -0.1)
+        glVertex3f( ground_size,  ground_size, -0.1)
+        glVertex3f(-ground_size,  ground_size, -0.1)
+    else:                                            # Fog is per vertex: tiles around the camera up to the draw distance
+        reach = fog_range[1]
+        step = reach * 2 / GROUND_FOG_TILES
+        x0, y0 = camera_eye[0] - reach, camera_eye[1] - reach
+        for i in range(GROUND_FOG_TILES):
+            for j in range(GROUND_FOG_TILES):
+                x, y = x0 + i * step, y0 + j * step
+                glVertex3f(x, y, -0.1)
+                glVertex3f(x + step, y, -0.1)
+                glVertex3f(x + step, y + step, -0.1)
+                glVertex3f(x, y + step, -0.1)
     glEnd()
-
-def draw_wall(x1, y1, x2, y2, green_shade):
-    """Draws a single wall segment as a scaled cube."""
-    glColor3f(0.1, green_shade, 0.1)                # Wall color 
-    mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2     # Segment midpoint
-    length = math.hypot(x2 - x1, y2 - y1)           # Segment length
-    glPushMatrix(); 
-    glTranslatef(mid_x, mid_y, WALL_HEIGHT / 2)   # Move to center,raise by half height
-    if abs(x1 - x2) > abs(y1 - y2):                 # Horizontal wall
-        glScalef(length + WALL_THICKNESS, WALL_THICKNESS, WALL_HEIGHT)  # Scale X by length
-    else:                                           # Vertical wall
-        glScalef(WALL_THICKNESS, length + WALL_THICKNESS, WALL_HEIGHT)  # Scale Y by length
-    glutSolidCube(1); 
-    glPopMatrix()                 
+    glDepthMask(GL_TRUE)
 
 def draw_maze():
-    """Iterates through maze cells and draws all existing walls."""
+    """Draws the maze walls and floor with their baked lighting."""
     if not game_maze: 
         return
-    for x in range(MAZE_WIDTH):
-        for y in range(MAZE_HEIGHT):
-            cell = game_maze.grid[x][y]                       # Current cell
-            x_pos, y_pos = x * CELL_SIZE, y * CELL_SIZE       # base coords
-            if cell.walls['N']:                               # North edge
-                draw_wall(x_pos, y_pos, x_pos + CELL_SIZE, y_pos, cell.wall_colors['N'])
-            if cell.walls['W']:                               # West edge
-                draw_wall(x_pos, y_pos, x_pos, y_pos + CELL_SIZE, cell.wall_colors['W'])
-    # Draw outer boundary walls to ensure maze is enclosed
-    for x in range(MAZE_WIDTH):
-        color = game_maze.grid[x][MAZE_HEIGHT - 1].wall_colors['S']     # Bottom edge color
-        draw_wall(x*CELL_SIZE, MAZE_HEIGHT*CELL_SIZE, (x+1)*CELL_SIZE, MAZE_HEIGHT*CELL_SIZE, color)
-    for y in range(MAZE_HEIGHT):
-        color = game_maze.grid[MAZE_WIDTH - 1][y].wall_colors['E']       # Right edge color
-        draw_wall(MAZE_WIDTH*CELL_SIZE, y*CELL_SIZE, MAZE_WIDTH*CELL_SIZE, (y+1)*CELL_SIZE, color)
+    draw_baked_maze(game_maze)
 
 def draw_traps():
-    """Draws hole and spike traps."""
+    """Draws hole and spike traps within the draw distance, at the governor's trap detail."""
     if not game_maze: 
         return
-    for x in range(MAZE_WIDTH):
-        for y in range(MAZE_HEIGHT):
+    trap_cells = trap_chunks(game_maze)
+    segments, small_spikes = TRAP_DETAIL[governor.trap_detail]
+    for key in visible_chunks(game_maze):
+        for x, y in trap_cells.get(key, ()):
             cell = game_maze.grid[x][y]
             cx, cy = x*CELL_SIZE + CELL_SIZE/2, y*CELL_SIZE + CELL_SIZE/2  # Cell center
 
@@ -834,8 +1779,8 @@ def draw_traps():
                 glTranslatef(cx, cy, 0.1)
                 glBegin(GL_TRIANGLE_FAN)
                 glVertex3f(0, 0, 0)                            # Center
-                for i in range(21):                            # 20 segments circle
-                    angle = 2 * math.pi * i / 20
+                for i in range(segments + 1):                  # 20 segments circle at full detail
+                    angle = 2 * math.pi * i / segments
                     glVertex3f(math.cos(angle) * HOLE_RADIUS,
                                math.sin(angle) * HOLE_RADIUS, 0)
                 glEnd(); 
@@ -856,7 +1801,7 @@ def draw_traps():
                 # Smaller surrounding spikes with random rotations
                 glColor3f(0.5, 0.5, 0.55)                     # darker gray
                 small_spike_positions = [(25, 20), (-25, 25), (15, -25), (-20, -15)]
-                if len(cell.spike_rotations) == len(small_spike_positions):
+                if small_spikes and len(cell.spike_rotations) == len(small_spike_positions):
                     for i, (sx, sy) in enumerate(small_spike_positions):
                         glPushMatrix()
                         glTranslatef(sx, sy, 0)                      # Offset position
@@ -865,67 +1810,110 @@ def draw_traps():
                         glPopMatrix()
                 glPopMatrix()
 
-def draw_player():
-    """Draws the player in third person view."""
-    if first_person: 
-        return                                            # Hidden in 1st person
-    glPushMatrix()
-    # If game over, make player fall over
-    if game_state == "game_over":
-        glTranslatef(player_x, player_y, 0)                # Move to player position
-        glRotatef(90, 0, 1, 0)                             # Tip over on side
+# --------------- Level of Detail -----------------
+LOD_TIERS = (                          # (max camera distance, sphere slices, cylinder slices, stacks)
+    (450.0, 16, 10, 10),               # Tier 0: full detail
+    (900.0, 10, 6, 2),                 # Tier 1
+    (1600.0, 6, 4, 1),                 # Tier 2
+)                                      # Further than the last tier: box impostor
+LOD_HYSTERESIS = 0.15                  # Fraction past a threshold needed before switching tiers
+lod_tiers = {}                         # Entity key -> current tier (keeps models from flickering)
+camera_eye = (0.0, 0.0, 0.0)           # Eye position of the current frame's camera
+shared_quadric = None                  # One GLU quadric reused by every model
+
+def get_quadric():
+    """Returns the shared GLU quadric, creating it on first use."""
+    global shared_quadric
+    if shared_quadric is None:
+        shared_quadric = gluNewQuadric()
+    return shared_quadric
+
+def select_lod_tier(key, distance):
+    """Detail tier for an entity at this camera distance, only moving one way past a threshold plus hysteresis."""
+    distance /= governor.lod_scale                     # Governor pulls the tiers closer under load
+    tier = lod_tiers.get(key)
+    if tier is None:                                   # First sight: plain thresholds
+        tier = next((i for i, t in enumerate(LOD_TIERS) if distance <= t[0]), len(LOD_TIERS))
     else:
-        glTranslatef(player_x, player_y, 0)                # Normal position
-        glRotatef(player_angle_deg, 0, 0, 1)               # Face facing direction
-
-    glRotatef(-90, 0, 0, 1); 
-    glScalef(0.6, 0.6, 0.6)       # Adjust base size
-    # Body (Torso) 
+        while tier < len(LOD_TIERS) and distance > LOD_TIERS[tier][0] * (1 + LOD_HYSTERESIS):
+            tier += 1                                  # Clearly further: coarser
+        while tier > 0 and distance < LOD_TIERS[tier - 1][0] * (1 - LOD_HYSTERESIS):
+            tier -= 1                                  # Clearly closer: finer
+    lod_tiers[key] = tier
+    return tier
+
+def draw_humanoid(body_color, leg_radius, tier):
+    """Draws the shared enemy/player model in model space (feet at z=0, facing +y) at an LOD tier."""
+    if tier >= len(LOD_TIERS):
+        # Impostor: torso-colored block plus a head block
+        glColor3f(*body_color)
+        glPushMatrix(); 
+        glTranslatef(0, 0, 32); 
+        glScalef(40, 25, 64); 
+        draw_cube(1); 
+        glPopMatrix()
+        glColor3f(0.0, 0.0, 0.0)
+        glPushMatrix(); 
+        glTranslatef(0, 0, 80); 
+        draw_cube(28); 
+        glPopMatrix()
+        return
+    _, sphere_slices, cylinder_slices, stacks = LOD_TIERS[tier]
+    quadric = get_quadric()
+    # Body (Torso)
     glPushMatrix(); 
     glTranslatef(0, 0, 40); 
-    glColor3f(0.0, 0.0, 0.50); 
+    glColor3f(*body_color); 
     glScalef(1.4, 1.0, 2.0); 
-    glutSolidCube(25); 
+    draw_cube(25); 
     glPopMatrix()
     # Head
     glPushMatrix(); 
     glTranslatef(0, 0, 80); 
     glColor3f(0.0, 0.0, 0.0); 
-    gluSphere(gluNewQuadric(), 15, 16, 16); 
+    gluSphere(quadric, 15, sphere_slices, sphere_slices); 
     glPopMatrix()
     # Arms
-    glPushMatrix(); 
-    glTranslatef(-20, 0, 55); 
-    glRotatef(-90, 1, 0, 0); 
-    glColor3f(0.96, 0.8, 0.69); 
-    gluCylinder(gluNewQuadric(), 9, 5, 30, 10, 10); 
-    glPopMatrix()
-    glPushMatrix(); 
-    glTranslatef(20, 0, 55); 
-    glRotatef(-90, 1, 0, 0); 
-    glColor3f(0.96, 0.8, 0.69); 
-    gluCylinder(gluNewQuadric(), 9, 5, 30, 10, 10); 
-    glPopMatrix()
+    for arm_x in (-20, 20):
+        glPushMatrix(); 
+        glTranslatef(arm_x, 0, 55); 
+        glRotatef(-90, 1, 0, 0); 
+        glColor3f(0.96, 0.8, 0.69); 
+        gluCylinder(quadric, 9, 5, 30, cylinder_slices, stacks); 
+        glPopMatrix()
     # Gun Barrel
     glPushMatrix(); 
     glTranslatef(0, 10, 55); 
     glRotatef(-90, 1, 0, 0); 
     glColor3f(0.66, 0.66, 0.66); 
-    gluCylinder(gluNewQuadric(), 8, 6, 40, 10, 10); 
+    gluCylinder(quadric, 8, 6, 40, cylinder_slices, stacks); 
     glPopMatrix()
     # Legs
-    glPushMatrix(); 
-    glTranslatef(-12, 0, 15); 
-    glRotatef(180, 1, 0, 0); 
-    glColor3f(0.0, 0.0, 0.0); 
-    gluCylinder(gluNewQuadric(), 8, 5, 50, 10, 10); 
-    glPopMatrix()
-    glPushMatrix(); 
-    glTranslatef(12, 0, 15); 
-    glRotatef(180, 1, 0, 0); 
-    glColor3f(0.0, 0.0, 0.0); 
-    gluCylinder(gluNewQuadric(), 8, 5, 50, 10, 10); 
-    glPopMatrix()
+    for leg_x in (-12, 12):
+        glPushMatrix(); 
+        glTranslatef(leg_x, 0, 15); 
+        glRotatef(180, 1, 0, 0); 
+        glColor3f(0.0, 0.0, 0.0); 
+        gluCylinder(quadric, leg_radius, 5, 50, cylinder_slices, stacks); 
+        glPopMatrix()
+
+def draw_player():
+    """Draws the player in third person view."""
+    if first_person: 
+        return                                            # Hidden in 1st person
+    tier = select_lod_tier('player', math.hypot(view.player_x - camera_eye[0], view.player_y - camera_eye[1], 40 - camera_eye[2]))
+    glPushMatrix()
+    # If game over, make player fall over
+    if view.game_state == "game_over":
+        glTranslatef(view.player_x, view.player_y, 0)      # Move to player position
+        glRotatef(90, 0, 1, 0)                             # Tip over on side
+    else:
+        glTranslatef(view.player_x, view.player_y, 0)      # Normal position
+        glRotatef(view.player_angle_deg, 0, 0, 1)          # Face facing direction
+
+    glRotatef(-90, 0, 0, 1); 
+    glScalef(0.6, 0.6, 0.6)       # Adjust base size
+    draw_humanoid((0.0, 0.0, 0.50), 8, tier)              # Blue torso, slimmer legs
     glPopMatrix()
 
 def draw_goal():
@@ -942,32 +1930,734 @@ def draw_goal():
     glPushMatrix(); 
     glTranslatef(0, 0, 6); 
     glScalef(40, 40, 12); 
-    glutSolidCube(1); 
+    draw_cube(1); 
     glPopMatrix()
     # Arch uprights
     glColor3f(0.2, 0.8, 0.2); 
     glPushMatrix(); 
     glTranslatef(-16, 0, 70); 
     glScalef(12, 12, 140); 
-    glutSolidCube(1); 
+    draw_cube(1); 
     glPopMatrix()
     glPushMatrix(); 
     glTranslatef(16, 0, 70); 
     glScalef(12, 12, 140); 
-    glutSolidCube(1); 
+    draw_cube(1); 
     glPopMatrix()
     # Arch top beam
     glColor3f(0.2, 0.6, 0.9); 
     glPushMatrix(); 
     glTranslatef(0, 0, 140); 
     glScalef(44, 12, 12); 
-    glutSolidCube(1); 
+    draw_cube(1); 
     glPopMatrix()
     glPopMatrix()
 
+# --------------- Frame Budget Governor -----------------
+FRAME_BUDGET_MS = 1000.0 / 60          # Default target frame time (--frame-budget, 0 = fixed full quality)
+GOVERNOR_WINDOW = 30                   # Frames judged together (also the wait after every change)
+GOVERNOR_SLOW_MARGIN = 1.1             # Step down when the 90th percentile frame interval exceeds budget * this
+GOVERNOR_HEADROOM = 0.6                # Step up when the 90th percentile frame work is below budget * this
+GOVERNOR_MAX_UPGRADE_WAIT = 32 * GOVERNOR_WINDOW   # Longest extra wait before retrying a step up that didn't hold
+GOVERNOR_LEVELS = (                    # (draw distance, LOD distance scale, trap detail, HUD every n frames, entity cap)
+    (20000.0, 1.0, 2, 1, None),        # Full quality: the original fixed far plane, no fog
+    (6000.0, 0.8, 2, 1, None),
+    (3500.0, 0.6, 1, 2, 48),
+    (2400.0, 0.4, 1, 3, 32),
+    (1600.0, 0.25, 0, 4, 16),          # Performance floor: the work per frame no longer grows with maze size or enemy count
+)
+TRAP_DETAIL = ((6, False), (12, False), (20, True))   # Per trap detail: (hole rim segments, small spikes around the big one)
+GROUND_FOG_TILES = 16                  # Ground tiles per side while fogged (fixed-function fog is interpolated per vertex)
+FOG_START_FRACTION = 0.6               # Fog starts at this share of the draw distance and is opaque at the far plane
+WORLD_CHUNK_CELLS = 4                  # Maze cells per side of a culling chunk
+
+def percentile(values, fraction):
+    """Value below which `fraction` of the values lie (nearest rank)."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+class FrameGovernor:
+    """Trades rendering cost for frame rate, one quality level at a time, from recent frame times.
+
+    Steps down when frames arrive later than the budget and back up once the work per frame (before
+    the buffer swap, so vsync waits don't count) leaves enough headroom.
+    """
+    def __init__(self, budget_ms=FRAME_BUDGET_MS):
+        self.budget = budget_ms / 1000.0 if budget_ms else None     # None: fixed full quality
+        self.work = deque(maxlen=GOVERNOR_WINDOW)                   # Seconds spent building each frame
+        self.intervals = deque(maxlen=GOVERNOR_WINDOW)              # Seconds between frames, as the player sees them
+        self.last_frame = None
+        self.history = deque(maxlen=20)                             # (seconds since start, level, reason) per change
+        self.verbose = False                                        # --show-governor: print every change
+        self.raised = False                                         # Last change was a step up, not judged yet
+        self.upgrade_wait = 0                                       # Frames of headroom needed before a step up
+        self.set_level(0, 'start')
+
+    def set_level(self, level, reason):
+        """Switches quality level and exposes its settings as attributes."""
+        self.level, self.reason = level, reason
+        self.draw_distance, self.lod_scale, self.trap_detail, self.hud_interval, self.entity_cap = GOVERNOR_LEVELS[level]
+        self.calm = 0                                               # Frames in a row with headroom
+        self.work.clear()                                           # Judge the new level on its own frames
+        self.intervals.clear()
+        self.history.append((time.perf_counter() - STARTUP_T0, level, reason))
+        if self.verbose:
+            print(f"Governor: {self.describe()}")
+
+    def frame(self, work_seconds):
+        """Called once per frame just before the swap with the time the frame took to build."""
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.intervals.append(now - self.last_frame)
+        self.last_frame = now
+        self.work.append(work_seconds)
+        if self.budget is None or len(self.intervals) < GOVERNOR_WINDOW:
+            return
+        slow, busy = percentile(self.intervals, 0.9), percentile(self.work, 0.9)
+        raised, self.raised = self.raised, False
+        if slow > self.budget * GOVERNOR_SLOW_MARGIN and self.level < len(GOVERNOR_LEVELS) - 1:
+            if raised:                                              # The step up didn't hold: wait longer next time
+                self.upgrade_wait = min(max(2 * self.upgrade_wait, GOVERNOR_WINDOW), GOVERNOR_MAX_UPGRADE_WAIT)
+            self.set_level(self.level + 1, f"frames {slow * 1000:.1f} ms > budget {self.budget * 1000:.1f} ms")
+        elif busy < self.budget * GOVERNOR_HEADROOM and self.level > 0:
+            self.calm += 1
+            if self.calm > self.upgrade_wait:
+                self.set_level(self.level - 1, f"work {busy * 1000:.1f} ms leaves headroom")
+                self.raised = True
+        else:
+            self.calm = 0
+
+    def describe(self):
+        """One line with the current decisions, for the HUD and the console."""
+        cap = self.entity_cap or 'all'
+        timing = f", p90 frame {percentile(self.intervals, 0.9) * 1000:.1f} ms" if self.intervals else ""
+        return (f"quality {len(GOVERNOR_LEVELS) - 1 - self.level}/{len(GOVERNOR_LEVELS) - 1}: draw {self.draw_distance:.0f}, "
+                f"LOD x{self.lod_scale:.2f}, traps {self.trap_detail}, HUD 1/{self.hud_interval}, entities {cap}"
+                f"{timing} ({self.reason})")
+
+governor = FrameGovernor()             # Replaced in main() with the --frame-budget one
+applied_draw_distance = None           # (level, draw distance) the fog is set up for
+fog_range = None                       # (start, end) of the active fog, None when off (read by the shader backend)
+
+def apply_draw_distance():
+    """Fades the scene into the sky color before the governor's far plane (GL thread only)."""
+    global applied_draw_distance, fog_range
+    distance = governor.draw_distance
+    if applied_draw_distance == (current_level, distance):
+        return
+    if distance >= GOVERNOR_LEVELS[0][0]:
+        glDisable(GL_FOG)                                           # Full quality: nothing to hide
+        fog_range = None
+    else:
+        fog_range = (distance * FOG_START_FRACTION, distance)
+        glFogi(GL_FOG_MODE, GL_LINEAR)
+        glFogfv(GL_FOG_COLOR, LEVEL_SETTINGS[current_level]['sky_color'])
+        glFogf(GL_FOG_START, fog_range[0])
+        glFogf(GL_FOG_END, fog_range[1])
+        glEnable(GL_FOG)
+    applied_draw_distance = (current_level, distance)
+
+def chunk_key(x, y):
+    """Culling chunk holding world point (x, y); the outer walls' outside faces count as the edge chunks."""
+    size = CELL_SIZE * WORLD_CHUNK_CELLS
+    return (max(0, int(x // size)), max(0, int(y // size)))
+
+def chunk_baked_mesh(maze):
+    """The baked maze quads split by culling chunk (a quad goes to the chunk holding its center): {chunk: array('f')}."""
+    return run_steps(chunk_baked_mesh_steps(maze))
+
+def chunk_baked_mesh_steps(maze):
+    """chunk_baked_mesh() resumable: yields its progress every GENERATION_SLICE quads."""
+    from array import array
+    mesh, chunks, quad = maze.baked_mesh, {}, 4 * MODEL_STRIDE
+    for q in range(0, len(mesh), quad):
+        key = chunk_key((mesh[q] + mesh[q + 2 * MODEL_STRIDE]) / 2, (mesh[q + 1] + mesh[q + 2 * MODEL_STRIDE + 1]) / 2)
+        chunks.setdefault(key, array('f')).extend(mesh[q:q + quad])
+        if q % (GENERATION_SLICE * quad) == 0:
+            yield q / len(mesh)
+    return chunks
+
+def trap_chunks(maze):
+    """Trap cells grouped by culling chunk, computed once per maze: {chunk: [(x, y), ...]}."""
+    return run_steps(trap_chunks_steps(maze))
+
+def trap_chunks_steps(maze):
+    """trap_chunks() resumable: yields its progress after every column."""
+    if getattr(maze, 'trap_chunks', None) is None:
+        found = {}
+        for x in range(maze.width):
+            for y in range(maze.height):
+                if maze.grid[x][y].has_hole or maze.grid[x][y].has_spikes:
+                    found.setdefault(chunk_key(x * CELL_SIZE + CELL_SIZE / 2, y * CELL_SIZE + CELL_SIZE / 2), []).append((x, y))
+            yield (x + 1) / maze.width
+        maze.trap_chunks = found                 # Only published once complete
+    return maze.trap_chunks
+
+def visible_chunks(maze):
+    """Chunks with anything within the draw distance of the camera, in key order.
+
+    Only the chunk range around the camera is visited, so the cost is bounded by the draw distance
+    rather than the maze size. Chunk areas are padded by a cell for quads that stick out.
+    """
+    size = CELL_SIZE * WORLD_CHUNK_CELLS
+    reach = governor.draw_distance + CELL_SIZE
+    ex, ey = camera_eye[0], camera_eye[1]
+    last_x, last_y = chunk_key(maze.width * CELL_SIZE, maze.height * CELL_SIZE)   # Outer walls sit on the far edge
+    visible = []
+    for cx in range(max(0, int((ex - reach) // size)), min(last_x, int((ex + reach) // size)) + 1):
+        dx = max(cx * size - ex, 0.0, ex - (cx + 1) * size)
+        for cy in range(max(0, int((ey - reach) // size)), min(last_y, int((ey + reach) // size)) + 1):
+            dy = max(cy * size - ey, 0.0, ey - (cy + 1) * size)
+            if dx * dx + dy * dy <= reach * reach:
+                visible.append((cx, cy))
+    return visible
+
+def visible_entities(items):
+    """Active enemies/bullets within the draw distance, nearest first and cut to the governor's entity cap."""
+    ex, ey = camera_eye[0], camera_eye[1]
+    reach = governor.draw_distance * governor.draw_distance
+    near = [item for item in items if item.active and (item.x - ex) ** 2 + (item.y - ey) ** 2 <= reach]
+    if governor.entity_cap is not None and len(near) > governor.entity_cap:
+        near.sort(key=lambda item: (item.x - ex) ** 2 + (item.y - ey) ** 2)
+        del near[governor.entity_cap:]
+    return near
+
+# --------------- Particles -----------------
+# Sparks where bullets hit walls and debris where enemies die. Every effect owns a fixed slice of one
+# pool (its hard cap) and recycles its oldest particles when a burst doesn't fit, so a firefight can't
+# grow memory or frame time. NumPy moves the whole pool in a few array operations per frame.
+PARTICLE_EFFECTS = {
+    'spark':  {'capacity': 384, 'burst': 12, 'life': 0.35, 'speed': 260.0, 'spread': 1.2, 'jitter': 1.0,
+               'gravity': 600.0, 'color': (1.0, 0.85, 0.35)},
+    'debris': {'capacity': 1152, 'burst': 48, 'life': 1.4, 'speed': 150.0, 'spread': math.pi, 'jitter': 12.0,
+               'gravity': 500.0, 'color': (0.75, 0.05, 0.05)},
+}
+PARTICLE_QUEUE = 64                  # Bursts waiting for the next frame, the oldest dropped beyond this
+PARTICLE_MAX_STEP = 0.1              # Seconds: a stalled frame doesn't fling particles through the floor
+PARTICLE_POINT_SIZE = 6.0            # Pixels up close
+PARTICLE_ATTENUATION = (1.0, 0.0, 1e-5)   # Point size falloff with eye distance (constant, linear, quadratic)
+particles = None                     # ParticleSystem in the windowed game (needs NumPy)
+
+class ParticleSystem:
+    """Fixed pool of particles in NumPy arrays, stepped in batch and drawn as one array of points (GL thread only).
+
+    burst() may be called from the simulation thread: it only queues the burst for the next update().
+    """
+    def __init__(self):
+        import numpy                                 # ImportError: no particles
+        self.np = numpy
+        size = sum(effect['capacity'] for effect in PARTICLE_EFFECTS.values())
+        self.vertices = numpy.zeros((size, 6), numpy.float32)    # r, g, b, x, y, z per slot (GL_C3F_V3F)
+        self.velocity = numpy.zeros((size, 3), numpy.float32)
+        self.color = numpy.zeros((size, 3), numpy.float32)       # Color at birth, fades with the life left
+        self.life = numpy.zeros(size, numpy.float32)             # Seconds left, <= 0: free slot
+        self.lifetime = numpy.ones(size, numpy.float32)
+        self.gravity = numpy.zeros(size, numpy.float32)
+        self.live = numpy.zeros((size, 6), numpy.float32)        # Live slots packed for the draw
+        self.count = 0                                           # Rows of self.live in use
+        self.slices = {}                                         # Effect -> [first slot, capacity, next slot]
+        first = 0
+        for name, effect in PARTICLE_EFFECTS.items():
+            self.slices[name] = [first, effect['capacity'], 0]
+            first += effect['capacity']
+        self.pending = deque(maxlen=PARTICLE_QUEUE)
+        self.rng = numpy.random.default_rng()                    # Own generator: the seeded game draws stay the same
+        self.clock = None
+
+    def burst(self, effect, x, y, z, heading=None):
+        """Queues one effect at a point, thrown towards heading (degrees) or all around."""
+        self.pending.append((effect, x, y, z, heading))
+
+    def clear(self):
+        """Drops every particle and queued burst."""
+        self.pending.clear()
+        self.life[:] = 0
+        self.count = 0
+        self.clock = None
+
+    def emit(self, effect, x, y, z, heading):
+        """Writes one burst over the effect's oldest slots."""
+        np, settings, slot = self.np, PARTICLE_EFFECTS[effect], self.slices[effect]
+        first, capacity, start = slot
+        n = min(settings['burst'], capacity)
+        index = first + (start + np.arange(n)) % capacity
+        slot[2] = (start + n) % capacity
+        yaw = self.rng.uniform(-settings['spread'], settings['spread'], n) + math.radians(heading or 0.0)
+        pitch = self.rng.uniform(0.1, 1.2, n)                    # Mostly up and out
+        speed = settings['speed'] * self.rng.uniform(0.4, 1.0, n)
+        self.velocity[index] = np.stack((np.cos(yaw) * np.cos(pitch), np.sin(yaw) * np.cos(pitch), np.sin(pitch)), axis=1) * speed[:, None]
+        self.vertices[index, 3:] = self.rng.normal((x, y, z), settings['jitter'], (n, 3))
+        self.life[index] = self.lifetime[index] = settings['life'] * self.rng.uniform(0.6, 1.0, n)
+        self.gravity[index] = settings['gravity']
+        self.color[index] = np.array(settings['color'], np.float32) * self.rng.uniform(0.7, 1.0, (n, 1))
+
+    def update(self):
+        """Emits the queued bursts, then moves, bounces and fades the whole pool by the time since the last frame."""
+        np = self.np
+        now = time.perf_counter()
+        dt = min(now - self.clock, PARTICLE_MAX_STEP) if self.clock is not None else 0.0
+        self.clock = now
+        while self.pending:
+            self.emit(*self.pending.popleft())
+        alive = self.life > 0
+        self.count = int(np.count_nonzero(alive))
+        if not self.count:
+            return
+        position = self.vertices[:, 3:]
+        self.velocity[:, 2] -= self.gravity * dt
+        position += self.velocity * dt
+        landed = position[:, 2] < 0                              # Bounce off the floor, losing most of the speed
+        position[landed, 2] = 0.0
+        self.velocity[landed] *= (0.6, 0.6, -0.3)
+        self.life -= dt
+        fade = 0.4 + 0.6 * np.clip(self.life / self.lifetime, 0.0, 1.0)   # Dims, then vanishes at the end
+        np.multiply(self.color, fade[:, None], out=self.vertices[:, :3])
+        alive &= self.life > 0
+        self.count = int(np.count_nonzero(alive))
+        np.compress(alive, self.vertices, axis=0, out=self.live[:self.count])
+
+    def draw(self):
+        """All live particles as unlit points in a single glDrawArrays, fogged like the rest of the scene."""
+        if not self.count:
+            return
+        glPushAttrib(GL_ENABLE_BIT | GL_POINT_BIT)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glDisable(GL_LIGHTING)
+        glPointSize(PARTICLE_POINT_SIZE)
+        glPointParameterfv(GL_POINT_DISTANCE_ATTENUATION, PARTICLE_ATTENUATION)
+        glInterleavedArrays(GL_C3F_V3F, 0, self.live)
+        glDrawArrays(GL_POINTS, 0, self.count)
+        glPopClientAttrib()
+        glPopAttrib()
+
+# --------------- Renderer Backends -----------------
+# The 3D scene goes through `renderer`: ImmediateRenderer is the original fixed-function path,
+# ShaderRenderer keeps every mesh in vertex buffers and draws the scene in a handful of calls.
+# Menus, HUD and text stay immediate mode under both backends.
+MODEL_STRIDE = 6                                 # Floats per vertex in every mesh: x, y, z, r, g, b
+
+def mesh_box(out, cx, cy, cz, sx, sy, sz, color, transform=None):
+    """Appends an axis-aligned box (12 triangles) centered at (cx, cy, cz) with full sizes sx, sy, sz."""
+    hx, hy, hz = sx / 2, sy / 2, sz / 2
+    corners = [(cx + dx * hx, cy + dy * hy, cz + dz * hz) for dx, dy, dz in
+               ((-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1), (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1))]
+    if transform:
+        corners = [transform(*c) for c in corners]
+    for a, b, c, d in ((0, 3, 2, 1), (4, 5, 6, 7), (0, 1, 5, 4), (2, 3, 7, 6), (1, 2, 6, 5), (3, 0, 4, 7)):
+        for i in (a, b, c, a, c, d):
+            out.extend(corners[i] + color)
+
+def mesh_cylinder(out, base_radius, top_radius, height, slices, color, transform):
+    """Appends an open cylinder along local +z (like gluCylinder), mapped through transform(x, y, z)."""
+    ring = [(math.cos(2 * math.pi * i / slices), math.sin(2 * math.pi * i / slices)) for i in range(slices + 1)]
+    for (c0, s0), (c1, s1) in zip(ring, ring[1:]):
+        b0 = transform(c0 * base_radius, s0 * base_radius, 0)
+        b1 = transform(c1 * base_radius, s1 * base_radius, 0)
+        t0 = transform(c0 * top_radius, s0 * top_radius, height)
+        t1 = transform(c1 * top_radius, s1 * top_radius, height)
+        for vertex in (b0, b1, t1, b0, t1, t0):
+            out.extend(vertex + color)
+
+def mesh_sphere(out, radius, slices, stacks, color, transform):
+    """Appends a UV sphere (like gluSphere), mapped through transform(x, y, z)."""
+    def point(i, j):
+        theta, phi = 2 * math.pi * i / slices, math.pi * j / stacks
+        return transform(radius * math.sin(phi) * math.cos(theta), radius * math.sin(phi) * math.sin(theta),
+                         radius * math.cos(phi))
+    for j in range(stacks):
+        for i in range(slices):
+            p00, p10, p01, p11 = point(i, j), point(i + 1, j), point(i, j + 1), point(i + 1, j + 1)
+            for vertex in (p00, p01, p11, p00, p11, p10):
+                out.extend(vertex + color)
+
+def humanoid_mesh(out, body_color, leg_radius, tier, scale):
+    """Appends the draw_humanoid() model at an LOD tier as triangles, pre-scaled and turned to face +x."""
+    def place(tx, ty, tz, rotate=lambda x, y, z: (x, y, z)):
+        def transform(x, y, z):
+            x, y, z = rotate(x, y, z)                      # Part orientation
+            x, y, z = x + tx, y + ty, z + tz               # Part position in model space
+            return (y * scale, -x * scale, z * scale)      # glRotatef(-90, 0, 0, 1) + glScalef
+        return transform
+    forward = lambda x, y, z: (x, z, -y)                   # glRotatef(-90, 1, 0, 0): along +y
+    down = lambda x, y, z: (x, -y, -z)                     # glRotatef(180, 1, 0, 0): along -z
+    if tier >= len(LOD_TIERS):
+        mesh_box(out, 0, 0, 32, 40, 25, 64, body_color, place(0, 0, 0))       # Impostor blocks
+        mesh_box(out, 0, 0, 80, 28, 28, 28, (0.0, 0.0, 0.0), place(0, 0, 0))
+        return
+    _, sphere_slices, cylinder_slices, stacks = LOD_TIERS[tier]
+    mesh_box(out, 0, 0, 40, 35, 25, 50, body_color, place(0, 0, 0))           # Torso
+    mesh_sphere(out, 15, sphere_slices, sphere_slices, (0.0, 0.0, 0.0), place(0, 0, 80))
+    for arm_x in (-20, 20):
+        mesh_cylinder(out, 9, 5, 30, cylinder_slices, (0.96, 0.8, 0.69), place(arm_x, 0, 55, forward))
+    mesh_cylinder(out, 8, 6, 40, cylinder_slices, (0.66, 0.66, 0.66), place(0, 10, 55, forward))
+    for leg_x in (-12, 12):
+        mesh_cylinder(out, leg_radius, 5, 50, cylinder_slices, (0.0, 0.0, 0.0), place(leg_x, 0, 15, down))
+
+def pyramid_mesh(out, transform, color):
+    """Appends draw_pyramid()'s four sides as triangles, mapped through transform(x, y, z)."""
+    apex = transform(0, 0, 40)
+    base = [transform(x, y, 0) for x, y in ((-10, -10), (10, -10), (10, 10), (-10, 10), (-10, -10))]
+    for b0, b1 in zip(base, base[1:]):
+        out.extend(apex + color + b0 + color + b1 + color)
+
+def trap_mesh(out, maze, x, y, detail):
+    """Appends one trap cell's triangles at a trap detail level, as draw_traps() draws them."""
+    cell = maze.grid[x][y]
+    segments, small_spikes = TRAP_DETAIL[detail]
+    cx, cy = x * CELL_SIZE + CELL_SIZE / 2, y * CELL_SIZE + CELL_SIZE / 2
+    if cell.has_hole:
+        rim = [(cx + math.cos(2 * math.pi * i / segments) * HOLE_RADIUS,
+                cy + math.sin(2 * math.pi * i / segments) * HOLE_RADIUS, 0.1) for i in range(segments + 1)]
+        for p0, p1 in zip(rim, rim[1:]):
+            out.extend((cx, cy, 0.1, 0.1, 0.1, 0.1) + p0 + (0.1, 0.1, 0.1) + p1 + (0.1, 0.1, 0.1))
+    if cell.has_spikes:
+        pyramid_mesh(out, lambda px, py, pz: (cx + px * 1.1, cy + py * 1.1, pz * 1.3), (0.6, 0.6, 0.7))
+        small_spike_positions = [(25, 20), (-25, 25), (15, -25), (-20, -15)]
+        if small_spikes and len(cell.spike_rotations) == len(small_spike_positions):
+            for (sx, sy), rotation in zip(small_spike_positions, cell.spike_rotations):
+                c, s = math.cos(math.radians(rotation)), math.sin(math.radians(rotation))
+                pyramid_mesh(out, lambda px, py, pz: (cx + sx + px * c - py * s, cy + sy + px * s + py * c, pz),
+                             (0.5, 0.5, 0.55))
+
+def level_world_mesh(maze, level):
+    """Static triangles for a level as (mesh, layout): ground (6 vertices) first, then the baked maze and the
+    traps (every trap detail) by culling chunk, then the goal.
+
+    layout maps 'scenery' to {chunk: (first vertex, count)}, 'traps' to {(chunk, detail): (first, count)}
+    and 'goal' to (first, count).
+    """
+    return run_steps(level_world_mesh_steps(maze, level))
+
+def level_world_mesh_steps(maze, level, chunks=None):
+    """level_world_mesh() resumable (from the baked mesh already split into chunks, or split here): a chunk per step."""
+    from array import array
+    if getattr(maze, 'baked_mesh', None) is None or maze.baked_level != level:
+        bake_maze_lighting(maze, level)
+    if chunks is None:
+        chunks = chunk_baked_mesh(maze)
+    out = array('f')
+    light = LEVEL_SETTINGS[level]['ambient_light']
+    size = 10000                                                # Same ground plane as draw_ground()
+    ground = ((-size, -size, -0.1), (size, -size, -0.1), (size, size, -0.1), (-size, size, -0.1))
+    for i in (0, 1, 2, 0, 2, 3):
+        out.extend(ground[i] + (0.55 * light, 0.4 * light, 0.25 * light))
+    layout = {'scenery': {}, 'traps': {}}
+    traps = trap_chunks(maze)
+    steps = len(chunks) + len(TRAP_DETAIL) * len(traps)
+    for key, baked in sorted(chunks.items()):
+        first = len(out) // MODEL_STRIDE
+        for q in range(0, len(baked), 4 * MODEL_STRIDE):         # Quads -> two triangles
+            for i in (0, 1, 2, 0, 2, 3):
+                out.extend(baked[q + i * MODEL_STRIDE:q + (i + 1) * MODEL_STRIDE])
+        layout['scenery'][key] = (first, len(out) // MODEL_STRIDE - first)
+        yield len(layout['scenery']) / steps
+
+    for detail in range(len(TRAP_DETAIL)):                       # Every detail, the governor picks one per frame
+        for key, cells in sorted(traps.items()):
+            first = len(out) // MODEL_STRIDE
+            for x, y in cells:
+                trap_mesh(out, maze, x, y, detail)
+            layout['traps'][(key, detail)] = (first, len(out) // MODEL_STRIDE - first)
+            yield (len(chunks) + len(layout['traps'])) / steps
+    first = len(out) // MODEL_STRIDE
+    if maze.goal:                                                # Exit arch, as draw_goal() draws it
+        gx, gy = maze.goal
+        cx, cy = gx * CELL_SIZE + CELL_SIZE / 2, gy * CELL_SIZE + CELL_SIZE / 2
+        mesh_box(out, cx, cy, 6, 40, 40, 12, (0.95, 0.85, 0.2))
+        mesh_box(out, cx - 16, cy, 70, 12, 12, 140, (0.2, 0.8, 0.2))
+        mesh_box(out, cx + 16, cy, 70, 12, 12, 140, (0.2, 0.8, 0.2))
+        mesh_box(out, cx, cy, 140, 44, 12, 12, (0.2, 0.6, 0.9))
+    layout['goal'] = (first, len(out) // MODEL_STRIDE - first)
+    return out, layout
+
+class ImmediateRenderer:
+    """Fixed-function backend: display list for the baked maze, glBegin/glEnd and GLUT/GLU shapes for the rest."""
+    name = 'immediate'
+
+    def setup(self):
+        """Nothing to prepare, the fixed-function pipeline is always there."""
+        return True
+
+    def prepare_steps(self):
+        """The level's display lists, compiled a chunk at a time for the level loader."""
+        chunks = yield from baked_chunk_steps(game_maze, current_level)
+        yield from loading_stage('Building geometry', compile_baked_maze_steps(game_maze, chunks))
+
+    def draw_scene(self):
+        """Draws the 3D scene: level geometry, then (in play) everything on it."""
+        self.draw_world()
+        if game_maze and view.game_state in ["playing", "level_complete", "game_over"]:
+            self.draw_entities()
+
+    def draw_world(self):
+        """Ground and maze walls."""
+        draw_ground()                                   # Ground plane
+        if game_maze:
+            draw_maze()                                 # Maze walls
+
+    def draw_entities(self):
+        """Cheat path, goal, player, traps, view.enemies and view.bullets."""
+        if view.cheat_mode_active:
+            draw_cheat_path()                           # Path overlay
+        if entity_light_on():
+            glEnable(GL_LIGHTING)                       # Night levels: lit like before the bake
+        draw_goal(); 
+        draw_player(); 
+        draw_traps()                                    # Portal/player/traps
+        for enemy in visible_entities(view.enemies): 
+            enemy.draw()      # Enemies
+        for bullet in visible_entities(view.bullets): 
+            bullet.draw()    # Bullets
+        glDisable(GL_LIGHTING)
+
+class ShaderRenderer:
+    """GLSL + vertex buffer backend: the level is one static buffer, models are instanced from a shared mesh buffer.
+
+    A frame is one draw for the level, one instanced draw per (model, LOD tier) in view and one
+    for the cheat path, with all per-entity data (position, facing) uploaded in a single buffer.
+    """
+    name = 'shader'
+    VERTEX_SHADER = """
+        #version 120
+        attribute vec3 a_position;
+        attribute vec3 a_color;
+        attribute vec3 a_offset;                        // Per instance: world position
+        attribute vec2 a_pose;                          // Per instance: yaw about z, then tip about y (degrees)
+        varying vec3 v_color;
+        varying vec3 v_eye;                             // Eye space position, for the entity light
+        varying float v_depth;                          // Eye distance along the view axis, for fog
+        void main() {
+            float yaw = radians(a_pose.x), tip = radians(a_pose.y);
+            vec3 p = vec3(a_position.x * cos(yaw) - a_position.y * sin(yaw),
+                          a_position.x * sin(yaw) + a_position.y * cos(yaw), a_position.z);
+            p = vec3(p.x * cos(tip) + p.z * sin(tip), p.y, p.z * cos(tip) - p.x * sin(tip));
+            gl_Position = gl_ModelViewProjectionMatrix * vec4(p + a_offset, 1.0);
+            v_eye = (gl_ModelViewMatrix * vec4(p + a_offset, 1.0)).xyz;
+            v_depth = -v_eye.z;
+            v_color = a_color;
+        }
+    """
+    FRAGMENT_SHADER = """
+        #version 120
+        uniform vec2 u_fog;                             // Linear fog start, end (end 0: no fog)
+        uniform float u_lit;                            // 1: fixed-function style LIGHT0 on flat face normals
+        varying vec3 v_color;
+        varying vec3 v_eye;
+        varying float v_depth;
+        void main() {
+            vec3 color = v_color;
+            if (u_lit > 0.0) {
+                vec3 n = normalize(cross(dFdx(v_eye), dFdy(v_eye)));
+                n = dot(n, v_eye) > 0.0 ? -n : n;       // Towards the viewer
+                vec3 l = normalize(gl_LightSource[0].position.xyz - v_eye);
+                color *= gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb + gl_LightSource[0].diffuse.rgb * max(dot(n, l), 0.0);
+            }
+            float visibility = u_fog.y > 0.0 ? clamp((u_fog.y - v_depth) / (u_fog.y - u_fog.x), 0.0, 1.0) : 1.0;
+            gl_FragColor = vec4(mix(gl_Fog.color.rgb, min(color, 1.0), visibility), 1.0);
+        }
+    """
+    ATTRIBUTES = ('a_position', 'a_color', 'a_offset', 'a_pose')    # Bound to locations 0..3
+
+    def __init__(self):
+        self.program = None
+        self.model_buffer = self.world_buffer = self.instance_buffer = self.line_buffer = None
+        self.meshes = {}                    # Model key -> (first vertex, vertex count) in model_buffer
+        self.world = None                   # (maze, level, level_world_mesh() layout) in world_buffer
+        self.fog_location = None            # u_fog uniform
+        self.lit_location = None            # u_lit uniform
+
+    def setup(self):
+        """Compiles the shaders and uploads the model meshes, False if this GL can't run them."""
+        try:
+            version = glGetString(GL_VERSION).decode().split()[0]
+            if tuple(int(part) for part in version.split('.')[:2]) < (3, 3):
+                raise RuntimeError(f"OpenGL {version} has no instanced arrays (3.3 needed)")
+            self.program = self.link_program()
+            self.fog_location = glGetUniformLocation(self.program, 'u_fog')
+            self.lit_location = glGetUniformLocation(self.program, 'u_lit')
+        except Exception as error:                                   # Missing entry points, GLSL errors, ...
+            print(f"Shader renderer unavailable ({error}), using immediate mode")
+            return False
+        from array import array
+        models = array('f')
+        for key, color, leg_radius, scale in (('player', (0.0, 0.0, 0.50), 8, 0.6), ('enemy', (1.0, 0.0, 0.0), 10, 0.5)):
+            for tier in range(len(LOD_TIERS) + 1):
+                first = len(models) // MODEL_STRIDE
+                humanoid_mesh(models, color, leg_radius, tier, scale)
+                self.meshes[(key, tier)] = (first, len(models) // MODEL_STRIDE - first)
+        for is_enemy, color in ((False, (1.0, 0.0, 0.0)), (True, (0.0, 1.0, 0.0))):
+            first = len(models) // MODEL_STRIDE
+            mesh_sphere(models, 1.0, 8, 8, color, lambda x, y, z: (x, y, z))
+            self.meshes[('bullet', is_enemy)] = (first, len(models) // MODEL_STRIDE - first)
+        self.model_buffer, self.world_buffer, self.instance_buffer, self.line_buffer = glGenBuffers(4)
+        self.upload(self.model_buffer, models, GL_STATIC_DRAW)
+        return True
+
+    def link_program(self):
+        """Compiles and links the shader pair, raising RuntimeError with the driver's log on failure."""
+        program = glCreateProgram()
+        for kind, source in ((GL_VERTEX_SHADER, self.VERTEX_SHADER), (GL_FRAGMENT_SHADER, self.FRAGMENT_SHADER)):
+            shader = glCreateShader(kind)
+            glShaderSource(shader, source)
+            glCompileShader(shader)
+            if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+                raise RuntimeError(glGetShaderInfoLog(shader).decode(errors='replace').strip())
+            glAttachShader(program, shader)
+            glDeleteShader(shader)                                    # Freed with the program
+        for location, name in enumerate(self.ATTRIBUTES):
+            glBindAttribLocation(program, location, name)
+        glLinkProgram(program)
+        if not glGetProgramiv(program, GL_LINK_STATUS):
+            raise RuntimeError(glGetProgramInfoLog(program).decode(errors='replace').strip())
+        return program
+
+    def upload(self, buffer, data, usage):
+        """Replaces a buffer's contents with an array('f') in one call."""
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        glBufferData(GL_ARRAY_BUFFER, len(data) * data.itemsize, data.tobytes(), usage)
+
+    def bind_vertices(self, buffer):
+        """Points the position and color attributes at an interleaved x, y, z, r, g, b buffer."""
+        import ctypes
+        glBindBuffer(GL_ARRAY_BUFFER, buffer)
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, MODEL_STRIDE * 4, ctypes.c_void_p(0))
+        glVertexAttribPointer(1, 3, GL_FLOAT, GL_FALSE, MODEL_STRIDE * 4, ctypes.c_void_p(12))
+
+    def collect_instances(self):
+        """Per-frame instance data grouped by model key: x, y, z, yaw, tip for each visible entity."""
+        groups = {}
+        if not first_person:                                          # Player hidden in 1st person
+            tier = select_lod_tier('player', math.hypot(view.player_x - camera_eye[0], view.player_y - camera_eye[1], 40 - camera_eye[2]))
+            pose = (0.0, 90.0) if view.game_state == "game_over" else (view.player_angle_deg, 0.0)   # Fallen over
+            groups.setdefault(('player', tier), []).extend((view.player_x, view.player_y, 0.0) + pose)
+        for enemy in visible_entities(view.enemies):
+            tier = select_lod_tier(enemy.uid, math.hypot(enemy.x - camera_eye[0], enemy.y - camera_eye[1], 40 - camera_eye[2]))
+            groups.setdefault(('enemy', tier), []).extend((enemy.x, enemy.y, 0.0, enemy.angle_deg, 0.0))
+        for bullet in visible_entities(view.bullets):
+            groups.setdefault(('bullet', bullet.is_enemy), []).extend((bullet.x, bullet.y, bullet.z, 0.0, 0.0))
+        return groups
+
+    def draw_scene(self):
+        """Draws the 3D scene: level geometry, then (in play) everything on it."""
+        self.draw_world()
+        if game_maze and view.game_state in ["playing", "level_complete", "game_over"]:
+            self.draw_entities()
+
+    def begin(self, buffer):
+        """Switches to the shader program with position/color read from a vertex buffer."""
+        glUseProgram(self.program)
+        glUniform2f(self.fog_location, *(fog_range or (0.0, 0.0)))     # Same fog as the fixed-function path
+        glUniform1f(self.lit_location, 0.0)                            # Baked colors as they are
+        glEnableVertexAttribArray(0)
+        glEnableVertexAttribArray(1)
+        glVertexAttrib3f(2, 0.0, 0.0, 0.0)                            # Non-instanced geometry is in world space
+        glVertexAttrib2f(3, 0.0, 0.0)
+        self.bind_vertices(buffer)
+
+    def end(self):
+        """Back to fixed function (the HUD and menus draw in immediate mode)."""
+        glDisableVertexAttribArray(0)
+        glDisableVertexAttribArray(1)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
+
+    def draw_ranges(self, ranges):
+        """Draws (first, count) vertex ranges of the bound buffer, merging ranges that follow each other into one call."""
+        start = end = None
+        for first, count in sorted(r for r in ranges if r):
+            if first != end:
+                if start is not None:
+                    glDrawArrays(GL_TRIANGLES, start, end - start)
+                start = first
+            end = first + count
+        if start is not None:
+            glDrawArrays(GL_TRIANGLES, start, end - start)
+
+    def prepare_steps(self):
+        """The level's static buffer, built a chunk at a time for the level loader and uploaded at the end."""
+        chunks = yield from baked_chunk_steps(game_maze, current_level)
+        mesh, layout = yield from loading_stage('Building geometry', level_world_mesh_steps(game_maze, current_level, chunks))
+        self.upload(self.world_buffer, mesh, GL_STATIC_DRAW)
+        self.world = (game_maze, current_level, layout)
+
+    def draw_world(self):
+        """Ground and the maze chunks in view from the level's static buffer, uploading it after a level change."""
+        if not game_maze:
+            draw_ground()
+            return
+        if self.world is None or self.world[0] is not game_maze or self.world[1] != current_level:
+            mesh, layout = level_world_mesh(game_maze, current_level)
+            self.upload(self.world_buffer, mesh, GL_STATIC_DRAW)     # Once per level
+            self.world = (game_maze, current_level, layout)
+        self.begin(self.world_buffer)
+        glDepthMask(GL_FALSE)                                         # Ground never hides the maze floor
+        glDrawArrays(GL_TRIANGLES, 0, 6)
+        glDepthMask(GL_TRUE)
+        scenery = self.world[2]['scenery']
+        self.draw_ranges(scenery.get(key) for key in visible_chunks(game_maze))
+        self.end()
+
+    def draw_entities(self):
+        """Traps in view and the goal from the level buffer, instanced models, then the cheat path."""
+        import ctypes
+        from array import array
+        self.begin(self.world_buffer)
+        glUniform1f(self.lit_location, 1.0 if entity_light_on() else 0.0)   # Night levels: lit like the immediate path
+        layout = self.world[2]
+        self.draw_ranges([layout['traps'].get((key, governor.trap_detail)) for key in visible_chunks(game_maze)]
+                         + [layout['goal']])
+
+        groups = self.collect_instances()
+        instances, draws = array('f'), []
+        for key, values in groups.items():
+            draws.append((key, len(instances) // 5, len(values) // 5))
+            instances.extend(values)
+        if draws:
+            self.upload(self.instance_buffer, instances, GL_STREAM_DRAW)   # Whole frame in one upload
+            self.bind_vertices(self.model_buffer)
+            glEnableVertexAttribArray(2)
+            glEnableVertexAttribArray(3)
+            glVertexAttribDivisor(2, 1)
+            glVertexAttribDivisor(3, 1)
+            glBindBuffer(GL_ARRAY_BUFFER, self.instance_buffer)
+            for key, first_instance, count in draws:
+                glVertexAttribPointer(2, 3, GL_FLOAT, GL_FALSE, 20, ctypes.c_void_p(first_instance * 20))
+                glVertexAttribPointer(3, 2, GL_FLOAT, GL_FALSE, 20, ctypes.c_void_p(first_instance * 20 + 12))
+                first, vertex_count = self.meshes[key]
+                glDrawArraysInstanced(GL_TRIANGLES, first, vertex_count, count)
+            glVertexAttribDivisor(2, 0)
+            glVertexAttribDivisor(3, 0)
+            glDisableVertexAttribArray(2)
+            glDisableVertexAttribArray(3)
+
+        if view.cheat_mode_active and view.cheat_path:
+            glUniform1f(self.lit_location, 0.0)                           # Unlit, like draw_cheat_path()
+            path = array('f')
+            for gx, gy in view.cheat_path:
+                path.extend((gx * CELL_SIZE + CELL_SIZE / 2, gy * CELL_SIZE + CELL_SIZE / 2, 2.0, 0.0, 1.0, 1.0))
+            self.upload(self.line_buffer, path, GL_STREAM_DRAW)
+            self.bind_vertices(self.line_buffer)
+            glLineWidth(5.0)
+            glDrawArrays(GL_LINE_STRIP, 0, len(view.cheat_path))
+            glLineWidth(1.0)
+        self.end()
+
+RENDERERS = {'immediate': ImmediateRenderer, 'shader': ShaderRenderer}
+renderer = ImmediateRenderer()                     # Active backend, replaced by select_renderer()
+
+def select_renderer(name):
+    """Starts the named backend (needs a GL context), falling back to immediate mode if it can't run here."""
+    global renderer
+    candidate = RENDERERS[name]()
+    if not candidate.setup():
+        candidate = ImmediateRenderer()
+    renderer = candidate
+
 # --------------- Drawing (UI Menus) -----------------
-def draw_text(x, y, text, font=GLUT_BITMAP_HELVETICA_18):
+def draw_text(x, y, text, font=None):
     """text at specified 2D screen coordinates."""
+    if font is None:
+        font = GLUT_BITMAP_HELVETICA_18                   # Default font (GLUT loads after import)
     glRasterPos2f(x, y)                                   # Set start position
     for char in text: 
         glutBitmapCharacter(font, ord(char))  # Draw each char
@@ -1005,8 +2695,10 @@ def draw_ui_overlay(draw_content_func):
     glMatrixMode(GL_MODELVIEW); 
     glPopMatrix()  
 
-def draw_styled_button(x, y, w, h, text, font=GLUT_BITMAP_HELVETICA_18):
+def draw_styled_button(x, y, w, h, text, font=None):
     """Draws a standard UI button with background, border, and centered text."""
+    if font is None:
+        font = GLUT_BITMAP_HELVETICA_18
     # Button fill
     glEnable(GL_BLEND); 
     glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)  # Transparency for fill
@@ -1060,7 +2752,8 @@ def draw_level_select_menu():
             (WINDOW_W/2-150, btn_y, 300, 50, LEVEL_SETTINGS[1]['name']),
             (WINDOW_W/2-150, btn_y-70, 300, 50, LEVEL_SETTINGS[2]['name']),
             (WINDOW_W/2-150, btn_y-140, 300, 50, LEVEL_SETTINGS[3]['name']), # Level buttons
-            (WINDOW_W/2-150, btn_y-210, 300, 50, "Back")
+            (WINDOW_W/2-150, btn_y-210, 300, 50, "Endless"),             # Ever bigger mazes
+            (WINDOW_W/2-150, btn_y-280, 300, 50, "Back")
         ]
         for x, y, w, h, text in buttons: 
             draw_styled_button(x, y, w, h, text)                       # Draw each button
@@ -1069,21 +2762,21 @@ def draw_level_select_menu():
 def draw_level_complete_menu():
     """Content for the victory screen."""
     def content():
-        if current_level<3:
+        if next_level(current_level):
             title = "LEVEL COMPLETE!" 
         else:
-            "CONGRATULATIONS!"                         # Title changes after last level
-        if current_level<3:
+            title = "CONGRATULATIONS!"                 # Title changes after last level
+        if next_level(current_level):
             sub = "You found the exit!" 
         else:
-            "You have escaped the labyrinth!"
+            sub = "You have escaped the labyrinth!"
         glColor3f(1,0.9,0.2); 
         draw_text(WINDOW_W/2 - 100, WINDOW_H - 200, title, GLUT_BITMAP_TIMES_ROMAN_24)
         glColor3f(0.9,0.9,0.9); 
         draw_text(WINDOW_W/2 - 80, WINDOW_H - 240, sub)
 
         btn_y = WINDOW_H/2 - 50
-        if current_level < 3: 
+        if next_level(current_level): 
             draw_styled_button(WINDOW_W/2-100, btn_y, 200, 50, "Next Level")
         else: 
             draw_styled_button(WINDOW_W/2-100, btn_y, 200, 50, "Play Again?")
@@ -1105,8 +2798,37 @@ def draw_game_over_menu():
         draw_styled_button(WINDOW_W/2-100, btn_y-140, 200, 50, "Quit Game")
     draw_ui_overlay(content)
 
+def draw_loading_screen():
+    """The frame shown before loading started, frozen, under the level name and a progress bar."""
+    if scene_cache.key is not None:
+        scene_cache.draw(scene_cache.key)                              # Last menu frame, whatever its key
+    def content():
+        stage, progress = loading_progress
+        done = (LOADING_STAGES.index(stage) + progress) / len(LOADING_STAGES)   # Whole build, stage by stage
+        name = LEVEL_SETTINGS[current_level]['name']
+        nw = sum(glutBitmapWidth(GLUT_BITMAP_TIMES_ROMAN_24, ord(c)) for c in name)   # Center the name
+        glColor3f(1, 0.9, 0.2); 
+        draw_text(WINDOW_W/2 - nw/2, WINDOW_H/2 + 40, name, GLUT_BITMAP_TIMES_ROMAN_24)
+        bar_x, bar_y, bar_w, bar_h = WINDOW_W/2 - 150, WINDOW_H/2 - 10, 300, 20
+        glColor3f(0.15, 0.15, 0.18)
+        glBegin(GL_QUADS); 
+        glVertex2f(bar_x, bar_y); glVertex2f(bar_x + bar_w, bar_y); glVertex2f(bar_x + bar_w, bar_y + bar_h); glVertex2f(bar_x, bar_y + bar_h)
+        glEnd()
+        glColor3f(0.95, 0.85, 0.2)                                     # Filled part
+        glBegin(GL_QUADS); 
+        glVertex2f(bar_x, bar_y); glVertex2f(bar_x + bar_w * done, bar_y)
+        glVertex2f(bar_x + bar_w * done, bar_y + bar_h); glVertex2f(bar_x, bar_y + bar_h)
+        glEnd()
+        glColor3f(0.8, 0.8, 0.8); 
+        draw_text(bar_x, bar_y - 30, f"{stage}... {progress:.0%}")
+    draw_ui_overlay(content)
+
+hud_cache = None                                                 # [GL display list id, contents key, frame built]
+hud_frame = 0                                                    # HUD frames drawn, for the governor's refresh rate
+
 def draw_hud():
-    """Draws in game elements like health bar and crosshair."""
+    """Draws in game elements like health bar and crosshair, replaying them from a display list between refreshes."""
+    global hud_cache, hud_frame
     glMatrixMode(GL_PROJECTION)                                  # Switch to projection
     glPushMatrix()
     glLoadIdentity()
@@ -1116,6 +2838,30 @@ def draw_hud():
     glLoadIdentity()
     glDisable(GL_DEPTH_TEST)                                     
 
+    hud_frame += 1
+    key = (view.player_health, view.killed_enemies, first_person and view.game_state == "playing")
+    if hud_cache is None:
+        hud_cache = [glGenLists(1), None, 0]
+    if hud_cache[1] != key and hud_frame - hud_cache[2] >= governor.hud_interval:
+        glNewList(hud_cache[0], GL_COMPILE)                      # Rebuild only when something changed
+        draw_hud_contents()
+        glEndList()
+        hud_cache[1:] = [key, hud_frame]
+    glCallList(hud_cache[0])
+    minimap.draw()                                               # Cached maze texture + live markers
+    if governor.verbose:
+        glColor3f(1, 1, 1)
+        draw_text(20, 20, governor.describe(), GLUT_BITMAP_HELVETICA_12)   # --show-governor
+
+    # Restore OpenGL state
+    glEnable(GL_DEPTH_TEST)                                
+    glMatrixMode(GL_PROJECTION)
+    glPopMatrix()
+    glMatrixMode(GL_MODELVIEW)
+    glPopMatrix()
+
+def draw_hud_contents():
+    """Health bar, kill counter and crosshair in 2D screen coordinates."""
     # Health text
     glColor3f(1, 1, 1)
     draw_text(20, WINDOW_H - 30, "Health:")                      # Label
@@ -1133,11 +2879,11 @@ def draw_hud():
     glEnd()
 
     # Health bar fill (color changes based on health percentage)
-    if player_health > 0:
-        fill_w = (player_health / max_health) * bar_w         # Fill width proportional to HP
-        if player_health > (max_health * 0.66):
+    if view.player_health > 0:
+        fill_w = (view.player_health / max_health) * bar_w    # Fill width proportional to HP
+        if view.player_health > (max_health * 0.66):
             glColor3f(0, 1, 0)                                   # green
-        elif player_health > (max_health * 0.33):
+        elif view.player_health > (max_health * 0.33):
             glColor3f(1, 1, 0)                                   # yellow
         else:
             glColor3f(1, 0, 0)                                   # red
@@ -1150,11 +2896,11 @@ def draw_hud():
 
     # Enemies killed counter
     glColor3f(1, 1, 1)
-    draw_text(20, WINDOW_H - 60, f"Enemies Killed: {killed_enemies}")  # Show kills
+    draw_text(20, WINDOW_H - 60, f"Enemies Killed: {view.killed_enemies}")   # Show kills
 
     # --- Crosshair Drawing ---
     # Draw crosshair only in first person mode and when actively playing.
-    if first_person and game_state == "playing":
+    if first_person and view.game_state == "playing":
         crosshair_vertical_offset = 30                     # Adjust crosshair position
         center_x = WINDOW_W / 2
         center_y = (WINDOW_H / 2.2) - crosshair_vertical_offset  
@@ -1174,36 +2920,182 @@ def draw_hud():
         glEnd()
         glLineWidth(1.0)                                   # Reset line width
 
-    # Restore OpenGL state
-    glEnable(GL_DEPTH_TEST)                                
-    glMatrixMode(GL_PROJECTION)
-    glPopMatrix()
-    glMatrixMode(GL_MODELVIEW)
-    glPopMatrix()
+# --------------- Minimap -----------------
+MINIMAP_CELL_PIXELS = 8                          # Texels per maze cell in the minimap texture
+MINIMAP_SIZE = 120                               # On-screen size of the longer maze side in pixels
+MINIMAP_X, MINIMAP_TOP = 320, 15                 # Left edge, and top edge below the window top (right of the health bar)
+MINIMAP_COLORS = {                               # RGB bytes per texel kind
+    'unvisited': (45, 35, 25), 'visited': (110, 85, 55), 'wall': (30, 150, 30),
+    'goal': (60, 230, 60), 'hole': (10, 10, 10), 'spikes': (170, 170, 190),
+}
+
+class Minimap:
+    """Maze layout baked into a texture once per level; afterwards only cells whose state changes are re-uploaded.
+
+    A cell changes when the player first walks into it (it brightens) and when a trap comes within a
+    cell of the player (it becomes known and shows up).
+    """
+    def __init__(self):
+        self.texture = None
+        self.maze = None
+        self.texture_size = (1, 1)              # Power-of-two texture size in texels
+        self.visited = set()                    # Cells the player has been in
+        self.known_traps = set()                # Trap cells the player has come next to
+        self.player_cell = None
+        self.attempt = None                     # level_attempt the exploration state belongs to
+
+    def cell_texels(self, x, y):
+        """RGB texels of one cell, rows from its north (low y) edge."""
+        px = MINIMAP_CELL_PIXELS
+        cell = self.maze.grid[x][y]
+        if (x, y) == self.maze.goal:
+            kind = 'goal'
+        elif (x, y) in self.known_traps:
+            kind = 'hole' if cell.has_hole else 'spikes'
+        else:
+            kind = 'visited' if (x, y) in self.visited else 'unvisited'
+        floor, wall = bytes(MINIMAP_COLORS[kind]), bytes(MINIMAP_COLORS['wall'])
+        rows = []
+        for row in range(px):
+            if row == 0 and cell.walls['N'] or row == px - 1 and cell.walls['S']:
+                rows.append(wall * px)
+            else:
+                rows.append((wall if cell.walls['W'] else floor) + floor * (px - 2) + (wall if cell.walls['E'] else floor))
+        return b''.join(rows)
+
+    def rebuild(self, maze):
+        """Renders the whole maze into the texture (once per level)."""
+        run_steps(self.rebuild_steps(maze))
+
+    def rebuild_steps(self, maze):
+        """rebuild() resumable: a maze column per step, then the upload."""
+        px = MINIMAP_CELL_PIXELS
+        self.maze, self.visited, self.known_traps, self.player_cell = maze, set(), set(), None
+        self.attempt = level_attempt
+        width = height = 1
+        while width < maze.width * px: width *= 2
+        while height < maze.height * px: height *= 2
+        self.texture_size = (width, height)
+        texels = bytearray(width * height * 3)
+        for x in range(maze.width):
+            for y in range(maze.height):
+                block = self.cell_texels(x, y)
+                for row in range(px):
+                    start = ((y * px + row) * width + x * px) * 3
+                    texels[start:start + px * 3] = block[row * px * 3:(row + 1) * px * 3]
+            yield (x + 1) / maze.width
+        if self.texture is None:
+            self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, width, height, 0, GL_RGB, GL_UNSIGNED_BYTE, bytes(texels))
+
+    def update(self):
+        """Keeps the texture in step with the level: full rebuild on a new maze, single cells as the player explores."""
+        if self.maze is not game_maze:
+            self.rebuild(game_maze)
+        elif self.attempt != level_attempt:                  # Restarted on the same maze: forget the exploration
+            changed, self.visited, self.known_traps = self.visited | self.known_traps, set(), set()
+            self.attempt, self.player_cell = level_attempt, None
+            self.upload_cells(changed)
+        cell = (int(view.player_x // CELL_SIZE), int(view.player_y // CELL_SIZE))
+        if cell == self.player_cell:
+            return
+        self.player_cell = cell
+        changed = set()
+        if cell not in self.visited:
+            self.visited.add(cell)
+            changed.add(cell)
+        for dx in (-1, 0, 1):                    # Traps next to the player become known
+            for dy in (-1, 0, 1):
+                x, y = cell[0] + dx, cell[1] + dy
+                if 0 <= x < self.maze.width and 0 <= y < self.maze.height and (x, y) not in self.known_traps:
+                    if self.maze.grid[x][y].has_hole or self.maze.grid[x][y].has_spikes:
+                        self.known_traps.add((x, y))
+                        changed.add((x, y))
+        self.upload_cells(changed)
+
+    def upload_cells(self, cells):
+        """Re-uploads just these cells' texels."""
+        if not cells:
+            return
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for x, y in cells:
+            glTexSubImage2D(GL_TEXTURE_2D, 0, x * MINIMAP_CELL_PIXELS, y * MINIMAP_CELL_PIXELS,
+                            MINIMAP_CELL_PIXELS, MINIMAP_CELL_PIXELS, GL_RGB, GL_UNSIGNED_BYTE, self.cell_texels(x, y))
+
+    def draw(self):
+        """Textured quad plus player and enemy markers, in the HUD's 2D screen coordinates."""
+        if not game_maze:
+            return
+        self.update()
+        scale = MINIMAP_SIZE / (max(game_maze.width, game_maze.height) * CELL_SIZE)   # Screen pixels per world unit
+        w, h = game_maze.width * CELL_SIZE * scale, game_maze.height * CELL_SIZE * scale
+        x0, y0 = MINIMAP_X, WINDOW_H - MINIMAP_TOP - h
+        u = game_maze.width * MINIMAP_CELL_PIXELS / self.texture_size[0]
+        v = game_maze.height * MINIMAP_CELL_PIXELS / self.texture_size[1]
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glColor3f(1, 1, 1)                                   # Texture colors unchanged
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(x0, y0)               # Texture rows follow world y, like the screen
+        glTexCoord2f(u, 0); glVertex2f(x0 + w, y0)
+        glTexCoord2f(u, v); glVertex2f(x0 + w, y0 + h)
+        glTexCoord2f(0, v); glVertex2f(x0, y0 + h)
+        glEnd()
+        glDisable(GL_TEXTURE_2D)
+
+        glPointSize(4.0)
+        glColor3f(1.0, 0.1, 0.1)                             # Enemies: red dots
+        glBegin(GL_POINTS)
+        for enemy in view.enemies:
+            if enemy.active:
+                glVertex2f(x0 + enemy.x * scale, y0 + enemy.y * scale)
+        glEnd()
+        glPointSize(1.0)
+        angle = math.radians(view.player_angle_deg)          # Player: yellow arrow along the facing
+        px, py = x0 + view.player_x * scale, y0 + view.player_y * scale
+        glColor3f(1.0, 0.9, 0.2)
+        glBegin(GL_TRIANGLES)
+        glVertex2f(px + 6 * math.cos(angle), py + 6 * math.sin(angle))
+        glVertex2f(px + 4 * math.cos(angle + 2.5), py + 4 * math.sin(angle + 2.5))
+        glVertex2f(px + 4 * math.cos(angle - 2.5), py + 4 * math.sin(angle - 2.5))
+        glEnd()
+
+minimap = Minimap()                              # HUD minimap (texture created on first draw)
 
 # --------------- Camera -----------------
+def set_camera_eye(x, y, z):
+    """Remembers where this frame's camera is, for distance-based level of detail."""
+    global camera_eye
+    camera_eye = (x, y, z)
+
 def setup_player_camera():
     """Configures the camera based on first person or third person view."""
     global current_cam_x, current_cam_y, current_cam_h, current_look_at_x, current_look_at_y
     if first_person:
         # --- First Person Camera ---
-        look_x = player_x + 100 * math.cos(math.radians(player_angle_deg))  # Look point x
-        look_y = player_y + 100 * math.sin(math.radians(player_angle_deg))  # Look point y
-        gluLookAt(player_x, player_y, FP_CAM_HEIGHT,                        # Eye position
+        look_x = view.player_x + 100 * math.cos(math.radians(view.player_angle_deg))   # Look point x
+        look_y = view.player_y + 100 * math.sin(math.radians(view.player_angle_deg))   # Look point y
+        set_camera_eye(view.player_x, view.player_y, FP_CAM_HEIGHT)
+        gluLookAt(view.player_x, view.player_y, FP_CAM_HEIGHT,              # Eye position
                   look_x, look_y, FP_CAM_HEIGHT,                            # Center/look-at
                   0, 0, 1)                                                  
     else:
         # --- Third Person Camera ---
-        angle_rad = math.radians(player_angle_deg)                          # Player angle
-        ideal_cam_x = player_x - cam_radius * math.cos(angle_rad)           # Target cam pos (behind player)
-        ideal_cam_y = player_y - cam_radius * math.sin(angle_rad)
+        angle_rad = math.radians(view.player_angle_deg)                     # Player angle
+        ideal_cam_x = view.player_x - cam_radius * math.cos(angle_rad)      # Target cam pos (behind player)
+        ideal_cam_y = view.player_y - cam_radius * math.sin(angle_rad)
         target_cam_x, target_cam_y = ideal_cam_x, ideal_cam_y               # Defaults
 
         # Camera collision detection: 
         for i in range(1, 21):
             t = i / 20.0                                                    
-            check_x = player_x * (1 - t) + ideal_cam_x * t                  # Step along line
-            check_y = player_y * (1 - t) + ideal_cam_y * t
+            check_x = view.player_x * (1 - t) + ideal_cam_x * t             # Step along line
+            check_y = view.player_y * (1 - t) + ideal_cam_y * t
 
             if check_camera_collision(check_x, check_y):                    # Hits wall?
                 # Collision detected, move camera to safe position just before collision point
@@ -1211,16 +3103,17 @@ def setup_player_camera():
                 min_dist_factor = 0.2                            # Keep minimum distance
                 if t_safe < min_dist_factor: 
                     t_safe = min_dist_factor
-                target_cam_x = player_x * (1 - t_safe) + ideal_cam_x * t_safe
-                target_cam_y = player_y * (1 - t_safe) + ideal_cam_y * t_safe
+                target_cam_x = view.player_x * (1 - t_safe) + ideal_cam_x * t_safe
+                target_cam_y = view.player_y * (1 - t_safe) + ideal_cam_y * t_safe
                 break
 
         # Apply smoothing to camera movement for a less blend feel
         current_cam_x += (target_cam_x - current_cam_x) * CAMERA_SMOOTH_FACTOR
         current_cam_y += (target_cam_y - current_cam_y) * CAMERA_SMOOTH_FACTOR
         current_cam_h += (cam_height - current_cam_h) * CAMERA_SMOOTH_FACTOR
-        current_look_at_x += (player_x - current_look_at_x) * CAMERA_SMOOTH_FACTOR
-        current_look_at_y += (player_y - current_look_at_y) * CAMERA_SMOOTH_FACTOR
+        current_look_at_x += (view.player_x - current_look_at_x) * CAMERA_SMOOTH_FACTOR
+        current_look_at_y += (view.player_y - current_look_at_y) * CAMERA_SMOOTH_FACTOR
+        set_camera_eye(current_cam_x, current_cam_y, current_cam_h)
         gluLookAt(current_cam_x, current_cam_y, current_cam_h,              # Smoothed eye
                   current_look_at_x, current_look_at_y, PLAYER_RADIUS + 20, # Smoothed center
                   0, 0, 1)                                                  # Up vector
@@ -1231,21 +3124,50 @@ def setup_demo_camera():
     radius = (MAZE_WIDTH * CELL_SIZE) * 0.8                                    # Orbit radius
     cam_x = center_x + radius * math.cos(math.radians(demo_maze_angle))  # Camera x on circle
     cam_y = center_y + radius * math.sin(math.radians(demo_maze_angle))  # Camera y on circle
+    set_camera_eye(cam_x, cam_y, WALL_HEIGHT*4)
     gluLookAt(cam_x, cam_y, WALL_HEIGHT*4,                               # High overhead eye
               center_x, center_y, 0,                                     # Look at center
               0, 0, 1)                                                   # Up vector
 
 # --------------- Input & Game Logic -----------------
+SIM_TICK_RATE = 60                   # Simulation ticks per second, independent of the frame rate
+MAX_CATCHUP_TICKS = 5                # Most ticks run in one frame after a stall
+HELD_KEYS = (b'w', b'a', b's', b'd', b' ')   # Sampled once per tick from the key-state table
+FIRE_KEY = b' '                      # Hold space to fire
+FIRE_INTERVAL_TICKS = 8              # Ticks between shots while the fire key is held
+CAM_HEIGHT_STEP = 5                  # Cheat camera rise per tick while up/down is held
+CAM_RADIUS_STEP = 10                 # Cheat camera zoom per tick while left/right is held
+keys_down = set()                    # Held keys, kept by the key down/up callbacks
+keys_tapped = set()                  # Keys pressed since the last tick (a tap shorter than a tick still counts)
+input_lock = threading.Lock()        # Guards keys_down, keys_tapped, pending_inputs and inputs_in_flight (--threaded-sim)
+FIRE_CLICK = 'click'                 # keys_tapped entry for a mouse click waiting for the next tick
+fire_cooldown_ticks = 0              # Ticks until the held fire key shoots again
+sim_clock = None                     # perf_counter when the simulation last caught up
+sim_accumulator = 0.0                # Real time not yet simulated (seconds)
+pending_inputs = []                  # perf_counter of key presses/clicks no tick has consumed yet
+inputs_in_flight = []                # (event time, tick time) consumed by ticks, not yet on screen
+input_latency = deque(maxlen=1000)   # Recent (event -> tick, event -> frame presented) in seconds
+latency_report = False               # --input-latency: print a latency summary every few seconds
+latency_report_at = 0.0              # perf_counter of the next summary
+
 def keyboardListener(key, x, y):
-    """Handles standard keyboard input for movement and cheats."""
-    global player_x, player_y, player_angle_deg, cheat_mode_active, last_player_grid_pos
+    """Handles key presses: movement and fire keys go into the key-state table, others act at once."""
+    global cheat_mode_active
+    key = key.lower()                                                       # Shift/caps lock still move
+    if key in HELD_KEYS:
+        with input_lock:
+            if game_state == "playing":
+                if key not in keys_down:
+                    pending_inputs.append(time.perf_counter())              # Latency starts here
+                keys_tapped.add(key)
+            keys_down.add(key)
+        return
 
     if key == b'c':
         cheat_mode_active = not cheat_mode_active                           # Toggle cheat
         if cheat_mode_active:
             print("CHEAT MODE: ACTIVATED (Infinite Health, Path Guidance)")
-            last_player_grid_pos = (-1, -1)                                 # Force update
-            update_cheat_mode()
+            update_cheat_mode()                                             # Path from the current cell
         else:
             print("CHEAT MODE: DEACTIVATED")
             cheat_path.clear()                                              # Clear guidance
@@ -1255,50 +3177,99 @@ def keyboardListener(key, x, y):
     #     start_game(current_level)                                           # Restart level
     #     return
 
-    if game_state != "playing":
-        return                                          # Ignore inputs in menus while playing
-
-    angle_rad = math.radians(player_angle_deg)                            # Facing angle
-    next_x, next_y = player_x, player_y                                   # Candidate pos
-
-    # Calculate movement direction based on key press
-    if key == b'w':                                                       # Forward
-        next_x += math.cos(angle_rad) * PLAYER_SPEED
-        next_y += math.sin(angle_rad) * PLAYER_SPEED
-    elif key == b's':                                                     # Backward
-        next_x -= math.cos(angle_rad) * PLAYER_SPEED
-        next_y -= math.sin(angle_rad) * PLAYER_SPEED
-
-    if key == b'a':                                                       # Turn left
-        player_angle_deg += TURN_SPEED
-    elif key == b'd':                                                     # Turn right
-        player_angle_deg -= TURN_SPEED
-
-    # Apply movement only if collision check passes
-    if not check_collision(next_x, next_y):
-        player_x, player_y = next_x, next_y                               # Commit move
+def keyboardUpListener(key, x, y):
+    """Handles key releases for the key-state table."""
+    with input_lock:
+        keys_down.discard(key.lower())
+
+def move_player(forward, turn):
+    """One tick of player movement: forward (1) or back (-1) along the facing, then turn left (1) or right (-1)."""
+    global player_x, player_y, player_angle_deg
+    if forward:
+        angle_rad = math.radians(player_angle_deg)                        # Facing angle
+        next_x = player_x + math.cos(angle_rad) * PLAYER_SPEED * forward  # Candidate pos
+        next_y = player_y + math.sin(angle_rad) * PLAYER_SPEED * forward
+        if not check_collision(next_x, next_y):                           # Apply only if collision check passes
+            player_x, player_y = next_x, next_y                           # Commit move
+    player_angle_deg += TURN_SPEED * turn
+
+def sample_input():
+    """Applies the key-state table for one tick: walk, turn and fire together."""
+    global fire_cooldown_ticks
+    now = time.perf_counter()
+    with input_lock:                                       # Key callbacks run on the GL thread
+        tapped = set(keys_tapped)
+        keys_tapped.clear()                                # Taps arriving after this wait for the next tick
+        active = keys_down | tapped
+        inputs_in_flight.extend((event, now) for event in pending_inputs)
+        pending_inputs.clear()
+    forward = (b'w' in active) - (b's' in active)
+    turn = (b'a' in active) - (b'd' in active)
+    move_player(forward, turn)
+    move_cheat_camera(active)
+    fire_cooldown_ticks -= 1
+    if FIRE_CLICK in tapped or (FIRE_KEY in active and fire_cooldown_ticks <= 0):
+        fire_bullet()
+        fire_cooldown_ticks = FIRE_INTERVAL_TICKS
+
+def advance_simulation():
+    """Runs as many fixed-rate ticks as real time calls for since the last frame, sampling input each tick."""
+    global sim_clock, sim_accumulator
+    now = time.perf_counter()
+    tick = 1.0 / SIM_TICK_RATE
+    elapsed = now - sim_clock if sim_clock is not None else tick
+    sim_clock = now
+    sim_accumulator = min(sim_accumulator + elapsed, MAX_CATCHUP_TICKS * tick)   # Don't spiral after a stall
+    while sim_accumulator >= tick and game_state == "playing":
+        sim_accumulator -= tick
+        sample_input()
+        simulation_tick()
+
+def record_input_latency():
+    """Called once a frame is presented: every input its ticks consumed is now on screen."""
+    global latency_report_at
+    now = time.perf_counter()
+    with input_lock:                                        # The simulation thread may be appending
+        presented = inputs_in_flight[:]
+        inputs_in_flight.clear()
+    input_latency.extend((tick - event, now - event) for event, tick in presented)
+    if latency_report and input_latency and now >= latency_report_at:
+        latency_report_at = now + 5.0
+        to_tick = sorted(sample[0] for sample in input_latency)
+        to_frame = sorted(sample[1] for sample in input_latency)
+        print(f"Input latency over {len(to_frame)} presses: frame mean {sum(to_frame) / len(to_frame) * 1000:.1f} ms, "
+              f"p50 {to_frame[len(to_frame) // 2] * 1000:.1f}, p95 {to_frame[int(len(to_frame) * 0.95)] * 1000:.1f}, "
+              f"max {to_frame[-1] * 1000:.1f} (waiting for a tick: mean {sum(to_tick) / len(to_tick) * 1000:.1f} ms)")
+
+def arrow_key_name(key):
+    """'up', 'down', 'left' or 'right' for a GLUT special key, None for the rest."""
+    return {GLUT_KEY_UP: 'up', GLUT_KEY_DOWN: 'down', GLUT_KEY_LEFT: 'left', GLUT_KEY_RIGHT: 'right'}.get(key)
 
 def specialKeyListener(key, x, y):
-    """Handles special key input (arrow keys) for camera zoom/height adjustment."""
+    """Handles special key input (arrow keys): held in the key-state table, the camera moves every tick."""
+    name = arrow_key_name(key)
+    if name:
+        with input_lock:
+            if game_state == "playing":
+                keys_tapped.add(name)
+            keys_down.add(name)
+
+def specialUpListener(key, x, y):
+    """Handles arrow key releases for the key-state table."""
+    with input_lock:
+        keys_down.discard(arrow_key_name(key))
+
+def move_cheat_camera(active):
+    """One tick of camera height/zoom from the held arrow keys, in cheat mode's third person view only."""
     global cam_height, cam_radius
 
     # ----Only allow special keys if cheat mode is active ---
-    if not cheat_mode_active:
-        return                              # Do nothing if cheat mode is off
-
-    # Existing logic to prevent camera controls in certain states
-    if game_state != "playing" or first_person: 
+    if not cheat_mode_active or first_person:
         return
 
     # Camera control logic (only reachable if cheat_mode_active is True)
-    if key == GLUT_KEY_UP: 
-        cam_height = clamp(cam_height + 10, 50, 800)        # Raise camera
-    elif key == GLUT_KEY_DOWN: 
-        cam_height = clamp(cam_height - 10, 50, 800)    # Lower camera
-    elif key == GLUT_KEY_LEFT: 
-        cam_radius = clamp(cam_radius + 20, 80, 1200)   # Zoom out
-    elif key == GLUT_KEY_RIGHT: 
-        cam_radius = clamp(cam_radius - 20, 80, 1200)  # Zoom in
+    cam_height = clamp(cam_height + CAM_HEIGHT_STEP * (('up' in active) - ('down' in active)), 50, 800)      # Raise/lower camera
+    cam_radius = clamp(cam_radius + CAM_RADIUS_STEP * (('left' in active) - ('right' in active)), 80, 1200)  # Zoom out/in
 
 
 def mouseListener(button, state, x, y):
@@ -1307,7 +3278,9 @@ def mouseListener(button, state, x, y):
 
     # --- In-Game Actions ---
     if button == GLUT_LEFT_BUTTON and state == GLUT_DOWN and game_state == "playing":
-        fire_bullet()                                              # Shoot
+        with input_lock:
+            keys_tapped.add(FIRE_CLICK)                            # Shoot on the next tick (taken with the key taps)
+            pending_inputs.append(time.perf_counter())
         return
     if button == GLUT_RIGHT_BUTTON and state == GLUT_DOWN and game_state == "playing":
         first_person = not first_person                            # Toggle 1st/3rd person
@@ -1321,7 +3294,7 @@ def mouseListener(button, state, x, y):
             btn_y, btn_w, btn_h, btn_x = WINDOW_H/2+30, 250, 50, WINDOW_W/2-125
             if btn_x < x < btn_x+btn_w:
                 if btn_y < gl_y < btn_y+btn_h: 
-                    start_game(1)                    # Play Game
+                    load_level(1)                    # Play Game
                 elif btn_y-70 < gl_y < btn_y-70+btn_h: 
                     game_state = "level_select" #Select Level
                 elif btn_y-140 < gl_y < btn_y-140+btn_h: 
@@ -1331,21 +3304,23 @@ def mouseListener(button, state, x, y):
             btn_y = WINDOW_H/2 + 50
             if WINDOW_W/2-150 < x < WINDOW_W/2+150:
                 if btn_y < gl_y < btn_y+50: 
-                    start_game(1)                       # Level 1
+                    load_level(1)                       # Level 1
                 elif btn_y-70 < gl_y < btn_y-20: 
-                    start_game(2)                  # Level 2
+                    load_level(2)                  # Level 2
                 elif btn_y-140 < gl_y < btn_y-90: 
-                    start_game(3)                 # Level 3
+                    load_level(3)                 # Level 3
                 elif btn_y-210 < gl_y < btn_y-160: 
+                    load_level(ENDLESS_FIRST_LEVEL)      # Endless
+                elif btn_y-280 < gl_y < btn_y-230: 
                     game_state = "intro_menu"    # Back
 
         elif game_state == "level_complete":
             btn_y = WINDOW_H/2 - 50
             if WINDOW_W/2-100 < x < WINDOW_W/2+100:
-                if current_level<3 and btn_y < gl_y < btn_y+50: 
-                    start_game(current_level+1)     # Next Level
-                elif current_level==3 and btn_y < gl_y < btn_y+50: 
-                    start_game(1)                # Play Again?
+                if next_level(current_level) and btn_y < gl_y < btn_y+50: 
+                    load_level(next_level(current_level))     # Next Level
+                elif not next_level(current_level) and btn_y < gl_y < btn_y+50: 
+                    load_level(1)                # Play Again?
                 if btn_y-70 < gl_y < btn_y-20: 
                     initialize_intro_scene(); 
                     game_state = "intro_menu" # Back
@@ -1354,89 +3329,1718 @@ def mouseListener(button, state, x, y):
             btn_y = WINDOW_H/2 - 50
             if WINDOW_W/2-100 < x < WINDOW_W/2+100:
                 if btn_y < gl_y < btn_y+50: 
-                    start_game(current_level)            # Restart Level
+                    restart_level()                      # Restart Level (same maze, from the snapshot)
                 elif btn_y-70 < gl_y < btn_y-20: 
                     initialize_intro_scene(); 
                     game_state = "intro_menu" # Back
                 elif btn_y-140 < gl_y < btn_y-90: 
                     glutLeaveMainLoop()            # Quit Game
-
-def check_win_condition():
-    """Checks if the player has reached the goal cell."""
-    global game_state
-    if game_state != "playing" or not game_maze.goal: 
-        return                    # Only during play
-    gx, gy = game_maze.goal
-    goal_pos_x, goal_pos_y = gx*CELL_SIZE + CELL_SIZE/2, gy*CELL_SIZE + CELL_SIZE/2  # Goal center
-    distance = math.hypot(player_x - goal_pos_x, player_y - goal_pos_y)    # Distance to goal
-
-    if distance < PLAYER_RADIUS + 20:                               # Close enough?
-        game_state = "level_complete"                               # Win!
-        print("Level Complete!")
+        glutPostRedisplay()                                        # Menus only redraw when something changed
+
+def simulation_tick():
+    """Advances the game by one simulation step (no rendering)."""
+    global level_clock
+    level_clock += 1
+    update_game_logic()                                     # Update entities, collisions, traps and goal
+    if telemetry and game_state != "playing":               # Level over: death (with its message) or escape
+        telemetry.emit('death' if game_state == "game_over" else 'level_complete',
+                       cause=game_over_message if game_state == "game_over" else None,
+                       ticks=level_clock, seconds=round(level_clock / SIM_TICK_RATE, 2),
+                       kills=killed_enemies, health=player_health)
+
+# --------------- Threaded Simulation (--threaded-sim) -----------------
+# Everything a frame draws of the simulation comes from `view`. Normally that is the live game, read
+# once per frame after the ticks it runs. With --threaded-sim the ticks run on their own thread, which
+# after each tick publishes a new RenderState with its own copies of the entities; the render thread
+# only ever swaps its `view` to the latest published one, so neither side waits for the other.
+RENDER_STATE_FIELDS = ('player_x', 'player_y', 'player_angle_deg', 'player_health', 'killed_enemies',
+                       'game_state', 'cheat_mode_active')
+view = None                          # RenderState the current frame draws
+published_state = None               # Latest RenderState from the simulation thread
+sim_thread = None                    # Simulation thread when --threaded-sim is on
+sim_error = None                     # Exception that stopped the simulation thread, raised again on the GLUT thread
+
+class RenderState:
+    """The simulation as a frame draws it: player, HUD values, enemies, bullets and game state.
+
+    A threaded snapshot holds copies of the active entities and is never changed after publishing;
+    a live one (single-threaded) refers to the game's own lists.
+    """
+    def __init__(self, snapshot=False):
+        import copy
+        for field in RENDER_STATE_FIELDS:
+            setattr(self, field, globals()[field])
+        if snapshot:
+            self.cheat_path = tuple(cheat_path)
+            self.enemies = [copy.copy(enemy) for enemy in enemies if enemy.active]
+            self.bullets = [copy.copy(bullet) for bullet in bullets if bullet.active]
+        else:
+            self.cheat_path, self.enemies, self.bullets = cheat_path, enemies, bullets
+
+def publish_render_state():
+    """Hands the render thread a snapshot of the simulation as it is now (a single reference swap)."""
+    global published_state
+    if sim_thread:
+        published_state = RenderState(snapshot=True)
+
+def update_view():
+    """Picks what this frame draws: the simulation thread's latest snapshot, or the live game."""
+    global view
+    menu = game_state in ("intro_menu", "level_select", "loading")   # Set on this thread, never published
+    view = published_state if sim_thread and published_state and not menu else RenderState()
+
+def simulation_loop():
+    """Simulation thread: fixed-rate ticks while a level is being played, a snapshot after every tick."""
+    global sim_error
+    tick = 1.0 / SIM_TICK_RATE
+    next_tick = time.perf_counter()
+    try:
+        while True:
+            if game_state != "playing":
+                time.sleep(tick)                                # Menus: nothing to simulate
+                next_tick = time.perf_counter()
+                continue
+            sample_input()
+            simulation_tick()
+            publish_render_state()
+            next_tick += tick
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -MAX_CATCHUP_TICKS * tick:
+                next_tick = time.perf_counter()                 # Don't spiral after a stall
+    except Exception as error:
+        import traceback
+        traceback.print_exc()                                   # Report it here, with the tick's stack
+        sim_error = error                                       # showScreen() raises it on the GLUT thread
+
+def start_simulation_thread():
+    """Moves the fixed-rate ticks off the GLUT thread."""
+    global sim_thread
+    sim_thread = threading.Thread(target=simulation_loop, name='simulation', daemon=True)
+    publish_render_state()
+    sim_thread.start()
 
 # --------------- Main Loop -----------------
 def showScreen():
     """Main  callback function."""
-    global demo_maze_angle
+    if sim_error:
+        raise RuntimeError("simulation thread stopped") from sim_error   # Don't keep drawing a frozen game
+    if game_state == "loading":
+        advance_level_loader()                                  # A slice of level building, outside the frame time
+    frame_start = time.perf_counter()                           # Frame work time for the governor
+    if game_state != "loading":
+        apply_level_theme()                                     # Lighting + sky after start_game or back to the menu
+    apply_draw_distance()                                       # Governor's fog
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)          # Clear frame + depth
 
     # Setup 3D perspective projection
     glMatrixMode(GL_PROJECTION); 
     glLoadIdentity()               # Reset projection
-    gluPerspective(60.0, WINDOW_W / float(WINDOW_H), 1.0, 20000.0)  
+    gluPerspective(60.0, WINDOW_W / float(WINDOW_H), 1.0, governor.draw_distance)  # Far plane from the governor
     glMatrixMode(GL_MODELVIEW); 
     glLoadIdentity()                # Reset modelview
 
     # State machine for rendering logic
-    if game_state == "playing":
-        update_game_logic()                                     # Update entities & collisions
-        check_win_condition()                                   # Check goal
+    if game_state == "playing" and not sim_thread:
+        advance_simulation()                                    # Fixed-rate ticks: input, entities, goal
+    if particles and game_state == "playing":
+        particles.update()                                      # New bursts, then one batched step
+    update_view()                                               # Simulation state this frame draws
+
+    if view.game_state == "playing":                            # The snapshot's state, not the live one
         setup_player_camera()                                   # Position camera
         draw_3d_scene()                                         # Draw scene
-    elif game_state == "level_complete":
+    elif view.game_state == "level_complete":
         setup_player_camera(); 
-        draw_3d_scene(); 
+        draw_cached_scene(); 
         draw_level_complete_menu()  
-    elif game_state == "game_over":
+    elif view.game_state == "game_over":
         setup_player_camera(); 
-        draw_3d_scene(); 
+        draw_cached_scene(); 
         draw_game_over_menu()       
-    else: # Menu states (intro_menu, level_select)
-        demo_maze_angle += 0.05                                 # Slowly rotate camera
+    elif view.game_state == "loading":
+        draw_loading_screen()                                   # Progress over the last menu frame
+    else: # Menu states (intro_menu, level_select); frame_timer() turns the camera
         setup_demo_camera(); 
-        draw_3d_scene()                    # Show maze game in background
-        if game_state == "intro_menu": 
+        draw_3d_scene()                    # Show maze game in background (it moves every frame, nothing to cache)
+        if queued_level is not None:
+            scene_cache.capture(('loading', queued_level))       # Backdrop for the loading screen
+        if view.game_state == "intro_menu": 
             draw_intro_menu()        # Main menu
-        elif game_state == "level_select": 
+        elif view.game_state == "level_select": 
             draw_level_select_menu()  # Level pick
+        if queued_level is not None:
+            start_queued_level()
 
     # Draw HUD overlay on top of game scene when playing or game ended
-    if game_state in ["playing", "level_complete", "game_over"]:
+    if view.game_state in ["playing", "level_complete", "game_over"]:
         draw_hud()                                              # Health, crosshair, kills
 
+    if view.game_state == "playing":
+        governor.frame(time.perf_counter() - frame_start)       # Adapt render cost to the frame budget
+    else:
+        governor.last_frame = None                              # Menu pauses are not slow frames
+    if recorder:
+        recorder.capture()                                      # --record: asynchronous readback
     glutSwapBuffers()                                           # Display the frame
+    if inputs_in_flight:
+        record_input_latency()                                  # Input -> frame latency samples
+    if leak_tracker:
+        leak_tracker.frame()                                    # --leak-check
+    if telemetry:
+        telemetry.frame()                                       # Frame-time summaries
+    if not startup_complete:
+        finish_startup()                                        # Deferred work after first frame
+
+def finish_startup():
+    """Runs the work deferred until the first frame is on screen, then reports startup timing."""
+    global startup_complete
+    startup_complete = True
+    mark_startup('first frame presented')
+    if game_maze is None and game_state in ("intro_menu", "level_select"):
+        initialize_intro_scene()                                # Menu background maze
+        mark_startup('intro maze generated')
+    report_startup()
+    if profile_startup_only:
+        glutLeaveMainLoop()                                     # --profile-startup: measure and exit
+    else:
+        glutPostRedisplay()                                     # Show the finished menu
+
+profile_startup_only = False                                    # Exit right after the startup report
+
+# --------------- Frame Pacing -----------------
+TARGET_FPS = 60                      # Gameplay frame rate (--fps, 0: as fast as possible)
+MENU_ORBIT_FPS = 10                  # Menu background redraws per second for the camera orbit
+DEMO_ORBIT_SPEED = 3.0               # Menu camera orbit in degrees per second
+IDLE_POLL_MS = 100                   # Timer period while a static screen waits for input
+target_fps = TARGET_FPS
+next_frame_at = 0.0                  # perf_counter when the next paced frame is due
+
+def frame_interval():
+    """Seconds between frames in the current state, None while the screen only changes on input."""
+    if game_state in ("playing", "loading"):
+        return 1.0 / target_fps if target_fps else 0.0
+    if game_state in ("intro_menu", "level_select"):
+        return 1.0 / MENU_ORBIT_FPS                             # Only the orbit moves
+    return None                                                 # level_complete/game_over: static
+
+def frame_timer(value=0):
+    """GLUT timer that replaces the idle redraw: posts a frame when one is due, then sleeps in GLUT until the next."""
+    global next_frame_at, demo_maze_angle
+    interval = frame_interval()
+    now = time.perf_counter()
+    if interval is None:
+        glutTimerFunc(IDLE_POLL_MS, frame_timer, 0)             # Input posts its own redisplay
+        return
+    if now >= next_frame_at:
+        if game_state != "playing":
+            demo_maze_angle += DEMO_ORBIT_SPEED * interval      # Slowly rotate camera
+        glutPostRedisplay()
+        next_frame_at += interval
+        if next_frame_at < now:
+            next_frame_at = now + interval                      # Behind: drop the missed frames, keep the pace
+    glutTimerFunc(math.ceil(max(0.0, next_frame_at - time.perf_counter()) * 1000), frame_timer, 0)
+
+class FrameCache:
+    """The 3D scene behind a static menu, kept in a texture so redraws where nothing in it changed skip the scene."""
+    def __init__(self):
+        self.texture = None
+        self.texture_size = (0, 0)
+        self.key = None                              # What the cached frame shows
+
+    def draw(self, key):
+        """Puts the cached frame on screen if it was captured for key, returns False otherwise."""
+        if key != self.key:
+            return False
+        u, v = WINDOW_W / self.texture_size[0], WINDOW_H / self.texture_size[1]
+        glPushAttrib(GL_ENABLE_BIT)
+        glDisable(GL_LIGHTING); glDisable(GL_FOG); glDisable(GL_DEPTH_TEST)
+        glEnable(GL_TEXTURE_2D)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        gluOrtho2D(0, WINDOW_W, 0, WINDOW_H)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glColor3f(1, 1, 1)                                   # Texture colors unchanged
+        glBegin(GL_QUADS)
+        glTexCoord2f(0, 0); glVertex2f(0, 0)
+        glTexCoord2f(u, 0); glVertex2f(WINDOW_W, 0)
+        glTexCoord2f(u, v); glVertex2f(WINDOW_W, WINDOW_H)
+        glTexCoord2f(0, v); glVertex2f(0, WINDOW_H)
+        glEnd()
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+        return True
 
-def main():
-    """Initialization and entry point for the application."""
-    glutInit(sys.argv)                                          
-    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)    # Double buffer, color, depth
-    glutInitWindowSize(WINDOW_W, WINDOW_H)                      # Window size
-    glutCreateWindow(b"The Final Door - Maze Adventure")        # Create window with title
+    def capture(self, key):
+        """Copies the scene just drawn from the back buffer."""
+        if self.texture is None:
+            self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        if self.texture_size[0] < WINDOW_W or self.texture_size[1] < WINDOW_H:
+            self.texture_size = (1 << (WINDOW_W - 1).bit_length(), 1 << (WINDOW_H - 1).bit_length())   # Power of two sides
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGB, self.texture_size[0], self.texture_size[1], 0, GL_RGB, GL_UNSIGNED_BYTE, None)
+        glCopyTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, 0, 0, WINDOW_W, WINDOW_H)
+        self.key = key
+
+scene_cache = FrameCache()                       # Static menu / loading backdrop (texture created on first capture)
+
+def draw_cached_scene():
+    """draw_3d_scene() behind level_complete/game_over, replayed from scene_cache until the level or window changes."""
+    key = (game_state, game_maze, level_attempt, first_person, WINDOW_W, WINDOW_H, governor.level)
+    if not scene_cache.draw(key):
+        draw_3d_scene()
+        scene_cache.capture(key)
+
+# --------------- Telemetry (--telemetry) -----------------
+TELEMETRY_QUEUE_SIZE = 4096          # Events waiting for the writer; more are dropped, never waited for
+TELEMETRY_BATCH = 256                # Events per write
+TELEMETRY_FLUSH_SECONDS = 1.0        # Longest an event waits for a batch to fill up
+TELEMETRY_MAX_BYTES = 5 * 1024 * 1024   # Rotate the JSONL file past this size
+TELEMETRY_KEEP_FILES = 5             # Rotated files kept (path.1 is the newest)
+TELEMETRY_FRAME_SECONDS = 10.0       # Seconds between frame-time summaries
+telemetry = None                     # Telemetry when --telemetry is on
+level_seed = None                    # Seed the current level was generated from
+level_clock = 0                      # Simulation ticks since the level started
+
+class Telemetry:
+    """Structured gameplay events, written as JSONL by a background thread so the game never waits on the disk.
+
+    emit() only puts the event on a bounded queue; when the queue is full the event is dropped and
+    counted. The writer thread takes events in batches and rotates the file past TELEMETRY_MAX_BYTES.
+    """
+    def __init__(self, path):
+        import queue, threading
+        self.path = path
+        self.queue = queue.Queue(TELEMETRY_QUEUE_SIZE)
+        self.dropped = self.written = 0
+        self.frame_times = []                    # Seconds between presented frames since the last summary
+        self.last_frame = None
+        self.summary_at = time.perf_counter() + TELEMETRY_FRAME_SECONDS
+        self.writer = threading.Thread(target=self.write_loop, name='telemetry', daemon=True)
+        self.writer.start()
+
+    def emit(self, event, **fields):
+        """Queues one event (with time, level and attempt), dropping it if the writer has fallen behind."""
+        import queue
+        record = {'t': round(time.time(), 3), 'event': event, 'level': current_level, 'attempt': level_attempt}
+        record.update(fields)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def frame(self):
+        """Called once a frame is presented; emits a frame-time summary every TELEMETRY_FRAME_SECONDS."""
+        now = time.perf_counter()
+        if self.last_frame is not None:
+            self.frame_times.append(now - self.last_frame)
+        self.last_frame = now
+        if now >= self.summary_at and self.frame_times:
+            times, self.frame_times = self.frame_times, []
+            self.summary_at = now + TELEMETRY_FRAME_SECONDS
+            self.emit('frames', count=len(times), fps=round(len(times) / sum(times), 1),
+                      mean_ms=round(sum(times) / len(times) * 1000, 2),
+                      **{f'p{int(q * 100)}_ms': round(percentile(times, q) * 1000, 2) for q in (0.5, 0.95, 0.99)},
+                      max_ms=round(max(times) * 1000, 2), governor_level=governor.level)
+
+    def write_loop(self):
+        """Writer thread: waits for an event, gathers a batch for up to TELEMETRY_FLUSH_SECONDS, writes it."""
+        import json, queue
+        out = open(self.path, 'a')
+        done = False
+        while not done:
+            batch = [self.queue.get()]
+            deadline = time.perf_counter() + TELEMETRY_FLUSH_SECONDS
+            while batch[-1] is not None and len(batch) < TELEMETRY_BATCH:
+                try:
+                    batch.append(self.queue.get(timeout=max(0.0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:                # close() was called
+                batch.pop()
+                done = True
+            out.write(''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch))
+            out.flush()
+            self.written += len(batch)
+            if out.tell() >= TELEMETRY_MAX_BYTES:
+                out.close()
+                self.rotate()
+                out = open(self.path, 'a')
+        out.close()
+
+    def rotate(self):
+        """path -> path.1 -> path.2 ..., dropping the oldest."""
+        import os
+        for i in range(TELEMETRY_KEEP_FILES - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def close(self):
+        """Writes what is queued (plus the drop count) and stops the writer."""
+        import queue
+        self.emit('telemetry_end', written=self.written, dropped=self.dropped)
+        try:
+            self.queue.put(None, timeout=5.0)
+        except queue.Full:
+            return                               # Writer is stuck on the disk, don't hang the exit
+        self.writer.join(timeout=5.0)
+
+# --------------- Frame Recorder (--record) -----------------
+CAPTURE_RING = 3                     # Pixel buffers in flight: a frame is mapped two frames after its readback
+CAPTURE_QUEUE = 16                   # Frames waiting for the writer thread; more are dropped, never waited for
+CAPTURE_PNG_LEVEL = 1                # zlib level for recorded PNGs (fast, the writer has to keep up)
+recorder = None                      # FrameRecorder when --record is on
+
+class FrameRecorder:
+    """Records the frames on screen without stalling on the readback.
+
+    Each captured frame is read (optionally downscaled on the GPU first) into the next pixel buffer
+    of a ring; glReadPixels into a buffer object returns at once and the copy finishes while later
+    frames are drawn. A buffer is only mapped when the ring comes round to it again, by which time
+    the data is there, and the bytes go to a writer thread that encodes a PNG sequence (a directory)
+    or appends to one raw RGB24 video file (a path ending in .rgb).
+    """
+    def __init__(self, path, scale=1, every=1):
+        import os, queue, threading
+        self.path, self.scale, self.every = path, max(1, scale), max(1, every)
+        self.raw = path.endswith('.rgb')
+        if not self.raw:
+            os.makedirs(path, exist_ok=True)
+        self.queue = queue.Queue(CAPTURE_QUEUE)
+        self.frames = self.captured = self.written = self.dropped = 0
+        self.buffers = None                      # Pixel buffer ring, made on the first capture
+        self.pending = deque()                   # (buffer, frame number) read back but not mapped yet
+        self.size = None                         # Recorded (width, height), fixed by the first capture
+        self.framebuffer = None                  # Downscale target, when the recorded size isn't the window's
+        self.capture_seconds = 0.0               # Time spent in capture() on the render thread
+        self.writer = threading.Thread(target=self.write_loop, name='recorder', daemon=True)
+        self.writer.start()
+
+    def setup(self):
+        """Pixel buffers (and the downscale framebuffer) for the recorded size."""
+        width, height = self.size = (max(1, WINDOW_W // self.scale), max(1, WINDOW_H // self.scale))
+        self.buffers = list(glGenBuffers(CAPTURE_RING)) if CAPTURE_RING > 1 else [glGenBuffers(1)]
+        for buffer in self.buffers:
+            glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+            glBufferData(GL_PIXEL_PACK_BUFFER, width * height * 3, None, GL_STREAM_READ)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        if self.scale > 1:
+            read = glGetIntegerv(GL_READ_FRAMEBUFFER_BINDING)
+            self.framebuffer, color = glGenFramebuffers(1), glGenRenderbuffers(1)
+            glBindFramebuffer(GL_FRAMEBUFFER, self.framebuffer)
+            glBindRenderbuffer(GL_RENDERBUFFER, color)
+            glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+            glBindFramebuffer(GL_FRAMEBUFFER, read)
+
+    def capture(self):
+        """Called once the frame is drawn, before the swap: starts reading it back, hands on the oldest one."""
+        self.frames += 1
+        if (self.frames - 1) % self.every:
+            return                                       # Frame skip
+        if self.buffers is None:
+            self.setup()
+        start = time.perf_counter()
+        if len(self.pending) == len(self.buffers):
+            self.collect()                               # Frees the oldest buffer in the ring
+        buffer = self.buffers[self.captured % len(self.buffers)]
+        width, height = self.size
+        read = glGetIntegerv(GL_READ_FRAMEBUFFER_BINDING)
+        if self.framebuffer:                             # Downscale on the GPU, read back the small copy
+            glBindFramebuffer(GL_DRAW_FRAMEBUFFER, self.framebuffer)
+            glBlitFramebuffer(0, 0, WINDOW_W, WINDOW_H, 0, 0, width, height, GL_COLOR_BUFFER_BIT, GL_LINEAR)
+            glBindFramebuffer(GL_READ_FRAMEBUFFER, self.framebuffer)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE, 0)   # Offset 0 in the buffer: no wait
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+        if self.framebuffer:
+            glBindFramebuffer(GL_FRAMEBUFFER, read)      # Back to the window (or the offscreen target)
+        self.pending.append((buffer, self.captured))
+        self.captured += 1
+        self.capture_seconds += time.perf_counter() - start
+
+    def collect(self):
+        """Maps the oldest pending buffer and queues a copy of its pixels for the writer."""
+        import ctypes, queue
+        buffer, number = self.pending.popleft()
+        width, height = self.size
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, buffer)
+        address = glMapBuffer(GL_PIXEL_PACK_BUFFER, GL_READ_ONLY)
+        if address:
+            try:
+                self.queue.put_nowait((number, ctypes.string_at(address, width * height * 3)))
+            except queue.Full:
+                self.dropped += 1                        # Writer behind: lose the frame, not the frame rate
+            glUnmapBuffer(GL_PIXEL_PACK_BUFFER)
+        glBindBuffer(GL_PIXEL_PACK_BUFFER, 0)
+
+    def write_loop(self):
+        """Writer thread: PNG per frame, or frames appended to the raw file (zlib and file writes release the GIL)."""
+        import os
+        out = open(self.path, 'wb') if self.raw else None
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            number, rgb = item
+            width, height = self.size
+            if out:
+                out.write(rgb)                           # Bottom-up rows, as read back
+            else:
+                write_png(os.path.join(self.path, f"frame_{number:06d}.png"), width, height, rgb, CAPTURE_PNG_LEVEL)
+            self.written += 1
+        if out:
+            out.close()
+
+    def close(self):
+        """Hands on the frames still in flight (if the GL context is still there) and waits for the writer."""
+        try:
+            while self.pending:
+                self.collect()
+        except Exception:                                # Window already gone: those frames are lost
+            self.pending.clear()
+        self.queue.put(None)
+        self.writer.join()
+        if not self.captured:
+            return
+        width, height = self.size
+        print(f"--- Recorded {self.written} frames ({width}x{height}, every {self.every}) to {self.path}, "
+              f"{self.dropped} dropped, capture {self.capture_seconds / self.captured * 1000:.2f} ms/frame ---")
+        if self.raw:
+            print(f"  ffmpeg -f rawvideo -pixel_format rgb24 -video_size {width}x{height} -i {self.path} -vf vflip out.mp4")
+
+# --------------- Leak Tracker (--leak-check) -----------------
+LEAK_WARMUP_FRAMES = 120             # Frames before the baseline (level load, caches, first compiles)
+LEAK_REPORT_SECONDS = 10.0           # Seconds between reports
+LEAK_TOP_SITES = 10                  # Growth sites listed per report
+GL_OBJECT_CALLS = (                  # (create function, delete function, object kind)
+    ('glGenLists', 'glDeleteLists', 'display list'),
+    ('glGenBuffers', 'glDeleteBuffers', 'buffer'),
+    ('glGenTextures', 'glDeleteTextures', 'texture'),
+    ('glGenFramebuffers', 'glDeleteFramebuffers', 'framebuffer'),
+    ('glGenRenderbuffers', 'glDeleteRenderbuffers', 'renderbuffer'),
+    ('glCreateShader', 'glDeleteShader', 'shader'),
+    ('glCreateProgram', 'glDeleteProgram', 'program'),
+    ('gluNewQuadric', 'gluDeleteQuadric', 'quadric'),
+)
+leak_tracker = None                  # LeakTracker when --leak-check is on
+
+def gl_object_ids(kind, result, args, created):
+    """Object names a create call returned (created=True) or a delete call was given."""
+    if kind == 'display list':                               # glGenLists(n) -> first of n; glDeleteLists(first, n)
+        first, count = (result, args[0]) if created else args[:2]
+        return range(int(first), int(first) + int(count))
+    if kind == 'quadric':
+        return [id(result if created else args[0])]
+    if kind in ('shader', 'program'):
+        return [int(result if created else args[0])]
+    names = result if created else args[-1]                  # glGen*(n) / glDelete*(n, names)
+    try:
+        return [int(name) for name in names]
+    except TypeError:
+        return [int(names)]                                  # A single name
+
+class LeakTracker:
+    """Diagnostic mode: per-frame Python allocation growth by call site (tracemalloc) and live GL objects.
+
+    Reports compare against a baseline taken after a warm-up, so they show what keeps growing over a
+    session rather than what a level needs once.
+    """
+    def __init__(self):
+        import tracemalloc
+        self.tracemalloc = tracemalloc
+        tracemalloc.start()
+        self.frames = 0
+        self.frame_growth = deque(maxlen=1000)               # Net traced bytes per frame
+        self.last_traced = tracemalloc.get_traced_memory()[0]
+        self.baseline = None                                 # (snapshot, traced bytes, frame, GL counts)
+        self.next_report = time.perf_counter() + LEAK_REPORT_SECONDS
+        self.gl_live = {kind: {} for _, _, kind in GL_OBJECT_CALLS}   # kind -> {name: creating site}
+
+    def track_gl_objects(self):
+        """Wraps the GL/GLU create and delete functions in the module globals (call after load_opengl())."""
+        names = globals()
+        for create, delete, kind in GL_OBJECT_CALLS:
+            if create in names and delete in names:
+                names[create] = self.tracked(names[create], kind, True)
+                names[delete] = self.tracked(names[delete], kind, False)
+
+    def tracked(self, function, kind, created):
+        live = self.gl_live[kind]
+        def wrapper(*args):
+            result = function(*args)
+            if created:
+                caller = sys._getframe(1)
+                site = f"{caller.f_code.co_name}:{caller.f_lineno}"
+                for name in gl_object_ids(kind, result, args, True):
+                    live[name] = site
+            else:
+                for name in gl_object_ids(kind, result, args, False):
+                    live.pop(name, None)
+            return result
+        return wrapper
+
+    def snapshot(self):
+        return self.tracemalloc.take_snapshot().filter_traces((
+            self.tracemalloc.Filter(False, self.tracemalloc.__file__),
+            self.tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")))
+
+    def frame(self):
+        """Called once per frame (or tick when headless)."""
+        self.frames += 1
+        traced = self.tracemalloc.get_traced_memory()[0]
+        self.frame_growth.append(traced - self.last_traced)
+        self.last_traced = traced
+        if self.baseline is None and self.frames >= LEAK_WARMUP_FRAMES:
+            self.baseline = (self.snapshot(), traced, self.frames, {k: len(v) for k, v in self.gl_live.items()})
+        elif self.baseline is not None and time.perf_counter() >= self.next_report:
+            self.report()
+
+    def report(self):
+        """Prints growth since the baseline: traced memory, top allocation sites and live GL objects."""
+        self.next_report = time.perf_counter() + LEAK_REPORT_SECONDS
+        if self.baseline is None:
+            print(f"--- Leak check: {self.frames} frames, still warming up ---")
+            return
+        snapshot, traced, frame, gl_counts = self.baseline
+        now = self.tracemalloc.get_traced_memory()[0]
+        frames = max(1, self.frames - frame)
+        growth = list(self.frame_growth)
+        print(f"--- Leak check: {self.frames} frames, {frames} since baseline ---")
+        print(f"  traced Python memory {now / 1048576:.2f} MB ({(now - traced) / 1024:+.1f} KB since baseline, "
+              f"{(now - traced) / frames:+.1f} B/frame); per frame mean {sum(growth) / len(growth):+.0f} B, "
+              f"max {max(growth) / 1024:+.1f} KB")
+        stats = [s for s in self.snapshot().compare_to(snapshot, 'lineno') if s.size_diff > 0]
+        for stat in stats[:LEAK_TOP_SITES]:
+            where = stat.traceback[0]
+            print(f"  {stat.size_diff / 1024:+9.1f} KB {stat.count_diff:+7d} blocks  {stat.size_diff / frames:+8.1f} B/frame"
+                  f"  {where.filename.rsplit('/', 1)[-1]}:{where.lineno}")
+        live = {kind: len(objects) for kind, objects in self.gl_live.items() if objects or gl_counts[kind]}
+        if live:
+            print("  live GL objects: " + ", ".join(f"{kind} {count} ({count - gl_counts[kind]:+d})" for kind, count in live.items()))
+            for kind, objects in self.gl_live.items():
+                if len(objects) > gl_counts[kind]:
+                    sites = {}
+                    for site in objects.values():
+                        sites[site] = sites.get(site, 0) + 1
+                    top = sorted(sites.items(), key=lambda item: -item[1])[:3]
+                    print(f"    {kind}: " + ", ".join(f"{count} from {site}" for site, count in top))
+
+# --------------- Level Analytics (--analyze) -----------------
+class Histogram:
+    """Bounded-memory distribution of one metric: values are counted in fixed-width buckets."""
+    def __init__(self, bucket_width=1):
+        self.bucket_width = bucket_width                # Resolution of the percentiles
+        self.buckets = {}                               # bucket index -> count
+        self.count, self.total = 0, 0.0                 # For the exact mean
+        self.low, self.high = None, None                # Exact min/max
+
+    def add(self, value):
+        """Counts one sample."""
+        bucket = int(round(value / self.bucket_width))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.low = value if self.low is None else min(self.low, value)
+        self.high = value if self.high is None else max(self.high, value)
+
+    def percentile(self, p):
+        """Approximate p-th percentile (bucket resolution)."""
+        rank, seen = p / 100.0 * self.count, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return bucket * self.bucket_width
+        return self.high
+
+    def summary(self):
+        """min/mean/p10/p50/p90/max as a dict."""
+        if not self.count:
+            return {}
+        return {'min': self.low, 'mean': self.total / self.count, 'p10': self.percentile(10),
+                'p50': self.percentile(50), 'p90': self.percentile(90), 'max': self.high}
+
+ANALYTICS_METRICS = {                                   # metric -> histogram bucket width
+    'solution_length': 1, 'dead_ends': 1, 'junctions': 1, 'branching_factor': 0.01,
+    'path_branches': 1, 'traps_on_path': 1, 'trap_density': 0.005, 'gen_ms': 0.05,
+}
+
+def analyze_level_sample(task):
+    """Generates one level like start_game does and measures it (runs in a worker process)."""
+    level, seed = task
+    random.seed(seed)                                   # Reproducible from the JSONL row
+    width, height = LEVEL_SETTINGS[level]['size']
+    t0 = time.perf_counter()
+    maze = Maze(width, height)                          # Build maze
+    start_x, start_y = random.randint(0, width-1), random.randint(0, height-1)  # Random start cell
+    maze.start_x, maze.start_y = start_x, start_y
+    gx, gy, solution_length = maze.compute_goal_from_start(start_x, start_y)
+    maze.place_traps(start_x, start_y, level)
+    gen_ms = (time.perf_counter() - t0) * 1000
+
+    degree = {}                                         # Open sides per cell
+    for x in range(width):
+        for y in range(height):
+            degree[(x, y)] = sum(1 for closed in maze.grid[x][y].walls.values() if not closed)
+    junctions = [d for d in degree.values() if d >= 3]
+    traps_on_path = sum(1 for (x, y) in maze.main_path
+                        if maze.grid[x][y].has_hole or maze.grid[x][y].has_spikes)
+    return {
+        'level': level, 'seed': seed, 'width': width, 'height': height,
+        'start': [start_x, start_y], 'goal': [gx, gy],
+        'solution_length': solution_length,
+        'dead_ends': sum(1 for d in degree.values() if d == 1),
+        'junctions': len(junctions),
+        'branching_factor': sum(d - 1 for d in junctions) / len(junctions) if junctions else 0.0,
+        'path_branches': sum(degree[c] - 2 for c in maze.main_path if degree[c] > 2),  # Side exits on the way
+        'traps_on_path': traps_on_path,
+        'trap_density': traps_on_path / len(maze.main_path) if maze.main_path else 0.0,
+        'gen_ms': round(gen_ms, 3),
+    }
+
+def run_level_analytics(count, levels, workers, out_path, base_seed):
+    """Generates `count` levels per level number on a process pool, streaming rows to JSONL."""
+    import json, multiprocessing, os
+    workers = workers or os.cpu_count() or 1
+    histograms = {level: {name: Histogram(width) for name, width in ANALYTICS_METRICS.items()}
+                  for level in levels}
+    window = workers * 256                              # Tasks in flight, keeps memory bounded
+    tasks = ((level, base_seed + level * 1000003 + i) for level in levels for i in range(count))
+    total, t0 = count * len(levels), time.perf_counter()
+    done = 0
+    print(f"Analyzing {total} levels on {workers} worker processes -> {out_path}")
+    with open(out_path, 'w') as out, multiprocessing.Pool(workers) as pool:
+        while True:
+            batch = [task for _, task in zip(range(window), tasks)]
+            if not batch:
+                break
+            for row in pool.imap_unordered(analyze_level_sample, batch, chunksize=64):
+                out.write(json.dumps(row) + '\n')     # Stream, nothing kept per level
+                for name, histogram in histograms[row['level']].items():
+                    histogram.add(row[name])
+                done += 1
+            print(f"  {done}/{total} levels ({done / (time.perf_counter() - t0):.0f} levels/s)")
+
+    for level in levels:
+        settings = LEVEL_SETTINGS[level]
+        print(f"--- Level {level}: {settings['name']} {settings['size'][0]}x{settings['size'][1]}, "
+              f"{settings['hole_traps']} holes, {settings['spike_traps']} spikes ---")
+        print(f"  {'metric':<18}{'min':>9}{'mean':>9}{'p10':>9}{'p50':>9}{'p90':>9}{'max':>9}")
+        for name, histogram in histograms[level].items():
+            stats = histogram.summary()
+            print(f"  {name:<18}" + ''.join(f"{stats[k]:>9.2f}" for k in ('min', 'mean', 'p10', 'p50', 'p90', 'max')))
+
+# --------------- Autopilot (--autopilot) -----------------
+TRAP_SIDESTEP = 65.0                 # Offset from a trap cell's center the bot walks at (> SPIKE_RADIUS - PLAYER_RADIUS)
+AUTOPILOT_FIRE_INTERVAL = 8          # Ticks between the bot's shots
+AUTOPILOT_LEVEL_TICKS = 30000        # Give up on a level after this many ticks (counted as timeout)
+
+def angle_difference(target_deg, current_deg):
+    """Signed smallest rotation (degrees) from current to target."""
+    return (target_deg - current_deg + 180.0) % 360.0 - 180.0
+
+def current_memory_kb():
+    """Resident set size of this process in KB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            import os
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+class Autopilot:
+    """Simulated player: walks the shortest path to the goal, shoots visible enemies and steps around traps."""
+    def __init__(self):
+        self.route = []                          # World-space waypoints to the goal
+        self.route_cells = set()                 # Cells the route passes through
+        self.fire_cooldown = 0                   # Ticks until the bot may shoot again
+        self.last_pos = (None, None)             # For stuck detection
+        self.stuck_ticks = 0
+        self.ticks = 0
+        self.ignore_until = {}                   # Enemy -> tick, for enemies we can't line up a shot on
+
+    def plan_route(self, cell):
+        """Builds waypoints along find_shortest_path, detouring around trap radii."""
+        path = game_maze.find_shortest_path(cell, game_maze.goal)
+        self.route, self.route_cells = [], set(path)
+        for i in range(1, len(path)):
+            gx, gy = path[i]
+            cx, cy = gx * CELL_SIZE + CELL_SIZE / 2, gy * CELL_SIZE + CELL_SIZE / 2   # Cell center
+            c = game_maze.grid[gx][gy]
+            if not (c.has_hole or c.has_spikes) or i + 1 >= len(path):
+                self.route.append((cx, cy))
+                continue
+            dx1, dy1 = gx - path[i-1][0], gy - path[i-1][1]        # Direction entering the trap cell
+            dx2, dy2 = path[i+1][0] - gx, path[i+1][1] - gy        # Direction leaving it
+            if (dx1, dy1) == (dx2, dy2):                           # Straight through: hug one side
+                side_x, side_y = -dy1 * TRAP_SIDESTEP, dx1 * TRAP_SIDESTEP
+                self.route.append((cx + side_x - dx1 * TRAP_SIDESTEP, cy + side_y - dy1 * TRAP_SIDESTEP))
+                self.route.append((cx + side_x + dx1 * TRAP_SIDESTEP, cy + side_y + dy1 * TRAP_SIDESTEP))
+            else:                                                  # Turning: cut through the corner
+                self.route.append((cx + (dx2 - dx1) * TRAP_SIDESTEP, cy + (dy2 - dy1) * TRAP_SIDESTEP))
+
+    def clear_shot(self, enemy, angle_deg):
+        """True if a bullet fired along angle_deg would hit the enemy (same steps and wall test as Bullet.update)."""
+        ux, uy = math.cos(math.radians(angle_deg)), math.sin(math.radians(angle_deg))
+        bx, by = player_x + 12 * ux, player_y + 12 * uy            # fire_bullet spawns 12 units ahead
+        for _ in range(int(ENEMY_SIGHT_RANGE / 5.0) + 2):
+            bx, by = bx + ux * 5.0, by + uy * 5.0                  # Bullet speed
+            if check_collision(bx, by):
+                return False
+            if math.hypot(bx - enemy.x, by - enemy.y) < enemy.radius + 1.0:
+                return True
+        return False
+
+    def visible_enemy(self):
+        """Nearest active enemy in sight range that a bullet can actually reach."""
+        best, best_dist = None, ENEMY_SIGHT_RANGE
+        for enemy in enemies:
+            dist = math.hypot(enemy.x - player_x, enemy.y - player_y)
+            if (enemy.active and 0 < dist < best_dist and self.ignore_until.get(enemy, 0) <= self.ticks
+                    and self.clear_shot(enemy, math.degrees(math.atan2(enemy.y - player_y, enemy.x - player_x)))):
+                best, best_dist = enemy, dist
+        return best
+
+    def turn_towards(self, target_deg, tolerance):
+        """Turns one tick's worth like a held a/d key, returns True when facing the target."""
+        diff = angle_difference(target_deg, player_angle_deg)
+        if abs(diff) <= tolerance:
+            return True
+        move_player(0, 1 if diff > 0 else -1)                      # Left turn raises the angle
+        return False
+
+    def control(self):
+        """Chooses this tick's inputs."""
+        self.ticks += 1
+        self.fire_cooldown -= 1
+        enemy = self.visible_enemy()
+        if enemy is not None:                                      # Engage before walking on
+            aim = math.degrees(math.atan2(enemy.y - player_y, enemy.x - player_x))
+            if self.turn_towards(aim, TURN_SPEED / 2) and self.fire_cooldown <= 0:
+                if self.clear_shot(enemy, player_angle_deg):
+                    fire_bullet()
+                    self.fire_cooldown = AUTOPILOT_FIRE_INTERVAL
+                else:                                              # Turn steps can't line it up, walk on
+                    self.ignore_until[enemy] = self.ticks + 120
+            return
 
-    # Basic OpenGL setup
+        cell = (int(player_x / CELL_SIZE), int(player_y / CELL_SIZE))
+        if (player_x, player_y) == self.last_pos:
+            self.stuck_ticks += 1
+        else:
+            self.stuck_ticks, self.last_pos = 0, (player_x, player_y)
+        if not self.route or cell not in self.route_cells or self.stuck_ticks > 90:
+            self.plan_route(cell)                                  # Off route or blocked: replan
+            self.stuck_ticks = 0
+        while self.route and math.hypot(self.route[0][0] - player_x, self.route[0][1] - player_y) < PLAYER_SPEED:
+            self.route.pop(0)                                      # Waypoint reached
+        if not self.route:
+            return
+        tx, ty = self.route[0]
+        heading = math.degrees(math.atan2(ty - player_y, tx - player_x))
+        if self.turn_towards(heading, 8.0):
+            move_player(1, 0)                                      # Walk forward
+
+def run_autopilot(level_runs, max_seconds, report_every, seed):
+    """Headless soak test: the autopilot plays level after level with no rendering or frame cap."""
+    global console_output, ai_budget_ms
+    import gc
+    console_output = False                                         # Keep per-level prints out of the loop
+    ai_budget_ms = None                                            # Same seed, same run on any machine
+    random.seed(seed)
+    results = {'completed': 0, 'timeout': 0}                       # Outcome -> count (deaths by message)
+    baseline_kb = current_memory_kb()
+    t0 = last_report = time.perf_counter()
+    ticks = ticks_at_report = runs = 0
+    level = 1
+
+    def report(final=False):
+        now = time.perf_counter()
+        rate = (ticks - ticks_at_report) / max(now - last_report, 1e-9)
+        memory_kb = current_memory_kb()
+        print(f"[{now - t0:8.1f}s] runs {runs}  ticks {ticks}  {rate:,.0f} ticks/s  "
+              f"completion {results['completed'] / max(runs, 1):.1%}  "
+              f"rss {memory_kb / 1024:.1f} MB ({(memory_kb - baseline_kb) / 1024:+.1f})  "
+              f"objects {len(gc.get_objects())}")
+        if final:
+            print(f"--- Autopilot: {runs} level runs, {ticks} ticks in {now - t0:.1f}s "
+                  f"({ticks / max(now - t0, 1e-9):,.0f} ticks/s) ---")
+            for outcome, count in sorted(results.items(), key=lambda item: -item[1]):
+                print(f"  {outcome:<32}{count:>8}  {count / max(runs, 1):6.1%}")
+            if leak_tracker:
+                leak_tracker.report()
+
+    while runs < level_runs and not (max_seconds and time.perf_counter() - t0 > max_seconds):
+        start_game(level)
+        bot = Autopilot()
+        level_ticks = 0
+        while game_state == "playing" and level_ticks < AUTOPILOT_LEVEL_TICKS:
+            bot.control()
+            simulation_tick()
+            level_ticks += 1
+            if leak_tracker:
+                leak_tracker.frame()                               # --leak-check: per tick headless
+        ticks += level_ticks
+        runs += 1
+        if game_state == "level_complete":
+            results['completed'] += 1
+            level = level % STORY_LEVELS + 1                       # Next level, wrap after the last
+        elif game_state == "game_over":
+            results[game_over_message] = results.get(game_over_message, 0) + 1   # Restart same level
+        else:
+            results['timeout'] += 1
+        if time.perf_counter() - last_report >= report_every:
+            report()
+            last_report, ticks_at_report = time.perf_counter(), ticks
+    report(final=True)
+
+# --------------- Vectorized Environment (VectorEnv) -----------------
+ACTION_FORWARD, ACTION_BACK, ACTION_LEFT, ACTION_RIGHT, ACTION_FIRE = 1, 2, 4, 8, 16   # Action bit flags
+OBS_ENEMY_SLOTS = MAX_ACTIVE_ENEMIES                 # Nearest enemies included in an observation
+OBS_SIZE = 13 + 3 * OBS_ENEMY_SLOTS                  # Floats per observation row
+VECTOR_ENV_EPISODE_TICKS = 20000                     # Episodes longer than this are cut off
+
+def write_observation(out, offset):
+    """Writes the current game's observation into a flat float buffer starting at offset."""
+    span_x, span_y = MAZE_WIDTH * CELL_SIZE, MAZE_HEIGHT * CELL_SIZE
+    angle_rad = math.radians(player_angle_deg)
+    gx, gy = game_maze.goal
+    cell = (int(player_x / CELL_SIZE), int(player_y / CELL_SIZE))
+    nx, ny = game_maze.graph().next_step(cell, game_maze.goal) or game_maze.goal   # Next cell towards the exit
+    walls = game_maze.grid[cell[0]][cell[1]].walls
+    out[offset:offset + 13] = [
+        player_x / span_x, player_y / span_y, math.cos(angle_rad), math.sin(angle_rad),
+        player_health / max_health,
+        (gx * CELL_SIZE + CELL_SIZE / 2 - player_x) / span_x, (gy * CELL_SIZE + CELL_SIZE / 2 - player_y) / span_y,
+        (nx * CELL_SIZE + CELL_SIZE / 2 - player_x) / CELL_SIZE, (ny * CELL_SIZE + CELL_SIZE / 2 - player_y) / CELL_SIZE,
+        float(walls['N']), float(walls['S']), float(walls['E']), float(walls['W']),
+    ]
+    nearest = sorted((e for e in enemies if e.active),
+                     key=lambda e: math.hypot(e.x - player_x, e.y - player_y))[:OBS_ENEMY_SLOTS]
+    slots = []
+    for enemy in nearest:                                       # dx, dy, can see us
+        slots += [(enemy.x - player_x) / ENEMY_SIGHT_RANGE, (enemy.y - player_y) / ENEMY_SIGHT_RANGE,
+                  float(enemy.can_see_player())]
+    slots += [0.0] * (3 * OBS_ENEMY_SLOTS - len(slots))        # Empty slots
+    out[offset + 13:offset + OBS_SIZE] = slots
+
+def apply_action(action, owner=None):
+    """Feeds one action bitmask through the same per-tick movement a held key uses."""
+    if game_state != "playing":
+        return
+    forward = 1 if action & ACTION_FORWARD else -1 if action & ACTION_BACK else 0
+    turn = 1 if action & ACTION_LEFT else -1 if action & ACTION_RIGHT else 0
+    move_player(forward, turn)
+    if action & ACTION_FIRE:
+        fire_bullet(owner)
+
+def vector_env_worker(index, num_envs, shared, conn, seed, level, frame_skip):
+    """Runs one game instance in its own process; commands come over the pipe, data through shared memory."""
+    global console_output, telemetry, ai_budget_ms
+    console_output = False
+    ai_budget_ms = None                                         # Episodes reproducible from the seed
+    telemetry = None                                            # The parent's writer thread doesn't survive the fork
+    random.seed(seed)
+    obs_offset = index * OBS_SIZE                               # Layout: obs rows | rewards | dones | actions
+    reward_slot, done_slot, action_slot = (num_envs * OBS_SIZE + k * num_envs + index for k in range(3))
+    episode_ticks = 0
+    while True:
+        command = conn.recv()
+        if command == 'step' and game_maze is None:
+            start_game(level)                                   # Stepped before any reset: start the first episode
+            episode_ticks = 0
+        if command == 'step':
+            kills, health = killed_enemies, player_health
+            reward = 0.0
+            for _ in range(frame_skip):
+                apply_action(int(shared[action_slot]))
+                simulation_tick()
+                episode_ticks += 1
+                if game_state != "playing":
+                    break
+            reward += (killed_enemies - kills) * 1.0 - (health - player_health) / max_health
+            done = game_state != "playing" or episode_ticks >= VECTOR_ENV_EPISODE_TICKS
+            if game_state == "level_complete":
+                reward += 10.0
+            elif game_state == "game_over":
+                reward -= 5.0
+            shared[reward_slot], shared[done_slot] = reward, float(done)
+            if done:                                            # Auto-reset, obs is the new episode's first
+                start_game(level)
+                episode_ticks = 0
+        elif command == 'reset':
+            start_game(level)
+            episode_ticks = 0
+        elif command == 'close':
+            break
+        write_observation(shared, obs_offset)
+        conn.send(True)                                         # Tiny ack, the data is already shared
+
+class VectorEnv:
+    """N independent games, one per worker process, stepped in lockstep with batched actions.
+
+    Observations, rewards, dones and actions live in one shared float array, only a one-word command
+    and ack cross each pipe per step. Results are NumPy views when NumPy is installed, memoryviews otherwise.
+    """
+    def __init__(self, num_envs, level=1, seed=0, frame_skip=4):
+        import multiprocessing
+        self.num_envs = num_envs
+        self.shared = multiprocessing.RawArray('d', num_envs * (OBS_SIZE + 3))
+        self.conns, self.workers = [], []
+        for i in range(num_envs):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            worker = multiprocessing.Process(target=vector_env_worker, daemon=True,
+                                             args=(i, num_envs, self.shared, child_conn, seed + i, level, frame_skip))
+            worker.start()
+            self.conns.append(parent_conn)
+            self.workers.append(worker)
+        flat = memoryview(self.shared).cast('B').cast('d')
+        n = num_envs * OBS_SIZE
+        self.observations, self.rewards = flat[:n], flat[n:n + num_envs]
+        self.dones, self.actions = flat[n + num_envs:n + 2 * num_envs], flat[n + 2 * num_envs:]
+        try:
+            import numpy
+            self.observations = numpy.frombuffer(self.shared, dtype=numpy.float64, count=n).reshape(num_envs, OBS_SIZE)
+            self.rewards, self.dones = (numpy.frombuffer(self.shared, dtype=numpy.float64, count=num_envs,
+                                                         offset=(n + k * num_envs) * 8) for k in range(2))
+        except ImportError:
+            pass                                                # Flat memoryviews, row i at i*OBS_SIZE
+
+    def _broadcast(self, command):
+        for conn in self.conns:
+            conn.send(command)
+        for conn in self.conns:
+            conn.recv()                                         # Lockstep: wait for every instance
+
+    def reset(self):
+        """Starts a fresh level in every instance, returns the observations."""
+        self._broadcast('reset')
+        return self.observations
+
+    def step(self, actions):
+        """Applies one action bitmask per instance, returns (observations, rewards, dones)."""
+        for i, action in enumerate(actions):
+            self.actions[i] = action
+        self._broadcast('step')
+        return self.observations, self.rewards, self.dones
+
+    def close(self):
+        for conn in self.conns:
+            conn.send('close')
+        for worker in self.workers:
+            worker.join()
+
+def run_vector_env_benchmark(num_envs, steps, level, seed):
+    """Steps num_envs instances with random actions and reports environment steps per second."""
+    env = VectorEnv(num_envs, level=level, seed=seed)
+    env.reset()
+    rng = random.Random(seed)
+    episodes, t0 = 0, time.perf_counter()
+    for _ in range(steps):
+        _, _, dones = env.step([rng.randrange(32) for _ in range(num_envs)])
+        episodes += int(sum(dones))
+    elapsed = time.perf_counter() - t0
+    env.close()
+    print(f"--- VectorEnv: {num_envs} instances x {steps} steps in {elapsed:.2f}s ---")
+    print(f"  {num_envs * steps / elapsed:,.0f} env steps/s ({steps / elapsed:,.0f} batched steps/s), "
+          f"{episodes} episodes finished")
+
+# --------------- Multiplayer Server (--serve) -----------------
+SERVER_TICK_RATE = 30                # Snapshots sent per second (the simulation itself ticks at SIM_TICK_RATE)
+SNAPSHOT_HISTORY = 32                # Sent snapshots kept per client as possible delta bases
+INTEREST_RADIUS = 1400.0             # Enemies/bullets further than this from a player are not sent to them
+MAX_SNAPSHOT_ENTITIES = 48           # Nearest enemies + bullets per snapshot
+MAX_PLAYERS = 8
+MAX_CLIENT_BACKLOG = 64 * 1024       # Skip a client's snapshot while this many bytes are still queued
+LEVEL_RESTART_TICKS = 3 * SIM_TICK_RATE   # Pause after everyone died/escaped before the next level
+PLAYER_STATE_FIELDS = ('player_x', 'player_y', 'player_angle_deg', 'player_health', 'spike_cooldown',
+                       'game_state', 'game_over_message', 'killed_enemies', 'trigger_cell')
+PLAYER_STATUS_CODES = {'playing': 0, 'game_over': 1, 'level_complete': 2}
+
+def encode_static_level():
+    """Maze walls, traps and goal: sent once per level and never part of a snapshot delta."""
+    walls = ''.join('%x' % (c.walls['N'] | c.walls['S'] << 1 | c.walls['E'] << 2 | c.walls['W'] << 3)
+                    for column in game_maze.grid for c in column)          # One hex digit per cell, x-major
+    return {'t': 'level', 'level': current_level, 'size': [MAZE_WIDTH, MAZE_HEIGHT], 'walls': walls,
+            'holes': [[c.x, c.y] for column in game_maze.grid for c in column if c.has_hole],
+            'spikes': [[c.x, c.y] for column in game_maze.grid for c in column if c.has_spikes],
+            'start': [game_maze.start_x, game_maze.start_y], 'goal': list(game_maze.goal)}
+
+def encode_message(message):
+    """One newline-terminated compact JSON line."""
+    import json
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+def snapshot_delta(base, current):
+    """Entries of current that differ from base, and keys of base that are gone."""
+    changed = {key: value for key, value in current.items() if base.get(key) != value}
+    removed = [key for key in base if key not in current]
+    return changed, removed
+
+def apply_snapshot_delta(base, changed, removed):
+    """Rebuilds a full snapshot from its base and a delta (client side)."""
+    state = dict(base)
+    state.update((key, tuple(value)) for key, value in changed.items())
+    for key in removed:
+        state.pop(key, None)
+    return state
+
+class RemotePlayer:
+    """One connected client: its player state (swapped into the module globals to simulate) and snapshot bookkeeping."""
+    def __init__(self, pid, writer):
+        self.pid, self.writer = pid, writer
+        self.state = {}                          # PLAYER_STATE_FIELDS -> value
+        self.keys = 0                            # Held action bits from the last input message
+        self.fire = False                        # Fire requested since the last tick
+        self.history = {}                        # seq -> snapshot sent (delta bases)
+        self.acked = 0                           # Newest snapshot the client confirmed
+        self.bytes_sent = 0
+        self.full_snapshots = self.delta_snapshots = self.skipped_snapshots = 0
+
+    def swap_in(self):
+        globals().update(self.state)
+
+    def swap_out(self):
+        self.state = {field: globals()[field] for field in PLAYER_STATE_FIELDS}
+
+    def send(self, data):
+        self.writer.write(data)
+        self.bytes_sent += len(data)
+
+class GameServer:
+    """Authoritative asyncio server: one shared maze, simulated at SIM_TICK_RATE like the local game, with
+    per-client delta-compressed snapshots sent tick_rate times a second."""
+    def __init__(self, level=1, tick_rate=SERVER_TICK_RATE):
+        self.tick_rate = tick_rate               # Snapshots per second
+        self.players = {}                        # pid -> RemotePlayer
+        self.next_pid = 1
+        self.seq = 0                             # Snapshot sequence number
+        self.sim_ticks = 0                       # Simulation ticks run
+        self.tick_times = deque(maxlen=1000)     # Recent tick durations (seconds)
+        self.level_over_ticks = 0
+        self.running = False
+        self.new_level(level)
+
+    def new_level(self, level):
+        """Generates the shared level and respawns every player at its start."""
+        start_game(level)
+        self.spawn_state = {field: globals()[field] for field in PLAYER_STATE_FIELDS}
+        self.static_message = encode_message(encode_static_level())
+        for player in self.players.values():
+            self.spawn(player)
+
+    def spawn(self, player):
+        player.state = dict(self.spawn_state)
+        player.history.clear()
+        player.acked = 0                                       # Next snapshot is a full one
+        player.send(self.static_message)
+
+    def simulate(self):
+        """One tick of update_game_logic's steps, with each player's globals swapped in for the per-player parts."""
+        alive = [p for p in self.players.values() if p.state['game_state'] == "playing"]
+        for player in alive:                                   # Inputs
+            player.swap_in()
+            apply_action(player.keys | (ACTION_FIRE if player.fire else 0), owner=player.pid)
+            player.fire = False
+            player.swap_out()
+        update_bullets()
+        for enemy in enemies:                                  # Enemies chase/shoot the nearest player
+            if enemy.active and alive:
+                target = min(alive, key=lambda p: math.hypot(p.state['player_x'] - enemy.x, p.state['player_y'] - enemy.y))
+                target.swap_in()
+                enemy.update()
+        for bullet in resolve_player_bullets():                # Kill credit goes to the shooter
+            if bullet.owner in self.players:
+                self.players[bullet.owner].state['killed_enemies'] += 1
+        for player in alive:                                   # Damage, traps, goal per player
+            if player.state['spike_cooldown'] > 0:
+                player.state['spike_cooldown'] -= 1
+            player.swap_in()
+            if not resolve_enemy_bullets() and not resolve_enemy_contact():
+                update_cell_triggers()
+            player.swap_out()
+        spawn_waiting_enemies()
+
+        if self.players and not any(p.state['game_state'] == "playing" for p in self.players.values()):
+            self.level_over_ticks += 1                         # Everyone is dead or out
+            if self.level_over_ticks >= LEVEL_RESTART_TICKS:
+                escaped = any(p.state['game_state'] == "level_complete" for p in self.players.values())
+                self.level_over_ticks = 0
+                self.new_level(current_level % STORY_LEVELS + 1 if escaped else current_level)
+
+    def world_snapshot(self):
+        """Quantized entity state for this tick: players, plus enemies/bullets bucketed by cell."""
+        players = {'p%d' % p.pid: (round(p.state['player_x']), round(p.state['player_y']),
+                                   round(p.state['player_angle_deg']) % 360, p.state['player_health'],
+                                   PLAYER_STATUS_CODES[p.state['game_state']], p.state['killed_enemies'])
+                   for p in self.players.values()}
+        buckets = {}                                           # (cell x, cell y) -> [(key, values)]
+        for enemy in enemies:
+            if enemy.active:
+                cell = (int(enemy.x / CELL_SIZE), int(enemy.y / CELL_SIZE))
+                buckets.setdefault(cell, []).append(('e%d' % enemy.uid, (round(enemy.x), round(enemy.y), round(enemy.angle_deg) % 360)))
+        for bullet in bullets:
+            if bullet.active:
+                cell = (int(bullet.x / CELL_SIZE), int(bullet.y / CELL_SIZE))
+                buckets.setdefault(cell, []).append(('b%d' % bullet.uid, (round(bullet.x), round(bullet.y), int(bullet.is_enemy))))
+        return players, buckets
+
+    def client_snapshot(self, player, players, buckets):
+        """What this client may see: all players plus the nearest enemies/bullets inside its interest radius."""
+        import heapq
+        px, py = player.state['player_x'], player.state['player_y']
+        reach = int(INTEREST_RADIUS / CELL_SIZE) + 1
+        gx, gy = int(px / CELL_SIZE), int(py / CELL_SIZE)
+        nearby = []
+        for cx in range(gx - reach, gx + reach + 1):           # Only cells around the player, not the whole world
+            for cy in range(gy - reach, gy + reach + 1):
+                for key, values in buckets.get((cx, cy), ()):
+                    dist = math.hypot(values[0] - px, values[1] - py)
+                    if dist <= INTEREST_RADIUS:
+                        nearby.append((dist, key, values))
+        snapshot = dict(players)
+        snapshot.update((key, values) for _, key, values in heapq.nsmallest(MAX_SNAPSHOT_ENTITIES, nearby))
+        return snapshot
+
+    def send_snapshots(self):
+        """Sends every client a delta against the newest snapshot it acknowledged."""
+        self.seq += 1
+        players, buckets = self.world_snapshot()
+        for player in self.players.values():
+            if player.writer.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+                player.skipped_snapshots += 1                  # Slow client: don't queue unbounded data
+                continue
+            snapshot = self.client_snapshot(player, players, buckets)
+            base_seq = player.acked if player.acked in player.history else 0
+            changed, removed = snapshot_delta(player.history.get(base_seq, {}), snapshot)
+            player.send(encode_message({'t': 'snap', 'seq': self.seq, 'base': base_seq, 'level': current_level,
+                                        'set': changed, 'del': removed}))
+            if base_seq:
+                player.delta_snapshots += 1
+            else:
+                player.full_snapshots += 1
+            player.history[self.seq] = snapshot
+            for old in [seq for seq in player.history if seq < base_seq or seq <= self.seq - SNAPSHOT_HISTORY]:
+                del player.history[old]                        # Bounded per-client history
+
+    def tick(self):
+        """One simulation tick, plus the clients' snapshots when one of the tick_rate a second is due."""
+        t0 = time.perf_counter()
+        self.simulate()
+        self.sim_ticks += 1
+        if self.sim_ticks * self.tick_rate >= (self.seq + 1) * SIM_TICK_RATE:
+            self.send_snapshots()
+        self.tick_times.append(time.perf_counter() - t0)
+
+    async def handle_client(self, reader, writer):
+        """Registers a player and applies its input messages until it disconnects."""
+        import json
+        if len(self.players) >= MAX_PLAYERS:
+            writer.write(encode_message({'t': 'full'}))
+            writer.close()
+            return
+        player = RemotePlayer(self.next_pid, writer)
+        self.next_pid += 1
+        self.players[player.pid] = player
+        player.send(encode_message({'t': 'welcome', 'you': player.pid, 'tick_rate': self.tick_rate}))
+        self.spawn(player)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if message.get('t') == 'in':                   # {"t":"in","keys":bits,"ack":seq}
+                    keys = int(message.get('keys', 0))
+                    player.keys = keys & ~ACTION_FIRE
+                    player.fire = player.fire or bool(keys & ACTION_FIRE)
+                    ack = int(message.get('ack', 0))
+                    if ack > player.acked and ack in player.history:
+                        player.acked = ack
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            del self.players[player.pid]
+            writer.close()
+
+    async def run(self, host='127.0.0.1', port=5555, duration=0, on_started=None):
+        """Serves clients and ticks at SIM_TICK_RATE (forever when duration is 0)."""
+        import asyncio
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        if on_started:
+            on_started(self)
+        loop = asyncio.get_running_loop()
+        interval, next_tick = 1.0 / SIM_TICK_RATE, loop.time()
+        end = loop.time() + duration if duration else None
+        self.running = True
+        async with server:
+            while self.running and (end is None or loop.time() < end):
+                self.tick()
+                next_tick += interval
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))   # Fixed rate, no drift
+            for player in list(self.players.values()):
+                player.writer.close()                          # Clients see EOF, handlers finish
+            await asyncio.sleep(0.05)
+
+class LoopbackClient:
+    """Minimal client used for self-tests: random inputs, decodes deltas and acknowledges snapshots."""
+    def __init__(self, server, seed):
+        self.server, self.rng = server, random.Random(seed)
+        self.snapshots = {}                      # seq -> decoded snapshot (bounded)
+        self.pid = None
+        self.bytes_received = self.snapshot_count = self.full_count = self.mismatches = 0
+
+    async def run(self, port):
+        import asyncio, json
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        keys = 0
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            self.bytes_received += len(line)
+            message = json.loads(line)
+            if message['t'] == 'welcome':
+                self.pid = message['you']
+            elif message['t'] == 'level':
+                self.snapshots.clear()                         # Old bases belong to the old level
+            elif message['t'] == 'snap':
+                base = self.snapshots.get(message['base'], {}) if message['base'] else {}
+                state = apply_snapshot_delta(base, message['set'], message['del'])
+                self.snapshots[message['seq']] = state
+                for old in [seq for seq in self.snapshots if seq <= message['seq'] - SNAPSHOT_HISTORY]:
+                    del self.snapshots[old]
+                self.snapshot_count += 1
+                self.full_count += not message['base']
+                sent = self.server.players[self.pid].history.get(message['seq']) if self.pid in self.server.players else None
+                if sent is not None and sent != state:
+                    self.mismatches += 1                       # Decoded state must equal what the server sent
+                if self.rng.random() < 0.1:
+                    keys = self.rng.randrange(32)              # Hold new keys for a while
+                writer.write(encode_message({'t': 'in', 'keys': keys, 'ack': message['seq']}))
+
+def run_server_selftest(num_clients, duration, tick_rate, level):
+    """Runs the server with loopback clients and reports bandwidth, snapshot mix, tick cost and whether
+    players and bullets cover the same distance per second as in the local game."""
+    import asyncio
+    global console_output
+    console_output = False
+    steps = {'player': [], 'bullet': []}                       # Distance moved in one server tick
+
+    def probe(server):
+        """Wraps server.simulate to record how far players and bullets move per tick."""
+        simulate = server.simulate
+
+        def measured():
+            players = {p.pid: (p.state['player_x'], p.state['player_y']) for p in server.players.values()}
+            flying = {b.uid: (b.x, b.y) for b in bullets if b.active}
+            simulate()
+            for p in server.players.values():
+                if p.pid in players:
+                    steps['player'].append(math.hypot(p.state['player_x'] - players[p.pid][0], p.state['player_y'] - players[p.pid][1]))
+            steps['bullet'].extend(math.hypot(b.x - flying[b.uid][0], b.y - flying[b.uid][1])
+                                   for b in bullets if b.active and b.uid in flying)
+        server.simulate = measured
+
+    async def scenario():
+        server = GameServer(level, tick_rate)
+        probe(server)
+        clients = [LoopbackClient(server, seed) for seed in range(num_clients)]
+        started = asyncio.get_running_loop().create_future()
+        server_task = asyncio.create_task(server.run('127.0.0.1', 0, duration, on_started=started.set_result))
+        await started
+        client_tasks = [asyncio.create_task(client.run(server.port)) for client in clients]
+        await server_task
+        await asyncio.gather(*client_tasks)
+        return server, clients
+
+    server, clients = asyncio.run(scenario())
+    times = sorted(server.tick_times)
+    print(f"--- Server self-test: {num_clients} loopback clients, {duration:.0f}s at {SIM_TICK_RATE} ticks/s, "
+          f"{tick_rate} snapshots/s ---")
+    ticks_per_second = server.sim_ticks / duration
+    for name, local in (('player', PLAYER_SPEED * SIM_TICK_RATE), ('bullet', Bullet(0, 0, 0).speed * SIM_TICK_RATE)):
+        moving = sorted(step for step in steps[name] if 0 < step < CELL_SIZE)   # Not blocked, not respawned
+        if moving:
+            speed = moving[len(moving) // 2] * ticks_per_second
+            verdict = "ok" if abs(speed - local) <= 0.1 * local else "MISMATCH"
+            print(f"  {name} speed: {speed:.0f} units/s (local game {local:.0f}) {verdict}")
+    print(f"  tick cost: mean {sum(times) / len(times) * 1000:.2f} ms, p99 {times[int(len(times) * 0.99)] * 1000:.2f} ms, "
+          f"{len(enemies)} enemies spawned, {sum(1 for e in enemies if e.active)} active")
+    for client in clients:
+        print(f"  client {client.pid}: {client.bytes_received / duration / 1024:.1f} KB/s, "
+              f"{client.snapshot_count} snapshots decoded ({client.full_count} full), {client.mismatches} mismatches")
+
+# --------------- Offscreen Render Benchmark (--bench-render) -----------------
+BENCH_SIZE = (640, 480)                     # Framebuffer size for benchmark frames and goldens
+BENCH_PASSES = ('clear + camera', 'world', 'entities', 'readback')   # Timed separately (glFinish between)
+GOLDEN_SHOTS = (0.0, 0.3, 0.8)              # Flythrough positions (0..1) compared against golden images
+GOLDEN_CHANNEL_TOLERANCE = 24               # Channel difference above which a pixel counts as changed
+GOLDEN_PIXEL_FRACTION = 0.01                # Share of changed pixels a frame may have and still pass
+EGL_PLATFORM_SURFACELESS_MESA = 0x31DD      # eglGetPlatformDisplayEXT platform without any window system
+
+def create_offscreen_context(width, height):
+    """Makes a GL context with no window (EGL surfaceless, or OSMesa with PYOPENGL_PLATFORM=osmesa)
+    current and bound to a width x height framebuffer object; returns (platform, handles to keep)."""
+    import ctypes, os
+    platform = os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')     # Read when OpenGL is first imported
+    if platform == 'egl':
+        from OpenGL import EGL                                        # Before load_opengl() turns off error checks
+        display = EGL.eglGetPlatformDisplayEXT(EGL_PLATFORM_SURFACELESS_MESA, EGL.EGL_DEFAULT_DISPLAY, None)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not display or not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("no surfaceless EGL display")
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context = EGL.eglCreateContext(display, EGL.EGLConfig(), EGL.EGL_NO_CONTEXT, None)   # No-config context
+        if not context or not EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, context):
+            raise RuntimeError("could not make a surfaceless EGL context current")
+        handles = (display, context)
+    elif platform == 'osmesa':
+        from OpenGL import osmesa, arrays
+        context = osmesa.OSMesaCreateContextExt(osmesa.OSMESA_RGBA, 24, 0, 0, None)
+        pixels = arrays.GLubyteArray.zeros((height, width, 4))       # OSMesa's own color buffer (unused)
+        if not context or not osmesa.OSMesaMakeCurrent(context, pixels, 0x1401, width, height):   # GL_UNSIGNED_BYTE
+            raise RuntimeError("could not make an OSMesa context current")
+        handles = (context, pixels)
+    else:
+        raise RuntimeError(f"PYOPENGL_PLATFORM={platform} has no offscreen context (use egl or osmesa)")
+    load_opengl(debug_mode)
+    framebuffer = glGenFramebuffers(1)
+    glBindFramebuffer(GL_FRAMEBUFFER, framebuffer)
+    color, depth = glGenRenderbuffers(2)
+    glBindRenderbuffer(GL_RENDERBUFFER, color)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, color)
+    glBindRenderbuffer(GL_RENDERBUFFER, depth)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, width, height)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+    if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+        raise RuntimeError("offscreen framebuffer is incomplete")
+    glViewport(0, 0, width, height)
+    return platform, handles + (framebuffer, color, depth)
+
+def write_png(path, width, height, rgb, level=9):
+    """Writes bottom-up RGB rows (as glReadPixels returns them) to an 8-bit PNG, standard library only."""
+    import struct, zlib
+    stride = width * 3
+    raw = b''.join(b'\x00' + rgb[(height - 1 - y) * stride:(height - y) * stride] for y in range(height))
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+                chunk(b'IDAT', zlib.compress(raw, level)) + chunk(b'IEND', b''))
+
+def read_png(path):
+    """Reads a PNG written by write_png() as (width, height, bottom-up RGB bytes)."""
+    import struct, zlib
+    with open(path, 'rb') as f:
+        data = f.read()
+    pos, idat = 8, b''
+    while pos < len(data):
+        length, kind = struct.unpack('>I4s', data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        if kind == b'IHDR':
+            width, height, depth, color_type = struct.unpack('>IIBB', body[:10])
+            if (depth, color_type) != (8, 2):
+                raise ValueError(f"{path}: only 8-bit RGB PNGs are supported")
+        elif kind == b'IDAT':
+            idat += body
+        pos += 12 + length
+    raw, stride = zlib.decompress(idat), width * 3
+    rows = []
+    for y in range(height):
+        if raw[y * (stride + 1)] != 0:
+            raise ValueError(f"{path}: filtered PNG rows are not supported, regenerate with --update-goldens")
+        rows.append(raw[y * (stride + 1) + 1:(y + 1) * (stride + 1)])
+    return width, height, b''.join(reversed(rows))
+
+def compare_to_golden(rgb, golden):
+    """Share of pixels whose largest channel difference exceeds GOLDEN_CHANNEL_TOLERANCE."""
+    changed = 0
+    for i in range(0, len(rgb), 3):
+        if max(abs(rgb[i] - golden[i]), abs(rgb[i + 1] - golden[i + 1]), abs(rgb[i + 2] - golden[i + 2])) > GOLDEN_CHANNEL_TOLERANCE:
+            changed += 1
+    return changed / (len(rgb) // 3)
+
+def flythrough_camera(t, path):
+    """Scripted camera at t in 0..1: an overhead orbit for the first half, then a first person walk along `path`."""
+    global first_person
+    if t < 0.5 or len(path) < 2:
+        angle = math.radians(45 + 720 * min(t, 0.5))                       # One full turn
+        center_x, center_y = MAZE_WIDTH * CELL_SIZE / 2, MAZE_HEIGHT * CELL_SIZE / 2
+        radius = MAZE_WIDTH * CELL_SIZE * 0.8
+        eye = (center_x + radius * math.cos(angle), center_y + radius * math.sin(angle), WALL_HEIGHT * 4)
+        look = (center_x, center_y, 0)
+        first_person = False                                               # Player model in view
+    else:
+        u = (t - 0.5) * 2 * (len(path) - 1)                                # Position along the path in cells
+        i = min(int(u), len(path) - 2)
+        (ax, ay), (bx, by) = path[i], path[i + 1]
+        x = (ax + (bx - ax) * (u - i)) * CELL_SIZE + CELL_SIZE / 2
+        y = (ay + (by - ay) * (u - i)) * CELL_SIZE + CELL_SIZE / 2
+        eye = (x, y, FP_CAM_HEIGHT)
+        look = (x + (bx - ax) * 100, y + (by - ay) * 100, FP_CAM_HEIGHT)
+        first_person = True
+    set_camera_eye(*eye)
+    gluLookAt(*eye, *look, 0, 0, 1)
+
+def render_bench_frame(t, path, width, height, timings=None):
+    """Renders one flythrough frame into the framebuffer and reads it back, recording each pass's seconds."""
+    marks = [time.perf_counter()]
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(60.0, width / float(height), 1.0, 20000.0)             # Same projection as showScreen
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+    update_view()
+    flythrough_camera(t, path)
+    glFinish()
+    marks.append(time.perf_counter())
+    renderer.draw_world()
+    glFinish()
+    marks.append(time.perf_counter())
+    renderer.draw_entities()
+    glFinish()
+    marks.append(time.perf_counter())
+    glPixelStorei(GL_PACK_ALIGNMENT, 1)
+    rgb = bytes(glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE))
+    marks.append(time.perf_counter())
+    if timings is not None:
+        for name, start, end in zip(BENCH_PASSES, marks, marks[1:]):
+            timings[name].append(end - start)
+    return rgb
+
+def run_render_benchmark(levels, frames, seed, renderer_name, goldens_dir, update_goldens):
+    """Plays the flythrough over a fixed-seed maze per level offscreen, reports fps and per-pass times,
+    then checks fixed shots against the golden images. Returns the number of golden failures."""
+    import os
+    global WINDOW_W, WINDOW_H, console_output, game_state
+    width, height = BENCH_SIZE
+    platform, handles = create_offscreen_context(width, height)
+    if leak_tracker:
+        leak_tracker.track_gl_objects()
+    WINDOW_W, WINDOW_H = width, height
+    console_output = False
+    init_gl_state()
+    select_renderer(renderer_name)
+    print(f"Offscreen {platform}: {glGetString(GL_RENDERER).decode()} / OpenGL {glGetString(GL_VERSION).decode()}")
+    print(f"Renderer {renderer.name}, {width}x{height}, {frames} frames per level")
+    os.makedirs(goldens_dir, exist_ok=True)
+    failures = 0
+    for level in levels:
+        random.seed(seed * 1000 + level)                                   # Same maze, traps and enemies each run
+        start_game(level)
+        apply_level_theme()
+        game_state = "playing"
+        start = (int(player_x // CELL_SIZE), int(player_y // CELL_SIZE))
+        path = game_maze.find_shortest_path(start, game_maze.goal) or [start]
+        render_bench_frame(0.0, path, width, height)                       # Warm up: level upload, list compile
+        timings = {name: [] for name in BENCH_PASSES}
+        t0 = time.perf_counter()
+        for i in range(frames):
+            render_bench_frame(i / max(1, frames - 1), path, width, height, timings)
+            if recorder:
+                recorder.capture()                                         # --record: the flythrough
+            if leak_tracker:
+                leak_tracker.frame()
+        elapsed = time.perf_counter() - t0
+        print(f"Level {level}: {frames / elapsed:.1f} fps ({elapsed / frames * 1000:.2f} ms/frame)")
+        for name in BENCH_PASSES:
+            samples = sorted(timings[name])
+            print(f"  {name:<16}mean {sum(samples) / len(samples) * 1000:7.2f} ms"
+                  f"   p95 {samples[int(0.95 * (len(samples) - 1))] * 1000:7.2f} ms")
+
+        for shot in GOLDEN_SHOTS:
+            lod_tiers.clear()                                              # LOD history must not leak into goldens
+            rgb = render_bench_frame(shot, path, width, height)
+            golden_path = os.path.join(goldens_dir, f"level{level}_seed{seed}_{int(shot * 100):03d}.png")
+            if update_goldens:
+                write_png(golden_path, width, height, rgb)
+                print(f"  wrote {golden_path}")
+                continue
+            if not os.path.exists(golden_path):
+                print(f"  MISSING {golden_path} (create it with --update-goldens)")
+                failures += 1
+                continue
+            golden_w, golden_h, golden = read_png(golden_path)
+            if (golden_w, golden_h) != (width, height):
+                print(f"  FAIL {golden_path}: golden is {golden_w}x{golden_h}")
+                failures += 1
+                continue
+            changed = compare_to_golden(rgb, golden)
+            if changed > GOLDEN_PIXEL_FRACTION:
+                actual_path = golden_path[:-4] + '.actual.png'
+                write_png(actual_path, width, height, rgb)
+                print(f"  FAIL {golden_path}: {changed:.2%} of pixels differ (frame saved to {actual_path})")
+                failures += 1
+            else:
+                print(f"  ok   {golden_path}: {changed:.2%} of pixels differ")
+    if leak_tracker:
+        leak_tracker.report()
+    return failures
+
+def parse_args(argv):
+    """Parses game options, anything unrecognised is passed on to glutInit."""
+    import argparse
+    parser = argparse.ArgumentParser(description="The Final Door - Maze Adventure")
+    parser.add_argument('--debug', action='store_true',
+                        help="keep PyOpenGL per-call error checking and logging (slower)")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print the startup timing breakdown and exit")
+    parser.add_argument('--input-latency', action='store_true',
+                        help="print input-to-frame latency statistics every few seconds")
+    parser.add_argument('--leak-check', action='store_true',
+                        help="track Python allocation growth by call site and live GL objects, report every 10 s")
+    parser.add_argument('--fps', type=int, default=TARGET_FPS,
+                        help="gameplay frame rate cap, with the time between frames spent asleep (0: no cap)")
+    parser.add_argument('--frame-budget', type=float, metavar='MS',
+                        help="frame time the governor holds by lowering render quality "
+                             "(default: one frame at --fps, 0: always full quality)")
+    parser.add_argument('--show-governor', action='store_true',
+                        help="print the frame governor's quality changes and show its decisions on the HUD")
+    parser.add_argument('--telemetry', metavar='PATH',
+                        help="record gameplay events (levels, kills, damage, deaths, frame times) to a rotating JSONL file")
+    parser.add_argument('--threaded-sim', action='store_true',
+                        help="run the simulation on its own thread, overlapping with rendering")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record the frames on screen: a directory for a PNG sequence, or a .rgb file for raw RGB24 video")
+    parser.add_argument('--record-scale', type=int, default=1, metavar='N',
+                        help="record at 1/N of the window size (downscaled on the GPU)")
+    parser.add_argument('--record-every', type=int, default=1, metavar='N', help="record every Nth frame")
+    parser.add_argument('--gen-budget', type=float, default=GENERATION_BUDGET_MS, metavar='MS',
+                        help="time per frame spent building a level behind the loading screen")
+    parser.add_argument('--no-particles', action='store_true', help="no sparks on bullet impacts or debris on enemy deaths")
+    parser.add_argument('--renderer', choices=sorted(RENDERERS), default='immediate',
+                        help="3D scene backend: fixed-function immediate mode or GLSL shaders with vertex buffers")
+    tools = parser.add_argument_group('level analytics')
+    tools.add_argument('--analyze', type=int, metavar='COUNT',
+                       help="generate COUNT levels per level number headlessly and report distributions")
+    tools.add_argument('--levels', default='1,2,3', help="comma separated level numbers (default 1,2,3)")
+    tools.add_argument('--workers', type=int, default=0, help="worker processes (default: all cores)")
+    tools.add_argument('--out', default='maze_analytics.jsonl', help="JSONL file for per-level rows")
+    tools.add_argument('--seed', type=int, default=0, help="base random seed")
+    soak = parser.add_argument_group('autopilot soak test')
+    soak.add_argument('--autopilot', type=int, metavar='RUNS',
+                      help="let the bot play RUNS level attempts headlessly and report throughput")
+    soak.add_argument('--max-seconds', type=float, default=0, help="stop the soak test after this long")
+    soak.add_argument('--report-every', type=float, default=10.0, help="seconds between progress reports")
+    vector = parser.add_argument_group('vectorized environment benchmark')
+    vector.add_argument('--vector-env', type=int, metavar='N', help="step N game instances in lockstep and report throughput")
+    vector.add_argument('--steps', type=int, default=2000, help="batched steps to run")
+    net = parser.add_argument_group('multiplayer server')
+    net.add_argument('--serve', metavar='HOST:PORT', help="run the authoritative game server")
+    net.add_argument('--serve-selftest', type=int, metavar='CLIENTS', help="run the server against loopback clients")
+    net.add_argument('--tick-rate', type=int, default=SERVER_TICK_RATE, help="snapshots sent to each client per second")
+    net.add_argument('--duration', type=float, default=10.0, help="self-test length in seconds")
+    bench = parser.add_argument_group('offscreen render benchmark')
+    bench.add_argument('--bench-render', action='store_true',
+                       help="render scripted flythroughs offscreen (EGL/OSMesa), report fps and check golden images")
+    bench.add_argument('--frames', type=int, default=120, help="flythrough frames per level")
+    bench.add_argument('--goldens', default='goldens', help="directory of golden images")
+    bench.add_argument('--update-goldens', action='store_true', help="overwrite the golden images with this run's frames")
+    return parser.parse_known_args(argv)
+
+def init_gl_state():
+    """Basic OpenGL state shared by the window and the offscreen benchmark."""
     glClearColor(*LEVEL_SETTINGS[1]['sky_color'])               # Default sky color
     glEnable(GL_COLOR_MATERIAL)                                 # Enable color in objects
     glColorMaterial(GL_FRONT_AND_BACK, GL_AMBIENT_AND_DIFFUSE)  # Use color for ambient+diffuse
     glEnable(GL_DEPTH_TEST)                                     # Enable depth buffer
 
-    # Generate initial maze for menu background before starting game loop
-    initialize_intro_scene()                                    # Build menu maze
+def main():
+    """Initialization and entry point for the application."""
+    global debug_mode, profile_startup_only, latency_report, leak_tracker, governor, telemetry, target_fps, recorder
+    global generation_budget_ms, particles
+    args, glut_args = parse_args(sys.argv[1:])
+    debug_mode, profile_startup_only = args.debug, args.profile_startup
+    latency_report = args.input_latency
+    if args.leak_check:
+        leak_tracker = LeakTracker()                            # Before anything worth tracking is allocated
+    if args.telemetry:
+        import atexit
+        telemetry = Telemetry(args.telemetry)                   # Autopilot runs are recorded too
+        atexit.register(telemetry.close)                        # Flush the queue on any exit
+    if args.record:
+        import atexit
+        recorder = FrameRecorder(args.record, args.record_scale, args.record_every)
+        atexit.register(recorder.close)
+    if args.analyze:                                            # Headless tool, no window
+        levels = [int(level) for level in args.levels.split(',')]
+        run_level_analytics(args.analyze, levels, args.workers, args.out, args.seed)
+        return
+    if args.autopilot:
+        run_autopilot(args.autopilot, args.max_seconds, args.report_every, args.seed)
+        return
+    if args.vector_env:
+        run_vector_env_benchmark(args.vector_env, args.steps, int(args.levels.split(',')[0]), args.seed)
+        return
+    if args.serve_selftest:
+        run_server_selftest(args.serve_selftest, args.duration, args.tick_rate, int(args.levels.split(',')[0]))
+        return
+    if args.serve:
+        import asyncio
+        host, _, port = args.serve.rpartition(':')
+        print(f"Serving The Final Door on {host or '0.0.0.0'}:{port}, {args.tick_rate} snapshots/s")
+        asyncio.run(GameServer(int(args.levels.split(',')[0]), args.tick_rate).run(host or '0.0.0.0', int(port)))
+        return
+    if args.bench_render:                                       # Offscreen, exit status 1 on golden mismatches
+        levels = [int(level) for level in args.levels.split(',')]
+        failures = run_render_benchmark(levels, args.frames, args.seed, args.renderer, args.goldens, args.update_goldens)
+        sys.exit(1 if failures else 0)
+    target_fps = args.fps
+    if not args.no_particles:
+        try:
+            particles = ParticleSystem()
+        except ImportError:
+            print("NumPy not installed: bullet impact and enemy death particles are off")
+    generation_budget_ms = args.gen_budget
+    if args.frame_budget is None:
+        args.frame_budget = 1000.0 / target_fps if target_fps else FRAME_BUDGET_MS   # Paced frames are not slow ones
+    governor = FrameGovernor(args.frame_budget)                 # Render quality vs frame budget
+    governor.verbose = args.show_governor
+    mark_startup('python modules')
+    load_opengl(debug_mode)                                     # GL/GLUT/GLU with mode flags
+    if leak_tracker:
+        leak_tracker.track_gl_objects()                         # Count live GL objects by creating line
+    mark_startup('pyopengl import')
+
+    glutInit([sys.argv[0]] + glut_args)
+    glutInitDisplayMode(GLUT_DOUBLE | GLUT_RGB | GLUT_DEPTH)    # Double buffer, color, depth
+    glutInitWindowSize(WINDOW_W, WINDOW_H)                      # Window size
+    glutCreateWindow(b"The Final Door - Maze Adventure")        # Create window with title
+    mark_startup('glut init + window')
+
+    init_gl_state()                                             # Basic OpenGL setup
+    mark_startup('gl state setup')
+    select_renderer(args.renderer)                              # Shader backend falls back if unsupported
+    mark_startup('renderer setup')
+    if args.threaded_sim:
+        start_simulation_thread()                               # Ticks run beside the GLUT thread from here on
+    # The menu background maze is generated by finish_startup() after the first frame
 
     # Register callbacks
     glutDisplayFunc(showScreen)                                 # Draw callback
-    glutIdleFunc(showScreen)                                    # Continuous redraw
+    glutTimerFunc(0, frame_timer, 0)                            # Paced redraws, none on a static screen
     glutKeyboardFunc(keyboardListener)                          # Keyboard input
+    glutKeyboardUpFunc(keyboardUpListener)                      # Key releases (key-state table)
+    glutIgnoreKeyRepeat(1)                                      # Held keys are sampled per tick instead
     glutSpecialFunc(specialKeyListener)                         # Arrow keys
+    glutSpecialUpFunc(specialUpListener)                        # Arrow key releases (key-state table)
     glutMouseFunc(mouseListener)                                # Mouse input
 
     # Start the application loop